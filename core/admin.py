@@ -1,42 +1,182 @@
 from django.contrib import admin
-from .models import Investor, Artifact, EmailDraft, CommunicationLog, ResponseFunding
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Count, Q
+from django.utils.functional import cached_property
+from . import segments
+from .forms import SegmentForm
+from .models import (
+    Investor, InvestorAlias, Artifact, EmailDraft, CommunicationLog, ResponseFunding, Segment,
+    Campaign, CampaignRecipient, FollowUp, FollowUpRun
+)
+
+
+def estimated_row_count(model):
+    """
+    Cheap approximate row count from the PostgreSQL planner statistics, or None.
+    Other databases keep no such statistic; the highest id is no substitute, as it
+    overstates the count after deletes and the last pages come out empty.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for large changelists that avoids a full COUNT(*) on PostgreSQL.
+    Unfiltered lists use estimated_row_count() where there is one and an exact
+    COUNT(*) elsewhere; filtered lists are counted up to EXACT_COUNT_LIMIT rows,
+    and pages beyond that are not offered.
+    """
+    EXACT_COUNT_LIMIT = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list.order_by()
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model)
+            if estimate is None:
+                return queryset.count()
+            if estimate > self.EXACT_COUNT_LIMIT:
+                return estimate
+        return queryset[:self.EXACT_COUNT_LIMIT].count()
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables with hundreds of thousands of rows."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Investor)
-class InvestorAdmin(admin.ModelAdmin):
+class InvestorAdmin(LargeTableAdmin):
     list_display = ['id', 'name', 'email', 'amount', 'created_date', 'last_updated_on']
-    list_filter = ['created_date']
+    date_hierarchy = 'created_date'
     search_fields = ['name', 'email', 'labels']
     readonly_fields = ['created_date', 'last_updated_on']
 
 
+@admin.register(InvestorAlias)
+class InvestorAliasAdmin(admin.ModelAdmin):
+    list_display = ['email', 'investor', 'created_date']
+    list_select_related = ['investor']
+    search_fields = ['email', 'investor__name', 'investor__email']
+    autocomplete_fields = ['investor']
+
+
 @admin.register(Artifact)
 class ArtifactAdmin(admin.ModelAdmin):
-    list_display = ['id', 'name', 'artifact_type', 'created_date', 'created_by']
-    list_filter = ['artifact_type', 'created_date']
+    list_display = ['id', 'name', 'artifact_type', 'processing_status', 'created_date', 'created_by']
+    list_filter = ['artifact_type', 'processing_status', 'created_date']
+    list_select_related = ['created_by']
     search_fields = ['name', 'artifact_labels']
-    readonly_fields = ['created_date']
+    readonly_fields = [
+        'created_date', 'thumbnail', 'file_size', 'width', 'height', 'duration', 'page_count',
+        'processing_status', 'processing_error',
+    ]
 
 
 @admin.register(EmailDraft)
 class EmailDraftAdmin(admin.ModelAdmin):
     list_display = ['id', 'name', 'subject', 'created_date', 'created_by']
+    list_select_related = ['created_by']
     search_fields = ['name', 'subject']
     readonly_fields = ['created_date', 'last_updated_on']
     filter_horizontal = ['artifacts']
 
 
 @admin.register(CommunicationLog)
-class CommunicationLogAdmin(admin.ModelAdmin):
+class CommunicationLogAdmin(LargeTableAdmin):
     list_display = ['id', 'investor', 'draft', 'status', 'sent_at', 'sent_by']
-    list_filter = ['status', 'sent_at']
+    list_filter = ['status']
+    list_select_related = ['investor', 'draft', 'sent_by']
+    date_hierarchy = 'sent_at'
     search_fields = ['investor__name', 'investor__email']
+    autocomplete_fields = ['investor', 'draft', 'sent_by']
     readonly_fields = ['sent_at']
 
 
 @admin.register(ResponseFunding)
-class ResponseFundingAdmin(admin.ModelAdmin):
+class ResponseFundingAdmin(LargeTableAdmin):
     list_display = ['id', 'investor', 'response_status', 'amount_offered', 'response_date', 'created_by']
-    list_filter = ['response_status', 'response_date']
+    list_filter = ['response_status']
+    list_select_related = ['investor', 'created_by']
+    date_hierarchy = 'response_date'
     search_fields = ['investor__name', 'notes']
+    autocomplete_fields = ['communication', 'investor', 'created_by']
     readonly_fields = ['created_date']
+
+
+@admin.register(Segment)
+class SegmentAdmin(admin.ModelAdmin):
+    form = SegmentForm
+    list_display = ['name', 'definition', 'member_count', 'rebuilt_at', 'created_by']
+    search_fields = ['name', 'definition']
+    readonly_fields = ['member_count', 'change_cursor', 'rebuilt_at', 'created_date', 'last_updated_on']
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+        if 'definition' in form.changed_data:
+            segments.rebuild(obj)
+
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'name', 'draft', 'segment', 'label', 'send_after', 'send_before', 'max_per_hour', 'status', 'progress',
+    ]
+    list_filter = ['status', 'send_after']
+    search_fields = ['name', 'label']
+    autocomplete_fields = ['draft', 'segment']
+    readonly_fields = ['tokens', 'tokens_updated_at', 'created_date']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('draft', 'segment').annotate(
+            total=Count('recipients'),
+            sent=Count('recipients', filter=Q(recipients__status='sent')),
+        )
+
+    @admin.display(description='Sent')
+    def progress(self, obj):
+        return f'{obj.sent} / {obj.total}'
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(CampaignRecipient)
+class CampaignRecipientAdmin(LargeTableAdmin):
+    list_display = ['id', 'campaign', 'investor', 'status', 'attempts', 'updated_at']
+    list_filter = ['status', 'campaign']
+    list_select_related = ['campaign', 'investor']
+    search_fields = ['investor__name', 'investor__email']
+    autocomplete_fields = ['campaign', 'investor']
+    raw_id_fields = ['communication']
+    readonly_fields = ['attempts', 'updated_at']
+
+
+@admin.register(FollowUp)
+class FollowUpAdmin(LargeTableAdmin):
+    list_display = ['id', 'investor', 'draft', 'status', 'due_date', 'updated_at']
+    list_filter = ['status']
+    list_select_related = ['investor', 'draft']
+    date_hierarchy = 'due_date'
+    search_fields = ['investor__name', 'investor__email']
+    autocomplete_fields = ['investor', 'draft']
+    raw_id_fields = ['communication', 'sent_communication']
+    readonly_fields = ['created_date', 'updated_at']
+
+
+@admin.register(FollowUpRun)
+class FollowUpRunAdmin(admin.ModelAdmin):
+    list_display = ['started_at', 'after_days', 'since', 'cutoff', 'queued']
+    list_filter = ['after_days']
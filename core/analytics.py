@@ -0,0 +1,230 @@
+"""
+Analytics queries for the dashboard and the analytics API.
+Communication and response figures are read from the daily rollup tables, never from raw logs.
+"""
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import EmailDraft, CommunicationLog, ResponseFunding, CommunicationDailyRollup, ResponseDailyRollup
+from .rollups import day_start
+
+
+DEFAULT_WINDOW_DAYS = 90
+MAX_WINDOW_DAYS = 3660
+
+CACHE_VERSION_KEY = 'analytics:version'
+CACHE_TIMEOUT = 300  # seconds; bounds staleness for per-process caches
+
+
+def cache_version():
+    version = cache.get(CACHE_VERSION_KEY)
+    if version is None:
+        cache.add(CACHE_VERSION_KEY, 1, None)
+        version = cache.get(CACHE_VERSION_KEY, 1)
+    return version
+
+
+def invalidate_cache():
+    """Invalidate every cached analytics result by bumping the shared version."""
+    try:
+        cache.incr(CACHE_VERSION_KEY)
+    except ValueError:
+        cache.add(CACHE_VERSION_KEY, 1, None)
+
+
+def parse_window(params, default_days=DEFAULT_WINDOW_DAYS):
+    """
+    Parse a date window from request parameters.
+
+    Accepts ?start=YYYY-MM-DD&end=YYYY-MM-DD or ?days=N (ending today).
+
+    Returns:
+        tuple: (start: date, end: date)
+
+    Raises:
+        ValueError: on malformed or out-of-range parameters
+    """
+    today = timezone.localdate()
+    end = date.fromisoformat(params['end']) if params.get('end') else today
+    if params.get('start'):
+        start = date.fromisoformat(params['start'])
+    else:
+        days = int(params.get('days') or default_days)
+        if days < 1:
+            raise ValueError('days must be positive')
+        start = end - timedelta(days=days - 1)
+
+    if start > end:
+        raise ValueError('start must not be after end')
+    if (end - start).days >= MAX_WINDOW_DAYS:
+        raise ValueError(f'window must be shorter than {MAX_WINDOW_DAYS} days')
+    return start, end
+
+
+def aging_buckets(today=None):
+    """Successful email counts for the dashboard aging buckets, in one query."""
+    today = today or timezone.localdate()
+    day_7 = today - timedelta(days=7)
+    day_15 = today - timedelta(days=15)
+    day_30 = today - timedelta(days=30)
+
+    totals = CommunicationDailyRollup.objects.filter(status='success').aggregate(
+        total=Sum('count'),
+        last_7=Sum('count', filter=Q(day__gt=day_7)),
+        last_15=Sum('count', filter=Q(day__gt=day_15, day__lte=day_7)),
+        last_30=Sum('count', filter=Q(day__gt=day_30, day__lte=day_15)),
+        older=Sum('count', filter=Q(day__lte=day_30)),
+    )
+    return {key: value or 0 for key, value in totals.items()}
+
+
+def response_totals():
+    """Response count and amount per status."""
+    data = {status: {'count': 0, 'amount': 0} for status, _ in ResponseFunding.RESPONSE_STATUS}
+    rows = ResponseDailyRollup.objects.order_by().values('response_status').annotate(
+        count=Sum('count'), amount=Sum('total_amount')
+    )
+    for row in rows:
+        data[row['response_status']] = {'count': row['count'] or 0, 'amount': row['amount'] or 0}
+    return data
+
+
+def draft_conversion(start, end):
+    """
+    Per-draft sends, responses, successes and funding within a day window.
+
+    Returns:
+        list: one dict per draft (draft_id None means custom emails), most sends first
+    """
+    rows = {}
+
+    def row_for(draft_id):
+        return rows.setdefault(draft_id, {
+            'draft_id': draft_id, 'sent': 0, 'failed': 0,
+            'responses': 0, 'success': 0, 'amount': 0,
+        })
+
+    sends = CommunicationDailyRollup.objects.filter(day__range=(start, end)).order_by().values(
+        'draft_id', 'status'
+    ).annotate(total=Sum('count'))
+    for row in sends:
+        key = 'sent' if row['status'] == 'success' else 'failed'
+        row_for(row['draft_id'])[key] += row['total']
+
+    responses = ResponseDailyRollup.objects.filter(day__range=(start, end)).order_by().values(
+        'draft_id'
+    ).annotate(
+        total=Sum('count'),
+        success=Sum('count', filter=Q(response_status='success')),
+        amount=Sum('total_amount', filter=Q(response_status='success')),
+    )
+    for row in responses:
+        entry = row_for(row['draft_id'])
+        entry['responses'] = row['total'] or 0
+        entry['success'] = row['success'] or 0
+        entry['amount'] = row['amount'] or 0
+
+    names = dict(EmailDraft.objects.filter(pk__in=[pk for pk in rows if pk]).values_list('id', 'name'))
+    for entry in rows.values():
+        entry['draft'] = names.get(entry['draft_id'], 'Custom Email')
+        entry['response_rate'] = round(entry['responses'] / entry['sent'], 4) if entry['sent'] else 0
+        entry['conversion_rate'] = round(entry['success'] / entry['sent'], 4) if entry['sent'] else 0
+
+    return sorted(rows.values(), key=lambda entry: (-entry['sent'], entry['draft']))
+
+
+def daily_series(start, end):
+    """
+    Daily time series of sends, responses and funding, shaped for charting.
+
+    Returns:
+        dict: {'days': [...], 'series': {name: [...]}} with one value per day in the window
+    """
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    index = {day: i for i, day in enumerate(days)}
+    names = ['sent', 'failed', 'responses', 'success', 'failure', 'pending', 'amount']
+    series = {name: [0] * len(days) for name in names}
+
+    sends = CommunicationDailyRollup.objects.filter(day__range=(start, end)).order_by().values(
+        'day', 'status'
+    ).annotate(total=Sum('count'))
+    for row in sends:
+        key = 'sent' if row['status'] == 'success' else 'failed'
+        series[key][index[row['day']]] += row['total']
+
+    responses = ResponseDailyRollup.objects.filter(day__range=(start, end)).order_by().values(
+        'day', 'response_status'
+    ).annotate(total=Sum('count'), amount=Sum('total_amount'))
+    for row in responses:
+        i = index[row['day']]
+        series['responses'][i] += row['total']
+        series[row['response_status']][i] += row['total']
+        if row['response_status'] == 'success':
+            series['amount'][i] += row['amount'] or 0
+
+    return {'days': [day.isoformat() for day in days], 'series': series}
+
+
+def _funnel_row():
+    return {'sent': 0, 'responded': 0, 'success': 0, 'amount': 0}
+
+
+def _chart(rows, order):
+    """Reshape {name: funnel dict} into parallel arrays for charting."""
+    return {
+        'labels': order,
+        'series': {key: [rows[name][key] for name in order] for key in _funnel_row()},
+    }
+
+
+def funnel(start, end):
+    """
+    Draft conversion funnel: sends -> responses -> success -> amount offered.
+
+    Covers emails sent within [start, end]; their responses count whenever they arrived.
+    Each breakdown is a single grouped query. Results are cached per window.
+
+    Returns:
+        dict: {'drafts': chart, 'investor_labels': chart}
+    """
+    key = f'analytics:funnel:{cache_version()}:{start.isoformat()}:{end.isoformat()}'
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    communications = CommunicationLog.objects.filter(
+        sent_at__gte=day_start(start),
+        sent_at__lt=day_start(end + timedelta(days=1)),
+    ).order_by()
+    metrics = {
+        'sent': Count('id', distinct=True, filter=Q(status='success')),
+        'responded': Count('id', distinct=True, filter=Q(responses__isnull=False)),
+        'success': Count('id', distinct=True, filter=Q(responses__response_status='success')),
+        'amount': Sum('responses__amount_offered', filter=Q(responses__response_status='success')),
+    }
+
+    drafts = {}
+    for row in communications.values('draft__name').annotate(**metrics):
+        entry = drafts.setdefault(row['draft__name'] or 'Custom Email', _funnel_row())
+        for metric in entry:
+            entry[metric] += row[metric] or 0
+
+    # Group by the raw labels string, then credit each label in the combination.
+    # Every communication belongs to exactly one investor, so the counts stay additive.
+    labels = {}
+    for row in communications.values('investor__labels').annotate(**metrics):
+        names = {label.strip() for label in (row['investor__labels'] or '').split(',') if label.strip()}
+        for name in names or {'Unlabelled'}:
+            entry = labels.setdefault(name, _funnel_row())
+            for metric in entry:
+                entry[metric] += row[metric] or 0
+
+    result = {
+        'drafts': _chart(drafts, sorted(drafts, key=lambda name: -drafts[name]['sent'])),
+        'investor_labels': _chart(labels, sorted(labels, key=lambda name: -labels[name]['sent'])),
+    }
+    cache.set(key, result, CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,397 @@
+"""
+JSON REST API for the core models.
+
+Every resource supports:
+  - sparse fieldsets:   ?fields=id,name,email
+  - keyset pagination:  ?after=<last id>&limit=<n>  (ordered by id)
+  - If-Modified-Since:  on resources with a modification timestamp
+  - bulk writes:        POST a list to create, PATCH a list (each with "id") to update,
+                        DELETE {"ids": [...]} to delete; each request is one transaction
+
+Rows are serialized straight from values() without instantiating model objects.
+Authentication uses the regular session (and therefore CSRF for writes).
+"""
+import json
+from decimal import Decimal
+from functools import wraps
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Max
+from django.http import HttpResponse, JsonResponse
+from django.utils.http import http_date, parse_http_date_safe
+
+from .models import Investor, Artifact, EmailDraft, CommunicationLog, ResponseFunding, ChangeLog
+
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class Resource:
+    """Describes how a model is exposed through the API."""
+
+    def __init__(self, model, fields, writable, modified_field=None, many_to_many=(),
+                 creatable=True, owner_field=None):
+        self.model = model
+        self.fields = fields                  # readable fields, in output order
+        self.writable = writable              # fields accepted on create/update
+        self.modified_field = modified_field  # drives Last-Modified / If-Modified-Since
+        self.many_to_many = many_to_many      # serialized as lists of ids
+        self.creatable = creatable
+        self.owner_field = owner_field        # set to the request user on create
+
+    def fk_fields(self):
+        return {
+            field.name for field in self.model._meta.concrete_fields
+            if field.is_relation and field.name in self.writable
+        }
+
+
+RESOURCES = {
+    'investors': Resource(
+        Investor,
+        fields=['id', 'name', 'email', 'labels', 'address', 'details', 'amount',
+                'created_date', 'last_updated_on', 'updated_by'],
+        writable=['name', 'email', 'labels', 'address', 'details', 'amount'],
+        modified_field='last_updated_on',
+    ),
+    'artifacts': Resource(
+        Artifact,
+        fields=['id', 'name', 'artifact_type', 'artifact_labels', 'file', 'description',
+                'created_date', 'created_by'],
+        writable=['name', 'artifact_type', 'artifact_labels', 'description'],
+        creatable=False,  # files are uploaded through the artifact form
+    ),
+    'drafts': Resource(
+        EmailDraft,
+        fields=['id', 'name', 'subject', 'body', 'artifacts', 'attachment_budget',
+                'created_date', 'last_updated_on', 'created_by'],
+        writable=['name', 'subject', 'body', 'artifacts', 'attachment_budget'],
+        modified_field='last_updated_on',
+        many_to_many=['artifacts'],
+        owner_field='created_by',
+    ),
+    'communications': Resource(
+        CommunicationLog,
+        fields=['id', 'investor', 'draft', 'sent_at', 'status', 'sent_by', 'notes'],
+        writable=['investor', 'draft', 'status', 'notes'],
+        owner_field='sent_by',
+    ),
+    'responses': Resource(
+        ResponseFunding,
+        fields=['id', 'communication', 'investor', 'response_status', 'amount_offered', 'notes',
+                'response_date', 'created_date', 'created_by', 'draft', 'latency_seconds', 'is_first_response'],
+        writable=['communication', 'investor', 'response_status', 'amount_offered', 'notes', 'response_date'],
+        owner_field='created_by',
+    ),
+}
+
+
+class APIError(Exception):
+    def __init__(self, message, status=400, errors=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.errors = errors
+
+
+def json_response(data, status=200):
+    return HttpResponse(json.dumps(data, cls=DjangoJSONEncoder), status=status, content_type='application/json')
+
+
+def api_view(view_func):
+    """Resolve the resource, require a logged-in user and turn APIError into JSON errors."""
+    @wraps(view_func)
+    def wrapper(request, resource, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'type': 'error', 'message': 'Authentication required.'}, status=401)
+        try:
+            return view_func(request, RESOURCES[resource], *args, **kwargs)
+        except APIError as e:
+            body = {'type': 'error', 'message': e.message}
+            if e.errors is not None:
+                body['errors'] = e.errors
+            return json_response(body, status=e.status)
+    return wrapper
+
+
+# ==================== Reading ====================
+
+def requested_fields(request, resource):
+    """Validate ?fields= against the resource's readable fields."""
+    param = request.GET.get('fields')
+    if not param:
+        return list(resource.fields)
+    fields = [name.strip() for name in param.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in resource.fields]
+    if unknown:
+        raise APIError(f"Unknown fields: {', '.join(unknown)}")
+    if 'id' not in fields:
+        fields.insert(0, 'id')  # needed for keyset pagination
+    return fields
+
+
+def serialize_rows(resource, queryset, fields):
+    """Fetch rows with values(); many-to-many fields are filled with one extra query each."""
+    scalar = [name for name in fields if name not in resource.many_to_many]
+    rows = list(queryset.values(*scalar))
+
+    for name in fields:
+        if name not in resource.many_to_many:
+            continue
+        relation = resource.model._meta.get_field(name)
+        through = relation.remote_field.through
+        source = relation.m2m_field_name()
+        target = relation.m2m_reverse_field_name()
+        related = {}
+        for owner_id, target_id in through.objects.filter(
+            **{f'{source}__in': [row['id'] for row in rows]}
+        ).values_list(f'{source}_id', f'{target}_id'):
+            related.setdefault(owner_id, []).append(target_id)
+        for row in rows:
+            row[name] = related.get(row['id'], [])
+    return rows
+
+
+def not_modified(request, last_modified):
+    """True when the client's If-Modified-Since covers last_modified."""
+    if last_modified is None:
+        return False
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and int(last_modified.timestamp()) <= since
+
+
+def with_last_modified(response, last_modified):
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def collection_last_modified(resource, queryset):
+    """
+    Newest of the resource's modified field and the change log head. Deletes leave no
+    row to carry a timestamp, so the change log is what moves Last-Modified past them.
+    """
+    latest = queryset.aggregate(latest=Max(resource.modified_field))['latest']
+    head = (
+        ChangeLog.objects.filter(sequence__isnull=False).order_by('-sequence')
+        .values_list('changed_at', flat=True).first()
+    )
+    return max((stamp for stamp in (latest, head) if stamp), default=None)
+
+
+def list_rows(request, resource):
+    fields = requested_fields(request, resource)
+    queryset = resource.model.objects.order_by('pk')
+
+    last_modified = None
+    if resource.modified_field:
+        last_modified = collection_last_modified(resource, queryset)
+        if not_modified(request, last_modified):
+            return with_last_modified(HttpResponse(status=304), last_modified)
+
+    try:
+        limit = min(int(request.GET.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        raise APIError('limit and after must be integers')
+    if limit < 1:
+        raise APIError('limit must be positive')
+
+    rows = serialize_rows(resource, queryset.filter(pk__gt=after)[:limit + 1], fields)
+    next_after = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_after = rows[-1]['id']
+
+    return with_last_modified(json_response({'results': rows, 'next_after': next_after}), last_modified)
+
+
+# ==================== Writing ====================
+
+def parse_body(request):
+    try:
+        return json.loads(request.body or b'null', parse_float=Decimal)
+    except json.JSONDecodeError:
+        raise APIError('Invalid JSON body.')
+
+
+def parse_ids(values, name='ids'):
+    """
+    Validate a list of client-supplied primary keys.
+
+    Raises:
+        APIError: unless every value is an integer
+    """
+    if not isinstance(values, list) or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in values):
+        raise APIError(f'"{name}" must be a list of integer ids.')
+    return values
+
+
+def check_related_ids(resource, name, ids):
+    """
+    Validate many-to-many target ids before they are set.
+
+    Raises:
+        ValidationError: if an id is not an integer or does not exist
+    """
+    if not isinstance(ids, list) or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+        raise ValidationError({name: 'Expected a list of integer ids.'})
+    related = resource.model._meta.get_field(name).related_model
+    found = set(related.objects.filter(pk__in=ids).values_list('pk', flat=True))
+    missing = [pk for pk in ids if pk not in found]
+    if missing:
+        raise ValidationError({name: f"Not found: {', '.join(map(str, missing))}"})
+    return ids
+
+
+def apply_values(resource, obj, data):
+    """Assign writable values to obj; returns pending many-to-many values."""
+    unknown = [name for name in data if name not in resource.writable and name != 'id']
+    if unknown:
+        raise ValidationError({name: 'Field is not writable.' for name in unknown})
+
+    fk_fields = resource.fk_fields()
+    m2m = {}
+    for name, value in data.items():
+        if name == 'id':
+            continue
+        if name in resource.many_to_many:
+            m2m[name] = check_related_ids(resource, name, value or [])
+        elif name in fk_fields:
+            setattr(obj, f'{name}_id', value)
+        else:
+            setattr(obj, name, value)
+    return m2m
+
+
+def save_object(resource, obj, data, user):
+    m2m = apply_values(resource, obj, data)
+    if obj._state.adding and resource.owner_field:
+        setattr(obj, resource.owner_field, user)
+    if isinstance(obj, Investor):
+        obj.updated_by = user.username
+    # Nullable relations (e.g. a communication without a draft) may be left empty
+    nullable = [
+        field.name for field in resource.model._meta.concrete_fields
+        if field.null and getattr(obj, field.attname) is None
+    ]
+    obj.full_clean(exclude=nullable)
+    obj.save()
+    for name, ids in m2m.items():
+        getattr(obj, name).set(ids)
+    return obj.pk
+
+
+def write_many(resource, items, user, create):
+    """Create or update every item in one transaction, collecting per-item errors."""
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise APIError('Expected a JSON object or a list of objects.')
+
+    existing = {}
+    if not create:
+        ids = [item.get('id') for item in items]
+        if None in ids:
+            raise APIError('Every item needs an "id" to update.')
+        parse_ids(ids, 'id')
+        existing = resource.model.objects.in_bulk(ids)
+        missing = [pk for pk in ids if pk not in existing]
+        if missing:
+            raise APIError(f"Not found: {', '.join(map(str, missing))}", status=404)
+
+    pks, errors = [], {}
+    with transaction.atomic():
+        for index, item in enumerate(items):
+            obj = resource.model() if create else existing[item['id']]
+            try:
+                pks.append(save_object(resource, obj, item, user))
+            except ValidationError as e:
+                errors[index] = e.message_dict if hasattr(e, 'error_dict') else e.messages
+        if errors:
+            transaction.set_rollback(True)
+    if errors:
+        raise APIError('Validation failed; no changes were saved.', errors=errors)
+    return pks
+
+
+def rows_for(resource, pks):
+    rows = serialize_rows(resource, resource.model.objects.filter(pk__in=pks), resource.fields)
+    by_id = {row['id']: row for row in rows}
+    return [by_id[pk] for pk in pks if pk in by_id]
+
+
+# ==================== Views ====================
+
+@api_view
+def collection(request, resource):
+    """List, bulk-create, bulk-update or bulk-delete a resource."""
+    if request.method == 'GET':
+        return list_rows(request, resource)
+
+    data = parse_body(request)
+
+    if request.method == 'POST':
+        if not resource.creatable:
+            raise APIError('This resource cannot be created through the API.', status=405)
+        single = isinstance(data, dict)
+        pks = write_many(resource, [data] if single else data, request.user, create=True)
+        rows = rows_for(resource, pks)
+        return json_response(rows[0] if single else {'results': rows}, status=201)
+
+    if request.method == 'PATCH':
+        pks = write_many(resource, data, request.user, create=False)
+        return json_response({'results': rows_for(resource, pks)})
+
+    if request.method == 'DELETE':
+        ids = data.get('ids') if isinstance(data, dict) else None
+        if not isinstance(ids, list) or not ids:
+            raise APIError('Expected {"ids": [...]}.')
+        parse_ids(ids)
+        with transaction.atomic():
+            queryset = resource.model.objects.filter(pk__in=ids)
+            found = set(queryset.values_list('pk', flat=True))
+            missing = [pk for pk in ids if pk not in found]
+            if missing:
+                raise APIError(f"Not found: {', '.join(map(str, missing))}", status=404)
+            queryset.delete()
+        return json_response({'deleted': len(found)})
+
+    raise APIError('Method not allowed', status=405)
+
+
+@api_view
+def item(request, resource, pk):
+    """Retrieve, update or delete a single object."""
+    queryset = resource.model.objects.filter(pk=pk)
+
+    if request.method == 'GET':
+        fields = requested_fields(request, resource)
+        last_modified = None
+        if resource.modified_field:
+            last_modified = queryset.values_list(resource.modified_field, flat=True).first()
+            if not_modified(request, last_modified):
+                return with_last_modified(HttpResponse(status=304), last_modified)
+        rows = serialize_rows(resource, queryset, fields)
+        if not rows:
+            raise APIError('Not found.', status=404)
+        return with_last_modified(json_response(rows[0]), last_modified)
+
+    if request.method == 'PATCH':
+        data = parse_body(request)
+        if not isinstance(data, dict):
+            raise APIError('Expected a JSON object.')
+        if not queryset.exists():
+            raise APIError('Not found.', status=404)
+        write_many(resource, [{**data, 'id': pk}], request.user, create=False)
+        return json_response(rows_for(resource, [pk])[0])
+
+    if request.method == 'DELETE':
+        obj = queryset.first()
+        if obj is None:
+            raise APIError('Not found.', status=404)
+        obj.delete()
+        return HttpResponse(status=204)
+
+    raise APIError('Method not allowed', status=405)
@@ -0,0 +1,135 @@
+"""
+Attachment budgeting for draft emails.
+Decides which of a draft's artifacts fit in the message and which are sent as
+signed, expiring download links instead, and builds those links.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.template.defaultfilters import filesizeformat
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import escape
+
+
+SIGNING_SALT = 'core.artifact-download'
+
+# Base64 encoding grows attachments by 4/3 on the wire
+MIME_OVERHEAD = 4 / 3
+
+
+def budget_bytes(draft):
+    megabytes = draft.attachment_budget
+    if megabytes is None:
+        megabytes = getattr(settings, 'EMAIL_ATTACHMENT_BUDGET_MB', 10)
+    return megabytes * 1024 * 1024
+
+
+def artifact_size(artifact):
+    """Size in bytes, preferring the size recorded by the media pipeline."""
+    if artifact.file_size is not None:
+        return artifact.file_size
+    try:
+        return artifact.file.size
+    except (OSError, ValueError):
+        return None
+
+
+def encoded_size(size):
+    """Bytes a file of `size` bytes takes in the message once base64 encoded."""
+    return int(size * MIME_OVERHEAD)
+
+
+class AttachmentPlan:
+    """Which artifacts of a draft are attached and which are linked, with sizes."""
+
+    def __init__(self, draft, artifacts=None):
+        self.draft = draft
+        self.budget = budget_bytes(draft)
+        self.attached = []  # (artifact, size)
+        self.linked = []    # (artifact, size)
+        self.missing = []   # artifacts without a readable file
+
+        if artifacts is None:
+            artifacts = draft.artifacts.all()
+        sized = []
+        for artifact in artifacts:
+            size = artifact_size(artifact) if artifact.file else None
+            if size is None:
+                self.missing.append(artifact)
+            else:
+                sized.append((artifact, size))
+
+        # Smallest first, so as many artifacts as possible travel as real attachments.
+        # The budget caps the encoded size, which is what the mail server sees.
+        used = 0
+        for artifact, size in sorted(sized, key=lambda item: (item[1], item[0].pk)):
+            if used + encoded_size(size) <= self.budget:
+                self.attached.append((artifact, size))
+                used += encoded_size(size)
+            else:
+                self.linked.append((artifact, size))
+
+    @property
+    def attached_size(self):
+        return sum(size for _, size in self.attached)
+
+    @property
+    def linked_size(self):
+        return sum(size for _, size in self.linked)
+
+    @property
+    def message_size(self):
+        """Estimated size of one outgoing message, body and encoded attachments included."""
+        body = len(self.draft.body.encode()) + len(self.draft.subject.encode())
+        return body + sum(encoded_size(size) for _, size in self.attached)
+
+
+# ==================== Signed Links ====================
+
+def link_max_age():
+    return getattr(settings, 'ARTIFACT_LINK_MAX_AGE', 14 * 24 * 60 * 60)
+
+
+def make_token(artifact):
+    return signing.TimestampSigner(salt=SIGNING_SALT).sign(str(artifact.pk))
+
+
+def read_token(token):
+    """
+    Artifact pk from a download token.
+
+    Raises:
+        signing.SignatureExpired: if the link is older than ARTIFACT_LINK_MAX_AGE
+        signing.BadSignature: if the token was tampered with
+    """
+    value = signing.TimestampSigner(salt=SIGNING_SALT).unsign(token, max_age=link_max_age())
+    return int(value)
+
+
+def download_url(artifact):
+    """Absolute signed link to an artifact, for use outside the app (e.g. in emails)."""
+    path = reverse('artifact_download', kwargs={'token': make_token(artifact)})
+    return settings.SITE_URL.rstrip('/') + path
+
+
+def links_section(linked, html=False):
+    """Body text listing the linked artifacts, in plain text or HTML."""
+    if not linked:
+        return ''
+    expires = (timezone.now() + timedelta(seconds=link_max_age())).strftime('%b %d, %Y')
+    if html:
+        items = ''.join(
+            f'<li><a href="{escape(download_url(artifact))}">{escape(artifact.name)}</a>'
+            f' ({_format_size(size)})</li>'
+            for artifact, size in linked
+        )
+        return f'<p>Download the attached files (links valid until {expires}):</p><ul>{items}</ul>'
+
+    lines = '\n'.join(f'- {artifact.name} ({_format_size(size)}): {download_url(artifact)}' for artifact, size in linked)
+    return f'\n\nDownload the attached files (links valid until {expires}):\n{lines}\n'
+
+
+def _format_size(size):
+    return filesizeformat(size).replace('\xa0', ' ')
@@ -0,0 +1,47 @@
+"""
+Authentication backend with a cached user lookup.
+Every authenticated request resolves request.user from the session's user id; the
+ModelBackend does that with a query each time. CachedModelBackend keeps the user in the
+cache for USER_CACHE_SECONDS, and core.signals drops the entry whenever the user is saved
+or deleted (which includes password changes, deactivations and logins).
+
+The drop only reaches other workers through a cache they share, so users are cached only
+when the default cache is not process-local; with LocMemCache every request queries the
+user as ModelBackend does, and the core.E001 check rejects cached sessions on such a cache.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+USER_CACHE_SECONDS = 60
+
+
+def user_cache_key(user_id):
+    return f'core.auth.user:{user_id}'
+
+
+def invalidate_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def cache_is_shared():
+    """Whether the default cache is seen by every worker process."""
+    return not isinstance(caches['default'], LocMemCache)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose get_user() is served from the cache when it is shared."""
+
+    def get_user(self, user_id):
+        if not cache_is_shared():
+            return super().get_user(user_id)
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, getattr(settings, 'USER_CACHE_SECONDS', USER_CACHE_SECONDS))
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,186 @@
+"""
+Benchmark harness for the core views.
+Drives every named URL in core/urls.py through the Django test client and records
+latency, query counts and peak memory so runs can be compared against a baseline.
+"""
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+from . import urls as core_urls
+from .attachments import make_token
+from .models import Investor, Artifact, EmailDraft, CommunicationLog, ResponseFunding, Segment
+
+
+# URLs that would end or disturb the benchmark session.
+SKIP_URLS = {'logout'}
+
+
+def _busiest_investor():
+    return (
+        Investor.objects.annotate(n=Count('communications'))
+        .order_by('-n', 'pk')
+        .values_list('pk', flat=True)
+        .first()
+    )
+
+
+# URL name token -> callable returning the pk to benchmark with.
+PK_RESOLVERS = {
+    'investor': _busiest_investor,
+    'artifact': lambda: Artifact.objects.order_by('pk').values_list('pk', flat=True).first(),
+    'draft': lambda: EmailDraft.objects.order_by('pk').values_list('pk', flat=True).first(),
+    'communication': lambda: CommunicationLog.objects.order_by('pk').values_list('pk', flat=True).first(),
+    'response': lambda: ResponseFunding.objects.order_by('pk').values_list('pk', flat=True).first(),
+    'segment': lambda: Segment.objects.order_by('pk').values_list('pk', flat=True).first(),
+}
+
+
+def _download_kwargs():
+    artifact = Artifact.objects.order_by('pk').first()
+    return {'token': make_token(artifact)} if artifact else None
+
+
+# URL name -> callable returning the full URL kwargs, for URLs not keyed by <pk>.
+KWARG_RESOLVERS = {
+    'artifact_download': _download_kwargs,
+}
+
+
+def collect_targets():
+    """
+    Resolve every named core URL to a concrete path.
+
+    Returns:
+        list: (name, path) tuples; path is None when no object exists to fill <pk>.
+    """
+    targets = []
+    resolved_pks = {}
+    for pattern in core_urls.urlpatterns:
+        if not isinstance(pattern, URLPattern) or not pattern.name or pattern.name in SKIP_URLS:
+            continue
+
+        converters = pattern.pattern.converters
+        kwargs = {}
+        if pattern.name in KWARG_RESOLVERS:
+            kwargs = KWARG_RESOLVERS[pattern.name]()
+            if kwargs is None:
+                targets.append((pattern.name, None))
+                continue
+        elif converters:
+            prefix = next((token for token in pattern.name.split('_') if token in PK_RESOLVERS), None)
+            if set(converters) != {'pk'} or prefix is None:
+                targets.append((pattern.name, None))
+                continue
+            if prefix not in resolved_pks:
+                resolved_pks[prefix] = PK_RESOLVERS[prefix]()
+            if resolved_pks[prefix] is None:
+                targets.append((pattern.name, None))
+                continue
+            kwargs['pk'] = resolved_pks[prefix]
+
+        targets.append((pattern.name, reverse(pattern.name, kwargs=kwargs)))
+    return targets
+
+
+def measure(client, path, repeat=3):
+    """Benchmark a single GET request. Returns a result dict."""
+    client.get(path)  # warm-up
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(path)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # Separate pass for queries and memory so tracing does not skew latency
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            client.get(path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'path': path,
+        'status': response.status_code,
+        'latency_ms': round(statistics.median(timings), 3),
+        'latency_min_ms': round(min(timings), 3),
+        'latency_max_ms': round(max(timings), 3),
+        'queries': len(queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run_benchmark(user, repeat=3, stdout=None):
+    """
+    Benchmark all core URLs as the given user.
+
+    Returns:
+        dict: url name -> result dict (or {'skipped': reason})
+    """
+    client = Client()
+    client.force_login(user)
+
+    results = {}
+    for name, path in collect_targets():
+        if path is None:
+            results[name] = {'skipped': 'no object available for URL arguments'}
+            continue
+        results[name] = measure(client, path, repeat=repeat)
+        if stdout:
+            r = results[name]
+            stdout.write(
+                f"{name:<24} {r['status']:>4} {r['latency_ms']:>10.2f} ms "
+                f"{r['queries']:>5} queries {r['peak_memory_kb']:>10.1f} KB"
+            )
+    return results
+
+
+def find_regressions(results, baseline, threshold=0.25, min_latency_ms=5.0):
+    """
+    Compare results with a baseline.
+
+    A view regresses when its latency or peak memory grows by more than `threshold`
+    (a fraction), or when it issues more queries than before. Latency changes below
+    `min_latency_ms` are ignored as noise.
+
+    Returns:
+        list: human readable regression descriptions
+    """
+    regressions = []
+    for name, base in baseline.items():
+        current = results.get(name)
+        if not current or 'skipped' in current or 'skipped' in base:
+            continue
+
+        latency_delta = current['latency_ms'] - base['latency_ms']
+        if latency_delta > min_latency_ms and current['latency_ms'] > base['latency_ms'] * (1 + threshold):
+            regressions.append(
+                f"{name}: latency {base['latency_ms']:.2f} ms -> {current['latency_ms']:.2f} ms"
+            )
+        if current['queries'] > base['queries']:
+            regressions.append(f"{name}: queries {base['queries']} -> {current['queries']}")
+        if current['peak_memory_kb'] > base['peak_memory_kb'] * (1 + threshold):
+            regressions.append(
+                f"{name}: peak memory {base['peak_memory_kb']} KB -> {current['peak_memory_kb']} KB"
+            )
+    return regressions
+
+
+def save_results(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
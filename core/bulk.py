@@ -0,0 +1,160 @@
+"""
+Bulk actions for the investor and response lists.
+Every action is one set-based update() or delete() in a single transaction. Per-row
+signal maintenance is suspended while it runs; the daily rollups, the change feed and
+the analytics cache are then brought up to date once for the whole selection.
+"""
+import re
+
+from django.db import transaction
+from django.db.models import CharField, Case, Q, Value, When
+from django.db.models.functions import Concat, Length
+from django.utils import timezone
+
+from . import analytics, changes, latency, rollups
+from .models import Investor, CommunicationLog, ResponseFunding
+
+
+INVESTOR_ACTIONS = [
+    ('add_label', 'Add label'),
+    ('remove_label', 'Remove label'),
+    ('set_amount', 'Set amount'),
+    ('delete', 'Delete'),
+]
+
+RESPONSE_ACTIONS = [
+    ('set_status', 'Change status'),
+    ('set_amount', 'Set amount offered'),
+    ('delete', 'Delete'),
+]
+
+
+def label_pattern(label):
+    """Regex matching `label` as a whole entry of a comma-separated labels string."""
+    return r'(^|,)\s*' + re.escape(label) + r'\s*(,|$)'
+
+
+def _without_label(labels, label):
+    kept = [item.strip() for item in labels.split(',') if item.strip() and item.strip().lower() != label.lower()]
+    return ', '.join(kept)
+
+
+def _finish(model, ids, action):
+    """Record the changes and invalidate cached analytics once."""
+    changes.record_many(model, ids, action)
+    transaction.on_commit(analytics.invalidate_cache)
+
+
+@transaction.atomic
+def investor_action(ids, action, value=None, user=None):
+    """
+    Apply a bulk action to the selected investors.
+
+    Args:
+        ids: investor primary keys
+        action: one of INVESTOR_ACTIONS
+        value: label for add/remove_label, Decimal for set_amount
+        user: User performing the action (recorded in updated_by)
+
+    Returns:
+        int: number of investors changed
+
+    Raises:
+        ValueError: if the action cannot be applied
+    """
+    investors = Investor.objects.filter(pk__in=ids)
+    stamp = {'last_updated_on': timezone.now(), 'updated_by': user.username if user else ''}
+
+    if action == 'add_label':
+        targets = investors.exclude(labels__iregex=label_pattern(value))
+        room = Investor._meta.get_field('labels').max_length - len(value) - 2
+        if targets.annotate(length=Length('labels')).filter(length__gt=room).exists():
+            raise ValueError(f'Adding "{value}" would make some investors\' labels too long.')
+        changed = list(targets.values_list('pk', flat=True))
+        Investor.objects.filter(pk__in=changed).update(
+            labels=Case(
+                When(labels='', then=Value(value)),
+                default=Concat('labels', Value(f', {value}')),
+                output_field=CharField(),
+            ),
+            **stamp,
+        )
+
+    elif action == 'remove_label':
+        # Rewriting part of a comma-separated string is not portable SQL, so the new
+        # values are computed here and written back with one CASE update per batch
+        targets = list(investors.filter(labels__iregex=label_pattern(value)).only('pk', 'labels'))
+        for investor in targets:
+            investor.labels = _without_label(investor.labels, value)
+            investor.last_updated_on = stamp['last_updated_on']
+            investor.updated_by = stamp['updated_by']
+        Investor.objects.bulk_update(targets, ['labels', 'last_updated_on', 'updated_by'], batch_size=500)
+        changed = [investor.pk for investor in targets]
+
+    elif action == 'set_amount':
+        changed = list(investors.values_list('pk', flat=True))
+        investors.update(amount=value, **stamp)
+
+    elif action == 'delete':
+        communications = CommunicationLog.objects.filter(investor__in=ids)
+        responses = ResponseFunding.objects.filter(Q(investor__in=ids) | Q(communication__investor__in=ids))
+        rollups.adjust(communications, responses, -1)
+        changes.record_many(CommunicationLog, communications.values_list('pk', flat=True), 'delete')
+        changes.record_many(ResponseFunding, responses.values_list('pk', flat=True), 'delete')
+        changed = list(investors.values_list('pk', flat=True))
+        # Responses recorded against another investor's email leave that email without its first response
+        orphaned = list(
+            responses.filter(is_first_response=True).exclude(communication__investor__in=ids)
+            .values_list('communication_id', flat=True)
+        )
+        with rollups.suspended():
+            investors.delete()
+        latency.mark_first_responses(orphaned)
+        _finish(Investor, changed, 'delete')
+        return len(changed)
+
+    else:
+        raise ValueError(f'Unknown investor action: {action}')
+
+    _finish(Investor, changed, 'update')
+    return len(changed)
+
+
+@transaction.atomic
+def response_action(ids, action, value=None, user=None):
+    """
+    Apply a bulk action to the selected funding responses.
+
+    Args:
+        ids: response primary keys
+        action: one of RESPONSE_ACTIONS
+        value: status for set_status, Decimal for set_amount
+        user: User performing the action
+
+    Returns:
+        int: number of responses changed
+
+    Raises:
+        ValueError: if the action cannot be applied
+    """
+    responses = ResponseFunding.objects.filter(pk__in=ids)
+    changed = list(responses.values_list('pk', flat=True))
+    if action not in dict(RESPONSE_ACTIONS):
+        raise ValueError(f'Unknown response action: {action}')
+
+    # The rollups lose the selected rows now and regain their updated values below
+    rollups.adjust(responses=responses, sign=-1)
+    if action == 'set_status':
+        responses.update(response_status=value)
+        rollups.adjust(responses=responses)
+    elif action == 'set_amount':
+        responses.update(amount_offered=value)
+        rollups.adjust(responses=responses)
+    else:
+        answered = list(responses.filter(is_first_response=True).values_list('communication_id', flat=True))
+        with rollups.suspended():
+            responses.delete()
+        latency.mark_first_responses(answered)
+
+    _finish(ResponseFunding, changed, 'delete' if action == 'delete' else 'update')
+    return len(changed)
@@ -0,0 +1,213 @@
+"""
+Scheduled, rate-limited campaign sending.
+A campaign's recipients are materialized once when its window opens; each scheduler tick
+then refills a persisted token bucket and sends as many emails as it allows, so sends are
+spread over the window and a restarted scheduler continues at the same pace.
+
+Delivery is at most once per investor and campaign: a recipient row is unique per
+(campaign, investor) and is claimed ('sending') before the SMTP transaction starts.
+Only sends that certainly were not delivered return to 'pending' for a retry: a temporary
+(4xx) refusal from the server, or a message never attempted because the connection failed.
+Anything else, including a send interrupted by a crash, is marked 'failed' for review,
+because it may already have been delivered.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import segments
+from .bulk import label_pattern
+from .email_service import EmailService
+from .models import Campaign, CampaignRecipient, Investor
+from .personalization import DraftMessageBuilder
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 3
+
+# Claims older than this belong to a scheduler that died mid-send
+STALE_SENDING = timedelta(minutes=15)
+
+# When a window end is set, pace slightly ahead of the even rate so it is met
+PACE_HEADROOM = 1.2
+
+
+def matching_investors(campaign):
+    investors = Investor.objects.all()
+    if campaign.segment_id:
+        # Recipients are written from this, so bring the materialized members up to date first
+        investors = segments.members(segments.refresh(campaign.segment))
+    if campaign.label:
+        investors = investors.filter(labels__iregex=label_pattern(campaign.label))
+    return investors
+
+
+def materialize(campaign):
+    """Create the campaign's recipient rows; existing rows are left untouched. Returns the total."""
+    ids = matching_investors(campaign).order_by().values_list('pk', flat=True)
+    batch = []
+    for investor_id in ids.iterator(chunk_size=2000):
+        batch.append(CampaignRecipient(campaign=campaign, investor_id=investor_id))
+        if len(batch) >= 1000:
+            CampaignRecipient.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    CampaignRecipient.objects.bulk_create(batch, ignore_conflicts=True)
+    return campaign.recipients.count()
+
+
+def send_rate(campaign, remaining, now):
+    """Tokens per second: the configured maximum, or less when the window leaves room to spare."""
+    rate = campaign.max_per_hour / 3600
+    if campaign.send_before and remaining:
+        seconds_left = (campaign.send_before - now).total_seconds()
+        if seconds_left > 0:
+            rate = min(rate, remaining / seconds_left * PACE_HEADROOM)
+    return rate
+
+
+def refill(campaign, remaining, now):
+    if campaign.tokens_updated_at:
+        elapsed = max((now - campaign.tokens_updated_at).total_seconds(), 0)
+        campaign.tokens = min(campaign.burst, campaign.tokens + elapsed * send_rate(campaign, remaining, now))
+    campaign.tokens_updated_at = now
+
+
+def claim(campaign, limit, now):
+    """Mark up to `limit` pending recipients as 'sending'. Returns (recipient id, investor id) pairs."""
+    with transaction.atomic():
+        rows = list(
+            campaign.recipients.select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .order_by('pk')
+            .values_list('pk', 'investor_id')[:limit]
+        )
+        CampaignRecipient.objects.filter(pk__in=[pk for pk, _ in rows], status='pending').update(
+            status='sending', attempts=F('attempts') + 1, updated_at=now,
+        )
+    return rows
+
+
+def recover_interrupted(now=None):
+    """Fail claims left behind by a crashed scheduler; they may have been delivered already."""
+    now = now or timezone.now()
+    return CampaignRecipient.objects.filter(status='sending', updated_at__lt=now - STALE_SENDING).update(
+        status='failed',
+        error='Interrupted during sending; not retried to avoid a duplicate email.',
+        updated_at=now,
+    )
+
+
+def _finish(campaign, status):
+    campaign.status = status
+    campaign.save(update_fields=['status'])
+
+
+def run_campaign(campaign, now=None, builder=None):
+    """
+    Advance one campaign by a single scheduler tick.
+
+    Args:
+        campaign: Campaign with its draft loaded
+        now: current time (for tests)
+        builder: optional DraftMessageBuilder reused across ticks
+
+    Returns:
+        dict: counts of 'sent' and 'failed' emails in this tick
+    """
+    now = now or timezone.now()
+    counts = {'sent': 0, 'failed': 0}
+    if campaign.status not in ('scheduled', 'running') or now < campaign.send_after:
+        return counts
+
+    if campaign.status == 'scheduled':
+        materialize(campaign)
+        campaign.status = 'running'
+        campaign.tokens = campaign.burst
+        campaign.tokens_updated_at = now
+        campaign.save(update_fields=['status', 'tokens', 'tokens_updated_at'])
+
+    pending = campaign.recipients.filter(status='pending')
+    if campaign.send_before and now >= campaign.send_before:
+        pending.update(status='skipped', error='Send window closed.', updated_at=now)
+    remaining = pending.count()
+    if not remaining:
+        if not campaign.recipients.filter(status='sending').exists():
+            _finish(campaign, 'completed')
+        return counts
+
+    refill(campaign, remaining, now)
+    claimed = claim(campaign, min(int(campaign.tokens), BATCH_SIZE), now) if campaign.tokens >= 1 else []
+    campaign.tokens -= len(claimed)
+    campaign.save(update_fields=['tokens', 'tokens_updated_at'])
+    if not claimed:
+        return counts
+
+    investor_ids = [investor_id for _, investor_id in claimed]
+    results = EmailService().send_draft_batch(
+        investor_ids, campaign.draft, user=campaign.created_by, builder=builder,
+        notes=f'Campaign "{campaign.name}"',
+    )
+
+    recipients = CampaignRecipient.objects.in_bulk([pk for pk, _ in claimed])
+    for pk, investor_id in claimed:
+        recipient = recipients[pk]
+        success, message, communication_id, retry = results.get(
+            investor_id, (False, 'Investor no longer exists', None, False),
+        )
+        recipient.communication_id = communication_id
+        if success:
+            recipient.status, recipient.error = 'sent', ''
+            counts['sent'] += 1
+        else:
+            recipient.status = 'pending' if retry and recipient.attempts < MAX_ATTEMPTS else 'failed'
+            recipient.error = message
+            counts['failed'] += 1
+        recipient.updated_at = now
+    CampaignRecipient.objects.bulk_update(
+        recipients.values(), ['status', 'error', 'communication', 'updated_at'], batch_size=500
+    )
+
+    if counts['failed']:
+        # Most failures are provider throttling: empty the bucket and let it refill
+        campaign.tokens = 0
+        campaign.save(update_fields=['tokens'])
+        logger.warning('Campaign %s: %s of %s sends failed', campaign.pk, counts['failed'], len(claimed))
+    return counts
+
+
+def due_campaigns(now=None):
+    now = now or timezone.now()
+    return Campaign.objects.select_related('draft', 'created_by').filter(
+        status__in=['scheduled', 'running'], send_after__lte=now,
+    )
+
+
+class Scheduler:
+    """Runs due campaigns tick by tick, keeping one message builder per campaign draft version."""
+
+    def __init__(self):
+        self.builders = {}
+
+    def builder_for(self, campaign):
+        key = (campaign.pk, campaign.draft.pk, campaign.draft.last_updated_on)
+        if key not in self.builders:
+            self.builders = {k: v for k, v in self.builders.items() if k[0] != campaign.pk}
+            self.builders[key] = DraftMessageBuilder(campaign.draft)
+        return self.builders[key]
+
+    def tick(self, now=None):
+        """Advance every due campaign once. Returns {campaign id: counts}."""
+        now = now or timezone.now()
+        recover_interrupted(now)
+        campaigns = list(due_campaigns(now))
+        active = {campaign.pk for campaign in campaigns}
+        self.builders = {key: builder for key, builder in self.builders.items() if key[0] in active}
+        return {
+            campaign.pk: run_campaign(campaign, now=now, builder=self.builder_for(campaign))
+            for campaign in campaigns
+        }
@@ -0,0 +1,221 @@
+"""
+Change feed for delta sync.
+Records inserts, updates and deletes on the API resources into ChangeLog inside the
+transaction that makes them, so an entry exists exactly when its change committed.
+Segments and follow-ups are recorded too, so cached pages (core.conditional), segment
+refreshes and the follow-up scheduler notice them, but the feed only serves the API
+resources.
+
+Ids are handed out when an entry is inserted, so they do not follow commit order: a
+long transaction can commit an entry below ids a reader has already passed. Readers
+therefore page by `sequence`, which sequence_pending() assigns after the transaction
+commits, under a lock that makes numbers visible in the order they are given.
+Entries older than the retention period are pruned by `python manage.py prune_changes`;
+a reader whose cursor falls before the oldest kept entry must resync in full.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, Min
+from django.utils import timezone
+
+from .api import RESOURCES, serialize_rows
+from .models import ChangeLog, ChangeSequence, Segment, FollowUp
+
+
+RESOURCE_NAMES = {resource.model: name for name, resource in RESOURCES.items()}
+RESOURCE_NAMES[Segment] = 'segments'
+RESOURCE_NAMES[FollowUp] = 'followups'
+MODELS = {name: model for model, name in RESOURCE_NAMES.items()}
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+RETENTION_DAYS = 30
+
+BATCH_SIZE = 5000
+
+
+class CursorExpired(Exception):
+    """The entries after a cursor have been pruned."""
+
+
+def retention_days():
+    return getattr(settings, 'CHANGE_LOG_RETENTION_DAYS', RETENTION_DAYS)
+
+
+# ==================== Recording ====================
+
+def record(model, object_id, action):
+    """Append one change in the current transaction; it is sequenced once that commits."""
+    ChangeLog.objects.create(resource=RESOURCE_NAMES[model], object_id=object_id, action=action)
+    transaction.on_commit(sequence_pending)
+
+
+def record_many(model, object_ids, action):
+    """Append a change for each id with a single insert, for set-based operations."""
+    resource = RESOURCE_NAMES[model]
+    entries = [ChangeLog(resource=resource, object_id=pk, action=action) for pk in object_ids]
+    if entries:
+        ChangeLog.objects.bulk_create(entries, batch_size=1000)
+        transaction.on_commit(sequence_pending)
+
+
+def sequence_pending():
+    """
+    Number the committed entries that have no sequence yet, after every numbered one,
+    and stamp them with the time they became visible.
+
+    The counter row stays locked until the numbering commits, so a concurrent call waits
+    and continues from its value: no reader sees a number before a smaller one. Entries
+    left unnumbered by a process that died after committing are picked up by the next
+    call, from any writer or from prune_changes.
+
+    Returns:
+        int: number of entries sequenced
+    """
+    pending = ChangeLog.objects.filter(sequence__isnull=True)
+    if not pending.exists():
+        return 0
+    with transaction.atomic():
+        counter, _ = ChangeSequence.objects.select_for_update().get_or_create(pk=1)
+        # Read after taking the lock: a call that held it may have numbered them already
+        bounds = pending.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            return 0
+        # Numbers keep the id order within a call and always start past the counter
+        offset = counter.last + 1 - bounds['low']
+        numbered = pending.filter(pk__range=(bounds['low'], bounds['high'])).update(
+            sequence=F('pk') + offset, changed_at=timezone.now(),
+        )
+        counter.last = bounds['high'] + offset
+        counter.save(update_fields=['last'])
+    return numbered
+
+
+# ==================== Reading ====================
+
+def sequenced():
+    """Entries visible to readers, i.e. committed and numbered."""
+    return ChangeLog.objects.filter(sequence__isnull=False)
+
+
+def oldest_cursor():
+    """Smallest cursor that still sees every later change; 0 until entries are pruned."""
+    oldest = sequenced().order_by('sequence').values_list('sequence', flat=True).first()
+    return oldest - 1 if oldest else 0
+
+
+def head():
+    """Newest cursor: every change up to it has committed and is visible."""
+    return sequenced().order_by('-sequence').values_list('sequence', flat=True).first() or 0
+
+
+def head_entry():
+    """(cursor, changed_at) of the newest visible entry, or (0, None)."""
+    return sequenced().order_by('-sequence').values_list('sequence', 'changed_at').first() or (0, None)
+
+
+def prune(days=None, now=None):
+    """
+    Delete entries older than `days` (default CHANGE_LOG_RETENTION_DAYS) in batches.
+    The newest entry is always kept, so cursors stay comparable with oldest_cursor().
+
+    Returns:
+        int: number of entries deleted
+    """
+    days = retention_days() if days is None else days
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    newest = head()
+    deleted = 0
+    while True:
+        batch = list(
+            sequenced().filter(changed_at__lt=cutoff, sequence__lt=newest)
+            .order_by('sequence').values_list('sequence', flat=True)[:BATCH_SIZE]
+        )
+        if not batch:
+            return deleted
+        deleted += ChangeLog.objects.filter(sequence__gte=batch[0], sequence__lte=batch[-1]).delete()[0]
+
+
+def touched_investors(entries, sources):
+    """
+    Investor ids affected by (resource, object_id, action) change log entries from `sources`.
+
+    Returns:
+        set or None: None when an activity row was deleted, since its investor is unknown
+    """
+    touched = set()
+    activity = defaultdict(set)
+    for resource, object_id, action in entries:
+        if resource not in sources:
+            continue
+        if resource == 'investors':
+            # A deleted investor's dependent rows go with it
+            if action != 'delete':
+                touched.add(object_id)
+        elif action == 'delete':
+            return None
+        else:
+            activity[resource].add(object_id)
+    for resource, ids in activity.items():
+        model = MODELS[resource]
+        ids = sorted(ids)
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start:start + BATCH_SIZE]
+            touched.update(model.objects.filter(pk__in=batch).values_list('investor_id', flat=True))
+    return touched
+
+
+def feed(since=0, limit=DEFAULT_LIMIT, resources=None):
+    """
+    Changes after cursor `since`, oldest first.
+
+    Create/update entries carry the object's current row (as served by the REST API);
+    deletes are tombstones. An object may appear more than once per page.
+
+    Returns:
+        dict: {'changes': [...], 'next_cursor': int, 'has_more': bool}
+
+    Raises:
+        CursorExpired: if entries after `since` have been pruned
+    """
+    if since < oldest_cursor():
+        raise CursorExpired(since)
+    entries = sequenced().filter(sequence__gt=since, resource__in=resources or list(RESOURCES))
+    entries = list(
+        entries.order_by('sequence').values('sequence', 'resource', 'object_id', 'action', 'changed_at')[:limit + 1]
+    )
+
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # One values() query per resource for the current state of changed objects
+    wanted = {}
+    for entry in entries:
+        if entry['action'] != 'delete':
+            wanted.setdefault(entry['resource'], set()).add(entry['object_id'])
+    current = {}
+    for name, ids in wanted.items():
+        resource = RESOURCES[name]
+        for row in serialize_rows(resource, resource.model.objects.filter(pk__in=ids), resource.fields):
+            current[(name, row['id'])] = row
+
+    changes = [
+        {
+            'cursor': entry['sequence'],
+            'resource': entry['resource'],
+            'id': entry['object_id'],
+            'action': entry['action'],
+            'changed_at': entry['changed_at'],
+            'data': current.get((entry['resource'], entry['object_id'])) if entry['action'] != 'delete' else None,
+        }
+        for entry in entries
+    ]
+    return {
+        'changes': changes,
+        'next_cursor': entries[-1]['sequence'] if entries else since,
+        'has_more': has_more,
+    }
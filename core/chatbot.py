@@ -3,15 +3,29 @@ Chatbot service for processing user commands.
 Handles email sending commands, search queries, and generic AI responses using Gemini.
 """
 import re
+from functools import lru_cache
 from django.conf import settings
-from .models import Investor, Artifact, EmailDraft, CommunicationLog
+from . import segments
+from .dedupe import resolve_email
+from .models import Investor, Artifact, EmailDraft, CommunicationLog, Segment
 
-# Import Gemini
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
+
+@lru_cache(maxsize=None)
+def load_genai():
+    """
+    Import the Gemini SDK on first use.
+
+    The SDK is slow to import, so it is kept out of module import time for
+    web workers and management commands that never reach a generic query.
+
+    Returns:
+        module or None: google.generativeai, or None if it is not installed
+    """
+    try:
+        import google.generativeai as genai
+    except ImportError:
+        return None
+    return genai
 
 
 class ChatbotService:
@@ -28,19 +42,36 @@ class ChatbotService:
         re.IGNORECASE
     )
     
+    SEGMENT_PATTERN = re.compile(
+        r'show\s+(?:me\s+)?(?:the\s+)?segment\s*[-:]?\s*["\']?(.+?)["\']?\s*$',
+        re.IGNORECASE
+    )
+    
     def __init__(self, user=None):
         self.user = user
-        self.gemini_model = None
-        self._init_gemini()
+        self._gemini_model = None
+        self._gemini_initialized = False
+    
+    @property
+    def gemini_model(self):
+        """Gemini model, initialized on first access (only generic queries need it)."""
+        if not self._gemini_initialized:
+            self._gemini_initialized = True
+            self._init_gemini()
+        return self._gemini_model
     
     def _init_gemini(self):
         """Initialize Gemini AI model."""
-        if GEMINI_AVAILABLE and hasattr(settings, 'GEMINI_API_KEY') and settings.GEMINI_API_KEY != 'your-gemini-api-key-here':
-            try:
-                genai.configure(api_key=settings.GEMINI_API_KEY)
-                self.gemini_model = genai.GenerativeModel('gemini-pro')
-            except Exception as e:
-                print(f"Failed to initialize Gemini: {e}")
+        if not (hasattr(settings, 'GEMINI_API_KEY') and settings.GEMINI_API_KEY != 'your-gemini-api-key-here'):
+            return
+        genai = load_genai()
+        if genai is None:
+            return
+        try:
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            self._gemini_model = genai.GenerativeModel('gemini-pro')
+        except Exception as e:
+            print(f"Failed to initialize Gemini: {e}")
     
     def process_message(self, message):
         """
@@ -56,6 +87,11 @@ class ChatbotService:
         if email_match:
             return self._handle_send_email(email_match.group(1), email_match.group(2))
         
+        # Check for segment command
+        segment_match = self.SEGMENT_PATTERN.search(message)
+        if segment_match:
+            return self._handle_segment(segment_match.group(1))
+        
         # Check for search command
         search_match = self.SEARCH_PATTERN.search(message)
         if search_match:
@@ -80,14 +116,17 @@ class ChatbotService:
                 'message': f"❌ Draft '{draft_name}' not found. Available drafts: {drafts_list}"
             }
         
-        # Get or create investor
-        investor, created = Investor.objects.get_or_create(
-            email=email_address,
-            defaults={
-                'name': email_address.split('@')[0],
-                'updated_by': self.user.username if self.user else 'system'
-            }
-        )
+        # Get or create investor; addresses of merged duplicates resolve to the survivor
+        investor = resolve_email(email_address)
+        created = False
+        if investor is None:
+            investor, created = Investor.objects.get_or_create(
+                email=email_address,
+                defaults={
+                    'name': email_address.split('@')[0],
+                    'updated_by': self.user.username if self.user else 'system'
+                }
+            )
         
         investor_status = "Created new investor" if created else "Found existing investor"
         
@@ -102,7 +141,7 @@ class ChatbotService:
         if success:
             return {
                 'type': 'success',
-                'message': f"✅ Email sent successfully!\n\n📧 To: {email_address}\n📋 Draft: {draft_name}\n👤 {investor_status}: {investor.name}",
+                'message': f"✅ Email sent successfully!\n\n📧 To: {investor.email}\n📋 Draft: {draft_name}\n👤 {investor_status}: {investor.name}",
                 'data': {
                     'investor': investor,
                     'draft': draft
@@ -184,6 +223,37 @@ class ChatbotService:
             }
         }
     
+    def _handle_segment(self, segment_name):
+        """Handle segment command: list the members of a saved segment."""
+        segment = segments.find(segment_name)
+        if segment is None:
+            names = ', '.join(Segment.objects.values_list('name', flat=True)[:20]) or 'none yet'
+            return {
+                'type': 'error',
+                'message': f"❌ Segment '{segment_name}' not found. Available segments: {names}"
+            }
+        
+        # Materialized members caught up with pending changes, or the definition evaluated live
+        members = segments.members(segment)
+        investors = list(members.order_by('name')[:10])
+        
+        response_parts = [f"🎯 Segment {segment.name}: {segment.definition}\n"]
+        if investors:
+            response_parts.append(f"\n👥 **Investors ({members.count()}):**")
+            for inv in investors:
+                response_parts.append(f"  • {inv.name} ({inv.email}) - ₹{inv.amount:,.2f}")
+        else:
+            response_parts.append("\n👥 No investors in this segment.")
+        
+        return {
+            'type': 'search_results',
+            'message': "\n".join(response_parts),
+            'data': {
+                'segment': segment,
+                'investors': investors,
+            }
+        }
+    
     def _handle_generic_query(self, message):
         """Handle generic queries using Gemini AI."""
         if not self.gemini_model:
@@ -207,6 +277,7 @@ Here's the current data context:
 Available commands the user can use:
 1. "Send email to <email> the draft of <draft_name>" - Sends an email draft to an investor
 2. "Show me data for - '<keyword1>', '<keyword2>'" - Searches investors and artifacts
+3. "Show me segment <segment_name>" - Lists the investors in a saved segment
 
 User's question: {message}
 
@@ -232,6 +303,9 @@ Keep responses brief and friendly."""
 🔍 **Search Data:**
    `Show me data for - 'keyword1', 'keyword2'`
 
+🎯 **Segments:**
+   `Show me segment cold-seed-vcs`
+
 📊 **Quick Stats:**
    - Investors: {investor_count}
    - Artifacts: {artifact_count}
@@ -0,0 +1,24 @@
+"""
+System checks for deployment settings.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from .auth import cache_is_shared
+
+
+CACHED_SESSION_ENGINES = ('django.contrib.sessions.backends.cache', 'django.contrib.sessions.backends.cached_db')
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Sessions served from a per-process cache outlive logouts in other workers."""
+    if cache_is_shared() or settings.SESSION_ENGINE not in CACHED_SESSION_ENGINES:
+        return []
+    return [Error(
+        'The default cache is process-local, so a session ended in one worker (e.g. by logging '
+        'out) stays valid in the others until it expires from their caches.',
+        hint='Configure a shared cache (DJANGO_REDIS_URL in settings_production) or use a session '
+             'engine that does not cache, such as db or signed_cookies.',
+        id='core.E001',
+    )]
@@ -0,0 +1,327 @@
+"""
+Cohort analytics for board reporting.
+Investors are grouped by the week of their first successful email, and each cohort is
+followed week by week: the cumulative share of its investors who said yes and the amount
+they committed. Response latency and per-label conversion cover the same investors.
+
+Rows are read once with values_list into flat columns of integer codes, and every figure
+is an aggregate over those columns (bincount, cumulative sum, grouped minimum, percentile),
+computed with NumPy when it is installed and in plain Python otherwise. No model instances
+are built. Results are cached until the analytics cache version changes.
+"""
+import bisect
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min
+from django.utils import timezone
+
+from .analytics import CACHE_TIMEOUT, cache_version
+from .models import Investor, CommunicationLog, ResponseFunding
+from .rollups import day_start
+
+
+WEEKS = 12
+MAX_WEEKS = 104
+
+BATCH_SIZE = 1000
+
+# Response latency histogram bucket edges, in days
+LATENCY_EDGES = [1, 3, 7, 14, 30, 60]
+LATENCY_PERCENTILES = [50, 75, 90]
+
+
+def default_weeks():
+    return getattr(settings, 'COHORT_WEEKS', WEEKS)
+
+
+def parse_weeks(params):
+    """
+    Number of weekly cohorts from ?weeks=N.
+
+    Raises:
+        ValueError: on a malformed or out-of-range value, with a message for the client
+    """
+    message = f'weeks must be a whole number between 1 and {MAX_WEEKS}'
+    try:
+        weeks = int(params.get('weeks') or default_weeks())
+    except (TypeError, ValueError):
+        raise ValueError(message)
+    if not 1 <= weeks <= MAX_WEEKS:
+        raise ValueError(message)
+    return weeks
+
+
+# ==================== Column Operations ====================
+
+@lru_cache(maxsize=None)
+def load_numpy():
+    """
+    Import NumPy on first use.
+
+    Returns:
+        module or None: numpy, or None if it is not installed
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def bincount(codes, length, weights=None):
+    """Sum of `weights` (or count) per code in range(length), as a list."""
+    np = load_numpy()
+    if np is not None:
+        if not len(codes):
+            return [0] * length
+        counts = np.bincount(
+            np.asarray(codes, dtype=np.int64),
+            weights=None if weights is None else np.asarray(weights, dtype=np.float64),
+            minlength=length,
+        )
+        return counts[:length].tolist()
+    totals = [0] * length
+    for i, code in enumerate(codes):
+        totals[code] += 1 if weights is None else weights[i]
+    return totals
+
+
+def group_min(codes, values, length, fill):
+    """Smallest value per code in range(length); `fill` where a code has no values."""
+    np = load_numpy()
+    if np is not None:
+        result = np.full(length, fill, dtype=np.int64)
+        if len(codes):
+            np.minimum.at(result, np.asarray(codes, dtype=np.int64), np.asarray(values, dtype=np.int64))
+        return result.tolist()
+    result = [fill] * length
+    for code, value in zip(codes, values):
+        if value < result[code]:
+            result[code] = value
+    return result
+
+
+def take(values, indexes):
+    np = load_numpy()
+    if np is not None:
+        return np.asarray(values)[np.asarray(indexes, dtype=np.int64)].tolist() if len(indexes) else []
+    return [values[i] for i in indexes]
+
+
+def cumulative_rows(flat, width):
+    """Running totals along each row of a row-major `flat` matrix `width` columns wide."""
+    np = load_numpy()
+    if np is not None:
+        return np.asarray(flat, dtype=np.float64).reshape(-1, width).cumsum(axis=1).tolist()
+    rows = []
+    for start in range(0, len(flat), width):
+        total, row = 0, []
+        for value in flat[start:start + width]:
+            total += value
+            row.append(total)
+        rows.append(row)
+    return rows
+
+
+def percentiles(values, points):
+    """Percentiles with linear interpolation between closest ranks (NumPy's default)."""
+    if not values:
+        return [None] * len(points)
+    np = load_numpy()
+    if np is not None:
+        return np.percentile(np.asarray(values, dtype=np.float64), points).tolist()
+    ordered = sorted(values)
+    result = []
+    for point in points:
+        rank = (len(ordered) - 1) * point / 100
+        low = int(rank)
+        high = min(low + 1, len(ordered) - 1)
+        result.append(ordered[low] + (ordered[high] - ordered[low]) * (rank - low))
+    return result
+
+
+def histogram(values, edges):
+    """Count of values per bucket: below edges[0], between consecutive edges, and above the last."""
+    np = load_numpy()
+    if np is not None:
+        if not values:
+            return [0] * (len(edges) + 1)
+        buckets = np.searchsorted(np.asarray(edges, dtype=np.float64), np.asarray(values, dtype=np.float64), side='right')
+        return np.bincount(buckets, minlength=len(edges) + 1).tolist()
+    return bincount([bisect.bisect_right(edges, value) for value in values], len(edges) + 1)
+
+
+# ==================== Loading ====================
+
+def _day(value):
+    return timezone.localtime(value).date().toordinal()
+
+
+def load_columns(origin, weeks):
+    """
+    Columns for investors first contacted on or after `origin` (a Monday).
+
+    Returns:
+        dict: per investor: 'cohort' codes and 'labels'; per success response: investor
+        position 'success_pos', weeks after the cohort week 'success_week' and 'success_amount';
+        per response: investor position 'response_pos' and 'latency' in days
+    """
+    first_contact = (
+        CommunicationLog.objects.filter(status='success').order_by()
+        .values('investor_id').annotate(first=Min('sent_at'))
+        .filter(first__gte=day_start(origin))
+        .values_list('investor_id', 'first')
+    )
+    origin_day = origin.toordinal()
+    position, cohort = {}, []
+    for investor_id, first in first_contact.iterator(chunk_size=5000):
+        code = (_day(first) - origin_day) // 7
+        if code < weeks:
+            position[investor_id] = len(cohort)
+            cohort.append(code)
+
+    columns = {
+        'cohort': cohort, 'labels': [()] * len(cohort),
+        'success_pos': [], 'success_week': [], 'success_amount': [],
+        'response_pos': [], 'latency': [],
+    }
+    # Only the cohort's investors and their responses are read, in batches of ids
+    ids = sorted(position)
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = ids[start:start + BATCH_SIZE]
+        for investor_id, text in Investor.objects.filter(pk__in=batch).values_list('pk', 'labels'):
+            columns['labels'][position[investor_id]] = tuple(
+                {label.strip() for label in (text or '').split(',') if label.strip()}
+            )
+        responses = ResponseFunding.objects.filter(investor_id__in=batch).order_by().values_list(
+            'investor_id', 'response_status', 'amount_offered', 'response_date', 'communication__sent_at',
+        )
+        for investor_id, status, amount, responded_at, sent_at in responses:
+            pos = position[investor_id]
+            columns['response_pos'].append(pos)
+            columns['latency'].append(max((responded_at - sent_at).total_seconds() / 86400, 0))
+            if status == 'success':
+                columns['success_pos'].append(pos)
+                # Responses dated before first contact count in the cohort week
+                columns['success_week'].append(max((_day(responded_at) - origin_day) // 7 - cohort[pos], 0))
+                columns['success_amount'].append(float(amount))
+    return columns
+
+
+# ==================== Aggregates ====================
+
+def cohort_curves(columns, weeks):
+    """Cumulative success rate and amount per cohort and week after first contact."""
+    cohort = columns['cohort']
+    sizes = bincount(cohort, weeks)
+    width = weeks
+    in_horizon = [i for i, week in enumerate(columns['success_week']) if week < width]
+    success_pos = take(columns['success_pos'], in_horizon)
+    success_week = take(columns['success_week'], in_horizon)
+    cells = [code * width + week for code, week in zip(take(cohort, success_pos), success_week)]
+
+    # An investor converts in the week of their first success
+    never = width
+    first_success = group_min(success_pos, success_week, len(cohort), never)
+    converted = [pos for pos, week in enumerate(first_success) if week != never]
+    conversions = cumulative_rows(bincount(
+        [cohort[pos] * width + first_success[pos] for pos in converted], weeks * width,
+    ), width)
+    amounts = cumulative_rows(bincount(cells, weeks * width, take(columns['success_amount'], in_horizon)), width)
+
+    rows = []
+    for code in range(weeks):
+        # Week code + k has not happened yet for k past the current week
+        elapsed = weeks - code
+        rows.append({
+            'investors': int(sizes[code]),
+            'success_rate': [
+                round(conversions[code][k] / sizes[code], 4) if sizes[code] else 0 for k in range(elapsed)
+            ] + [None] * (width - elapsed),
+            'amount': [round(amounts[code][k], 2) for k in range(elapsed)] + [None] * (width - elapsed),
+        })
+    return rows
+
+
+def latency_distribution(columns):
+    """Days from email to response: count, mean, percentiles and a histogram."""
+    latency = columns['latency']
+    labels = [f'<{LATENCY_EDGES[0]}d'] + [
+        f'{low}-{high}d' for low, high in zip(LATENCY_EDGES, LATENCY_EDGES[1:])
+    ] + [f'{LATENCY_EDGES[-1]}d+']
+    return {
+        'responses': len(latency),
+        'mean_days': round(sum(latency) / len(latency), 2) if latency else None,
+        'percentiles': {
+            f'p{point}': None if value is None else round(value, 2)
+            for point, value in zip(LATENCY_PERCENTILES, percentiles(latency, LATENCY_PERCENTILES))
+        },
+        'histogram': {'labels': labels, 'counts': histogram(latency, LATENCY_EDGES)},
+    }
+
+
+def label_conversion(columns):
+    """Per label: investors, investors who responded, who said yes, and the amount committed."""
+    investors = len(columns['cohort'])
+    responded = [1 if count else 0 for count in bincount(columns['response_pos'], investors)]
+    succeeded = [1 if count else 0 for count in bincount(columns['success_pos'], investors)]
+    amount = bincount(columns['success_pos'], investors, columns['success_amount'])
+
+    # One row per (investor, label), credited with the investor's figures
+    names, index, label_codes, label_pos = [], {}, [], []
+    for pos, labels in enumerate(columns['labels']):
+        for label in labels or ('Unlabelled',):
+            if label not in index:
+                index[label] = len(names)
+                names.append(label)
+            label_codes.append(index[label])
+            label_pos.append(pos)
+
+    totals = {
+        'investors': bincount(label_codes, len(names)),
+        'responded': bincount(label_codes, len(names), take(responded, label_pos)),
+        'success': bincount(label_codes, len(names), take(succeeded, label_pos)),
+        'amount': bincount(label_codes, len(names), take(amount, label_pos)),
+    }
+    order = sorted(range(len(names)), key=lambda i: (-totals['investors'][i], names[i]))
+    series = {key: [int(values[i]) for i in order] for key, values in totals.items() if key != 'amount'}
+    series['amount'] = [round(totals['amount'][i], 2) for i in order]
+    series['conversion_rate'] = [
+        round(success / count, 4) if count else 0 for success, count in zip(series['success'], series['investors'])
+    ]
+    return {'labels': [names[i] for i in order], 'series': series}
+
+
+def cohorts(weeks=None, today=None):
+    """
+    Weekly cohort report ending with the current week.
+
+    Returns:
+        dict: 'offsets' (weeks after first contact), 'cohorts' (one row per cohort week,
+        oldest first, with None for weeks still in the future), 'latency' and 'labels'
+        (per-label conversion shaped for charting)
+    """
+    weeks = weeks or default_weeks()
+    today = today or timezone.localdate()
+    origin = today - timedelta(days=today.weekday() + 7 * (weeks - 1))
+    key = f'analytics:cohorts:{cache_version()}:{weeks}:{today.isoformat()}'
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    columns = load_columns(origin, weeks)
+    rows = cohort_curves(columns, weeks)
+    for code, row in enumerate(rows):
+        row['week'] = (origin + timedelta(weeks=code)).isoformat()
+    result = {
+        'offsets': list(range(weeks)),
+        'cohorts': rows,
+        'latency': latency_distribution(columns),
+        'labels': label_conversion(columns),
+        'engine': 'numpy' if load_numpy() else 'python',
+    }
+    cache.set(key, result, CACHE_TIMEOUT)
+    return result
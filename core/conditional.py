@@ -0,0 +1,89 @@
+"""
+Conditional GET for HTML pages.
+A page's ETag and Last-Modified come from the head of the change log, which every
+write to the models a page shows appends to in its own transaction, never from the
+rendered body or from aggregates over those models. A matching If-None-Match /
+If-Modified-Since is answered with 304 after one indexed lookup, before the view
+queries or renders anything.
+"""
+import hashlib
+from functools import lru_cache, wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .changes import RESOURCE_NAMES, head_entry
+
+
+@lru_cache(maxsize=None)
+def release():
+    """Changes when templates are deployed, so cached pages never outlive their markup."""
+    newest = 0
+    for directory in (path for options in settings.TEMPLATES for path in options.get('DIRS', [])):
+        for path in Path(directory).rglob('*.html'):
+            newest = max(newest, path.stat().st_mtime_ns)
+    return str(newest)
+
+
+def page_state(request, freshness=None):
+    """
+    Validators for a page, computed once per request.
+
+    Returns:
+        tuple or None: (etag, last_modified); None when the page must be rendered anyway
+    """
+    if not hasattr(request, '_page_state'):
+        request._page_state = None
+        # Flash messages are shown once, so a page carrying them is never served from cache
+        if request.method in ('GET', 'HEAD') and not len(messages.get_messages(request)):
+            head, changed_at = head_entry()
+            # Content that changes with time alone, e.g. a time-relative segment filter
+            changed_since = freshness and freshness(request)
+            key = repr((
+                release(),
+                request.user.pk,
+                request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+                request.get_full_path(),
+                head,
+                changed_since,
+            ))
+            last_modified = max([stamp for stamp in (changed_at, changed_since) if stamp], default=None)
+            request._page_state = (hashlib.sha1(key.encode()).hexdigest(), last_modified)
+    return request._page_state
+
+
+def conditional_page(*models, freshness=None):
+    """
+    Decorator adding ETag/Last-Modified handling to a view that displays `models`.
+    Pages are marked private and must be revalidated, so browsers keep them but ask first.
+    `freshness(request)` may return the latest time the page changed without a write.
+
+    Raises:
+        ImproperlyConfigured: if a model's writes are not recorded in the change log
+    """
+    untracked = [model.__name__ for model in models if model not in RESOURCE_NAMES]
+    if untracked:
+        raise ImproperlyConfigured(f"Changes to {', '.join(untracked)} are not recorded in the change log.")
+
+    def etag(request, *args, **kwargs):
+        state = page_state(request, freshness)
+        return state and state[0]
+
+    def last_modified(request, *args, **kwargs):
+        state = page_state(request, freshness)
+        return state and state[1]
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
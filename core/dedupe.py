@@ -0,0 +1,306 @@
+"""
+Duplicate investor detection and merging.
+Investors are grouped by blocking keys (normalized name, phonetic name, email username,
+email domain + surname sound) and only pairs sharing a block are scored; within a block
+each investor is compared with its nearest neighbours by email, so detection stays close
+to linear in the number of investors even when a common name fills a large block.
+A full scan takes seconds on a large book, so `python manage.py find_duplicates` runs it
+from cron and stores the pairs in DuplicateSuggestion for the duplicates page to read.
+Merging re-points a duplicate's communications, responses and campaign recipients to
+the surviving investor in bulk and keeps the duplicate's address as an alias.
+"""
+import re
+import unicodedata
+from collections import defaultdict, namedtuple
+from difflib import SequenceMatcher
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import analytics, changes, followups
+from .models import (
+    Investor, InvestorAlias, DuplicateSuggestion, CommunicationLog, ResponseFunding, CampaignRecipient, FollowUp,
+)
+
+
+THRESHOLD = 0.7
+
+# Within a block, each investor is compared with this many following ones (sorted by email)
+WINDOW = 4
+
+BATCH_SIZE = 1000
+
+# Campaign recipient states that mean the campaign email went (or is going) out
+DELIVERED = ('sending', 'sent')
+
+HONORIFICS = {'mr', 'mrs', 'ms', 'miss', 'dr', 'prof', 'shri', 'smt', 'sir'}
+
+Record = namedtuple('Record', 'id name email norm_name compact_name local letters domain tokens')
+Suggestion = namedtuple('Suggestion', 'score first second reasons')
+
+
+# ==================== Normalization ====================
+
+def normalize_name(name):
+    """Lowercase ASCII words without honorifics; 'Dr. Rahul.Gupta_99' -> 'rahul gupta'."""
+    text = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode().lower()
+    return ' '.join(token for token in re.findall(r'[a-z]+', text) if token not in HONORIFICS)
+
+
+def split_email(email):
+    """(username without +tag and punctuation, domain)."""
+    local, _, domain = (email or '').lower().rpartition('@')
+    local = local.split('+', 1)[0]
+    return re.sub(r'[^a-z0-9]', '', local), domain
+
+
+SOUNDEX_CODES = {
+    letter: digit
+    for digit, letters in {'1': 'bfpv', '2': 'cgjkqsxz', '3': 'dt', '4': 'l', '5': 'mn', '6': 'r'}.items()
+    for letter in letters
+}
+
+
+def soundex(word):
+    """American Soundex code of a word ('' for no letters)."""
+    word = re.sub(r'[^a-z]', '', word.lower())
+    if not word:
+        return ''
+    code = word[0].upper()
+    last = SOUNDEX_CODES.get(word[0], '')
+    for letter in word[1:]:
+        digit = SOUNDEX_CODES.get(letter, '')
+        if digit and digit != last:
+            code += digit
+        if letter not in 'hw':
+            last = digit
+    return (code + '000')[:4]
+
+
+def to_record(pk, name, email):
+    norm_name = normalize_name(name)
+    local, domain = split_email(email)
+    letters = re.sub(r'[^a-z]', '', local)
+    return Record(pk, name, email, norm_name, norm_name.replace(' ', ''), local, letters, domain, norm_name.split())
+
+
+def blocking_keys(record):
+    keys = []
+    if record.norm_name:
+        keys.append(('name', record.norm_name))
+        first, last = record.tokens[0], record.tokens[-1]
+        keys.append(('sound', soundex(first) + soundex(last)))
+        if record.domain:
+            keys.append(('domain', record.domain, soundex(last)))
+    if len(record.local) >= 4:
+        keys.append(('local', record.local))
+    return keys
+
+
+# ==================== Scoring ====================
+
+def ratio(a, b):
+    if a == b:
+        return 1.0 if a else 0.0
+    return SequenceMatcher(None, a, b).ratio() if a and b else 0.0
+
+
+def score_pair(a, b):
+    """
+    Similarity of two investors in [0, 1] with the reasons behind it.
+
+    Names are compared with each other and with the letters of the other's email
+    username, since investors created from the chatbot are named after their address.
+    """
+    reasons = []
+    name = ratio(a.norm_name, b.norm_name)
+    cross = 0.0
+    if name == 1.0:
+        reasons.append('same name')
+    else:
+        if name >= 0.8:
+            reasons.append('similar name')
+        cross = max(ratio(a.letters, b.compact_name), ratio(b.letters, a.compact_name))
+        if cross >= 0.9:
+            reasons.append('name matches email username')
+    local = ratio(a.local, b.local)
+    if a.local and a.local == b.local:
+        reasons.append('same email username')
+    elif local >= 0.8:
+        reasons.append('similar email username')
+
+    domain = 0.0
+    if a.domain == b.domain:
+        domain = 1.0
+        reasons.append('same email domain')
+    elif ratio(a.domain, b.domain) >= 0.8:
+        domain = 0.8
+        reasons.append(f'likely typo: {a.domain} / {b.domain}')
+
+    score = 0.5 * max(name, cross) + 0.3 * local + 0.2 * domain
+    return round(score, 3), reasons
+
+
+def candidate_pairs(records):
+    """
+    Pairs of record indexes that share a block and sit within WINDOW of each other
+    when the block is sorted by email (sorted neighbourhood), so a block of k members
+    yields at most k * WINDOW pairs.
+    """
+    blocks = defaultdict(list)
+    for index, record in enumerate(records):
+        for key in blocking_keys(record):
+            blocks[key].append(index)
+
+    pairs = set()
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda index: (records[index].local, records[index].domain))
+        for i, first in enumerate(members):
+            for second in members[i + 1:i + 1 + WINDOW]:
+                pairs.add((min(first, second), max(first, second)))
+    return pairs
+
+
+def find_duplicates(threshold=THRESHOLD):
+    """
+    Likely duplicate pairs, best first, scored over every investor.
+
+    Returns:
+        list: Suggestion(score, first, second, reasons); first/second are Records
+    """
+    records = [to_record(*row) for row in Investor.objects.order_by('pk').values_list('pk', 'name', 'email')]
+    suggestions = []
+    for i, j in candidate_pairs(records):
+        score, reasons = score_pair(records[i], records[j])
+        if score >= threshold:
+            suggestions.append(Suggestion(score, records[i], records[j], reasons))
+    suggestions.sort(key=lambda s: (-s.score, s.first.id, s.second.id))
+    return suggestions
+
+
+@transaction.atomic
+def store_duplicates(threshold=THRESHOLD, now=None):
+    """
+    Replace the stored suggestions with a fresh scan.
+    Pairs that lose an investor to a delete or merge disappear with it until the next scan.
+
+    Returns:
+        int: number of pairs stored
+    """
+    now = now or timezone.now()
+    suggestions = find_duplicates(threshold)
+    reasons_length = DuplicateSuggestion._meta.get_field('reasons').max_length
+    DuplicateSuggestion.objects.all().delete()
+    DuplicateSuggestion.objects.bulk_create([
+        DuplicateSuggestion(
+            first_id=s.first.id, second_id=s.second.id, score=s.score,
+            reasons='; '.join(s.reasons)[:reasons_length], found_at=now,
+        )
+        for s in suggestions
+    ], batch_size=BATCH_SIZE)
+    return len(suggestions)
+
+
+# ==================== Merging ====================
+
+def _merge_fields(survivor, duplicate):
+    labels = survivor.get_labels_list()
+    seen = {label.lower() for label in labels}
+    labels += [label for label in duplicate.get_labels_list() if label.lower() not in seen]
+    survivor.labels = ', '.join(labels)[:Investor._meta.get_field('labels').max_length]
+    survivor.amount = max(survivor.amount, duplicate.amount)
+    if not survivor.address:
+        survivor.address = duplicate.address
+    if duplicate.details and duplicate.details not in survivor.details:
+        survivor.details = '\n\n'.join(part for part in [survivor.details, duplicate.details] if part)
+
+
+def _merge_campaign_recipients(survivor, duplicate):
+    """
+    Move campaign rows. Where both investors were recipients of a campaign only one row
+    can stay: the one that was sent, so the campaign keeps its send history and never
+    emails the survivor again; the survivor's row on a tie.
+    """
+    survivor_rows = {
+        row.campaign_id: row for row in CampaignRecipient.objects.filter(investor=survivor)
+    }
+    for row in CampaignRecipient.objects.filter(investor=duplicate):
+        existing = survivor_rows.get(row.campaign_id)
+        if existing is None:
+            continue
+        if row.status in DELIVERED and existing.status not in DELIVERED:
+            existing.delete()
+        else:
+            row.delete()
+    CampaignRecipient.objects.filter(investor=duplicate).update(investor=survivor)
+
+
+@transaction.atomic
+def merge_investors(survivor_id, duplicate_ids, user=None):
+    """
+    Merge duplicates into one investor.
+
+    Communications, responses, follow-ups and campaign recipients are re-pointed with
+    set-based updates; labels are combined, the larger amount and any missing address are kept,
+    and each duplicate's email is kept as an alias so it resolves to the survivor. Of the
+    pending follow-ups, only one for the survivor's latest email can still apply.
+
+    Returns:
+        int: number of investors merged away
+
+    Raises:
+        ValueError: if the survivor is among the duplicates or an investor does not exist
+    """
+    duplicate_ids = sorted(set(duplicate_ids))
+    if not duplicate_ids or survivor_id in duplicate_ids:
+        raise ValueError('Choose one investor to keep and at least one other to merge into it.')
+    investors = Investor.objects.select_for_update().in_bulk([survivor_id, *duplicate_ids])
+    if len(investors) != len(duplicate_ids) + 1:
+        raise ValueError('Investor not found.')
+
+    survivor = investors[survivor_id]
+    duplicates = [investors[pk] for pk in duplicate_ids]
+    for duplicate in duplicates:
+        _merge_fields(survivor, duplicate)
+        _merge_campaign_recipients(survivor, duplicate)
+
+    moved = {}
+    for model in (CommunicationLog, ResponseFunding):
+        rows = model.objects.filter(investor_id__in=duplicate_ids)
+        moved[model] = list(rows.values_list('pk', flat=True))
+        rows.update(investor=survivor)
+
+    # Follow-ups point at the communications moved above
+    follow_ups = FollowUp.objects.filter(investor_id__in=duplicate_ids)
+    moved[FollowUp] = list(follow_ups.values_list('pk', flat=True))
+    follow_ups.update(investor=survivor)
+    followups.dismiss_superseded([survivor_id])
+    InvestorAlias.objects.filter(investor_id__in=duplicate_ids).update(investor=survivor)
+    InvestorAlias.objects.bulk_create(
+        [InvestorAlias(email=duplicate.email, investor=survivor) for duplicate in duplicates],
+        ignore_conflicts=True,
+    )
+    InvestorAlias.objects.filter(email=survivor.email).delete()
+
+    if user is not None:
+        survivor.updated_by = user.username
+    survivor.save()
+    # Nothing cascades any more; the delete signals record the removals
+    Investor.objects.filter(pk__in=duplicate_ids).delete()
+
+    for model, ids in moved.items():
+        changes.record_many(model, ids, 'update')
+    # Label breakdowns attribute activity to the surviving investor's labels now
+    transaction.on_commit(analytics.invalidate_cache)
+    return len(duplicates)
+
+
+def resolve_email(email):
+    """The investor an address belongs to, following merge aliases; None if unknown."""
+    investor = Investor.objects.filter(email=email).first()
+    if investor is None:
+        alias = InvestorAlias.objects.select_related('investor').filter(email=email).first()
+        investor = alias and alias.investor
+    return investor
@@ -1,9 +1,70 @@
 """
 Email service for sending emails with attachments.
 """
-from django.core.mail import EmailMessage
+import smtplib
+
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import analytics, changes, rollups
 from .models import CommunicationLog
+from .personalization import DraftMessageBuilder, investor_row, investor_rows
+
+
+def log_communications(draft, results, user=None, notes=""):
+    """
+    Record a batch of sends with a single insert.
+    
+    bulk_create skips model signals, so the daily rollups, change feed and analytics
+    cache are updated here once per batch instead.
+    """
+    now = timezone.now()
+    logs = [
+        CommunicationLog(
+            investor_id=investor_id,
+            draft=draft,
+            status='success' if success else 'failed',
+            sent_by=user,
+            notes=notes if success else f"Failed to send: {message}",
+            sent_at=now,
+        )
+        for investor_id, (success, message, _) in results.items()
+    ]
+    if not logs:
+        return []
+    
+    with transaction.atomic():
+        CommunicationLog.objects.bulk_create(logs, batch_size=500)
+        day = rollups.to_day(now)
+        for status in ('success', 'failed'):
+            count = sum(1 for log in logs if log.status == status)
+            if count:
+                rollups.bump_communication(day, draft.pk, status, count)
+        changes.record_many(CommunicationLog, [log.pk for log in logs], 'create')
+        transaction.on_commit(analytics.invalidate_cache)
+    return logs
+
+
+def is_transient(error):
+    """
+    Whether a send failed with a temporary (4xx) SMTP refusal.
+    
+    The server answered and declined the message, so nothing was delivered and a later
+    attempt may succeed. Any other failure (5xx, timeouts, dropped connections, errors
+    building the message) is not known to be safe to repeat.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return bool(codes) and all(400 <= code < 500 for code in codes)
+    return isinstance(error, smtplib.SMTPResponseException) and 400 <= error.smtp_code < 500
+
+
+def connection_lost(error):
+    """A socket-level failure: the connection cannot be used for the rest of the batch."""
+    answered = (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)
+    return isinstance(error, OSError) and not isinstance(error, answered)
 
 
 class EmailService:
@@ -22,28 +83,12 @@ class EmailService:
             tuple: (success: bool, message: str)
         """
         try:
-            # Create email
-            email = EmailMessage(
-                subject=draft.subject,
-                body=draft.body,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[investor.email],
-            )
-            
-            # Set HTML content if body contains HTML tags
-            if '<' in draft.body and '>' in draft.body:
-                email.content_subtype = 'html'
-            
-            # Attach artifacts
-            for artifact in draft.artifacts.all():
-                if artifact.file:
-                    try:
-                        email.attach_file(artifact.file.path)
-                    except Exception as e:
-                        print(f"Warning: Could not attach file {artifact.file.path}: {e}")
+            builder = DraftMessageBuilder(draft)
+            for warning in builder.warnings:
+                print(f"Warning: {warning}")
             
             # Send email
-            email.send(fail_silently=False)
+            builder.message(investor_row(investor)).send(fail_silently=False)
             
             # Log communication
             CommunicationLog.objects.create(
@@ -68,6 +113,68 @@ class EmailService:
             
             return False, str(e)
     
+    def send_draft_batch(self, investor_ids, draft, user=None, builder=None, connection=None,
+                         notes="Email sent in batch"):
+        """
+        Send a personalized draft to many investors over one SMTP connection.
+        
+        Investor fields are fetched in one query, attachments are encoded once (pass the
+        same builder to later batches of a campaign to reuse them), and the communication
+        log is written with one insert.
+        
+        Args:
+            investor_ids: Investor primary keys
+            draft: EmailDraft model instance
+            user: User who initiated the send
+            builder: optional DraftMessageBuilder to reuse across batches
+            connection: optional open mail connection to reuse across batches
+            notes: notes stored on each successful CommunicationLog
+            
+        Returns:
+            dict: investor id -> (success: bool, message: str, communication log id, retry: bool)
+            where retry is True only if the message certainly was not delivered: the server
+            refused it with a temporary error, or it was never attempted because the
+            connection could not be opened or was lost earlier in the batch.
+        """
+        builder = builder or DraftMessageBuilder(draft)
+        rows = investor_rows(investor_ids)
+        pending = [investor_id for investor_id in investor_ids if investor_id in rows]
+        results = {}
+        unsent = None
+        
+        owns_connection = connection is None
+        connection = connection or get_connection()
+        try:
+            connection.open()
+            for investor_id in pending:
+                try:
+                    builder.message(rows[investor_id], connection=connection).send(fail_silently=False)
+                    results[investor_id] = (True, "Email sent successfully", False)
+                except Exception as e:
+                    results[investor_id] = (False, str(e), is_transient(e))
+                    if connection_lost(e):
+                        # This message may or may not have gone out; the rest were not tried
+                        unsent = f"Not sent, connection lost: {e}"
+                        break
+        except Exception as e:
+            unsent = f"Not sent, could not connect: {e}"
+        finally:
+            if owns_connection:
+                try:
+                    connection.close()
+                except Exception:
+                    # The sends are over; a broken QUIT must not lose their results
+                    pass
+        
+        for investor_id in pending:
+            if investor_id not in results:
+                results[investor_id] = (False, unsent, True)
+        
+        for log in log_communications(draft, results, user, notes):
+            success, message, retry = results[log.investor_id]
+            results[log.investor_id] = (success, message, log.pk, retry)
+        return results
+    
     def send_custom_email(self, to_email, subject, body, attachments=None, user=None):
         """
         Send a custom email (not from a draft).
@@ -0,0 +1,272 @@
+"""
+Follow-up reminders for unanswered outreach.
+An investor is due a follow-up when their latest successful email is older than the
+threshold (the dashboard aging buckets: 7, 15 or 30 days) and they have never responded.
+Candidates come from one anti-join query over CommunicationLog, and each run checkpoints
+its cutoff in FollowUpRun so the next run only scans emails that went stale in between.
+Investors whose emails, responses or follow-ups changed since the checkpoint (from the
+change log) are re-checked in full; deleted activity leaves the affected investor
+unknown, so the run falls back to a full scan.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .changes import head, oldest_cursor, record_many, sequenced, touched_investors
+from .email_service import EmailService
+from .models import CommunicationLog, ResponseFunding, FollowUp, FollowUpRun
+
+
+AFTER_DAYS = 15
+
+# Investors who ignored this many follow-ups are not chased again
+MAX_FOLLOW_UPS = 2
+
+BATCH_SIZE = 1000
+
+# Change feed resources that can make an investor due, or no longer due, a follow-up.
+# A follow-up matters once sent or dismissed: while pending it blocks newer emails.
+SOURCES = {'communications', 'responses', 'followups'}
+
+# More changes than this since the checkpoint are cheaper to handle with a full scan
+RECHECK_THRESHOLD = 5000
+
+FOLLOW_UP_ACTIONS = [
+    ('send', 'Send'),
+    ('dismiss', 'Dismiss'),
+]
+
+
+def after_days():
+    return getattr(settings, 'FOLLOW_UP_AFTER_DAYS', AFTER_DAYS)
+
+
+def max_follow_ups():
+    return getattr(settings, 'FOLLOW_UP_MAX', MAX_FOLLOW_UPS)
+
+
+def stale_communications(cutoff, since=None):
+    """
+    Successful emails sent before `cutoff` (and from `since`, when given) that are the
+    investor's latest, with no response from the investor and no follow-up pending.
+    Every condition is a NOT EXISTS on the same statement, so this is a single query.
+    """
+    later = CommunicationLog.objects.filter(
+        investor=OuterRef('investor'), status='success', sent_at__gt=OuterRef('sent_at'),
+    )
+    responses = ResponseFunding.objects.filter(investor=OuterRef('investor'))
+    pending = FollowUp.objects.filter(investor=OuterRef('investor'), status='pending')
+    sent = Subquery(
+        FollowUp.objects.filter(investor=OuterRef('investor'), status='sent')
+        .order_by().values('investor').annotate(n=Count('pk')).values('n'),
+        output_field=IntegerField(),
+    )
+
+    stale = CommunicationLog.objects.filter(status='success', sent_at__lt=cutoff)
+    if since is not None:
+        stale = stale.filter(sent_at__gte=since)
+    return (
+        stale.filter(~Exists(later), ~Exists(responses), ~Exists(pending))
+        .alias(follow_ups_sent=Coalesce(sent, Value(0)))
+        .filter(follow_ups_sent__lt=max_follow_ups())
+    )
+
+
+def dismiss_superseded(investor_ids=None, now=None):
+    """
+    Dismiss pending follow-ups that no longer apply because the investor was emailed
+    again after the followed-up email or has responded, for the given investors or all.
+
+    Returns:
+        int: number of follow-ups dismissed
+    """
+    later = CommunicationLog.objects.filter(investor=OuterRef('investor'), status='success').filter(
+        Q(sent_at__gt=OuterRef('communication__sent_at'))
+        | Q(sent_at=OuterRef('communication__sent_at'), pk__gt=OuterRef('communication_id'))
+    )
+    responses = ResponseFunding.objects.filter(investor=OuterRef('investor'))
+    pending = FollowUp.objects.filter(status='pending').filter(Exists(later) | Exists(responses))
+    if investor_ids is None:
+        ids = list(pending.values_list('pk', flat=True))
+    else:
+        investor_ids = sorted(set(investor_ids))
+        ids = []
+        for start in range(0, len(investor_ids), BATCH_SIZE):
+            batch = investor_ids[start:start + BATCH_SIZE]
+            ids += pending.filter(investor_id__in=batch).values_list('pk', flat=True)
+
+    dismissed = 0
+    for start in range(0, len(ids), BATCH_SIZE):
+        dismissed += FollowUp.objects.filter(pk__in=ids[start:start + BATCH_SIZE], status='pending').update(
+            status='dismissed', error='The investor was emailed again or responded.',
+            updated_at=now or timezone.now(),
+        )
+    record_many(FollowUp, ids, 'update')
+    return dismissed
+
+
+def changed_investors(run, cursor):
+    """
+    Investors whose emails, responses or follow-ups changed between `run` and change
+    log cursor `cursor`.
+
+    Returns:
+        set or None: None when only a full scan can tell (activity was deleted, entries
+        were pruned, or there are more than RECHECK_THRESHOLD)
+    """
+    if run.change_cursor < oldest_cursor():
+        return None
+    entries = list(
+        sequenced().filter(sequence__gt=run.change_cursor, sequence__lte=cursor, resource__in=SOURCES)
+        # Follow-ups are queued pending, and only go with their investor or email
+        .exclude(resource='followups', action__in=('create', 'delete'))
+        .order_by('sequence').values_list('resource', 'object_id', 'action')[:RECHECK_THRESHOLD + 1]
+    )
+    if len(entries) > RECHECK_THRESHOLD:
+        return None
+    return touched_investors(entries, SOURCES)
+
+
+def _insert(batch):
+    """Insert follow-ups, skipping emails that already have one; returns how many were inserted."""
+    if not batch:
+        return 0
+    existing = FollowUp.objects.filter(communication_id__in=[f.communication_id for f in batch])
+    before = set(existing.values_list('pk', flat=True))
+    FollowUp.objects.bulk_create(batch, ignore_conflicts=True)
+    inserted = set(existing.values_list('pk', flat=True)) - before
+    record_many(FollowUp, sorted(inserted), 'create')
+    return len(inserted)
+
+
+def _queue(candidates, draft, days):
+    if draft is None:
+        # Custom emails have no draft to repeat
+        candidates = candidates.filter(draft__isnull=False)
+    rows = candidates.order_by().values_list('pk', 'investor_id', 'draft_id', 'sent_at')
+
+    queued = 0
+    batch = []
+    for pk, investor_id, draft_id, sent_at in rows.iterator(chunk_size=2000):
+        batch.append(FollowUp(
+            investor_id=investor_id,
+            communication_id=pk,
+            draft_id=draft.pk if draft else draft_id,
+            due_date=sent_at + timedelta(days=days),
+        ))
+        if len(batch) >= BATCH_SIZE:
+            queued += _insert(batch)
+            batch = []
+    return queued + _insert(batch)
+
+
+@transaction.atomic
+def schedule(days=None, draft=None, now=None, full=False):
+    """
+    Queue follow-ups for emails that went stale since the last run with the same threshold,
+    and for investors whose activity changed since then; dismiss follow-ups overtaken by a
+    later email or a response first.
+
+    Args:
+        days: days without a response (default FOLLOW_UP_AFTER_DAYS)
+        draft: EmailDraft to send as the follow-up; by default the stale email's own draft
+        now: current time (for tests)
+        full: ignore the checkpoint and scan every stale email
+
+    Returns:
+        FollowUpRun: the recorded run; `since` is None when every email was scanned
+    """
+    now = now or timezone.now()
+    days = days or after_days()
+    cutoff = now - timedelta(days=days)
+    cursor = head()
+
+    last = None if full else FollowUpRun.objects.filter(after_days=days).order_by('-cutoff').first()
+    changed = changed_investors(last, cursor) if last else None
+    since = min(last.cutoff, cutoff) if changed is not None else None
+
+    dismiss_superseded(changed, now)
+    queued = _queue(stale_communications(cutoff, since), draft, days)
+    if since is not None:
+        changed = sorted(changed)
+        for start in range(0, len(changed), BATCH_SIZE):
+            batch = changed[start:start + BATCH_SIZE]
+            queued += _queue(stale_communications(cutoff).filter(investor_id__in=batch), draft, days)
+
+    return FollowUpRun.objects.create(
+        after_days=days, since=since, cutoff=cutoff, queued=queued, change_cursor=cursor,
+    )
+
+
+def send(ids, user=None):
+    """
+    Send the selected pending follow-ups, one SMTP batch per draft.
+
+    Returns:
+        int: number of follow-ups sent; failures stay pending with the error recorded
+    """
+    follow_ups = list(
+        FollowUp.objects.filter(pk__in=ids, status='pending').select_related('draft')
+        .order_by('-communication__sent_at', '-communication_id')
+    )
+    # One email per investor: the follow-up to their latest email goes, the rest are dismissed
+    investors = set()
+    by_draft = defaultdict(list)
+    for follow_up in follow_ups:
+        if follow_up.investor_id in investors:
+            follow_up.status, follow_up.error = 'dismissed', 'Another follow-up to this investor was sent instead.'
+        elif follow_up.draft is None:
+            follow_up.error = 'The follow-up draft was deleted.'
+        else:
+            investors.add(follow_up.investor_id)
+            by_draft[follow_up.draft].append(follow_up)
+
+    sent = 0
+    service = EmailService()
+    for draft, items in by_draft.items():
+        results = service.send_draft_batch(
+            [follow_up.investor_id for follow_up in items], draft, user=user, notes='Follow-up',
+        )
+        for follow_up in items:
+            success, message, communication_id, _ = results.get(
+                follow_up.investor_id, (False, 'Investor no longer exists', None, False),
+            )
+            follow_up.sent_communication_id = communication_id
+            if success:
+                follow_up.status, follow_up.error = 'sent', ''
+                sent += 1
+            else:
+                follow_up.error = message
+
+    now = timezone.now()
+    for follow_up in follow_ups:
+        follow_up.updated_at = now
+    FollowUp.objects.bulk_update(
+        follow_ups, ['status', 'error', 'sent_communication', 'updated_at'], batch_size=500,
+    )
+    record_many(FollowUp, [follow_up.pk for follow_up in follow_ups], 'update')
+    return sent
+
+
+def follow_up_action(ids, action, value=None, user=None):
+    """
+    Apply a bulk action to the selected follow-ups.
+
+    Returns:
+        int: number of follow-ups sent or dismissed
+
+    Raises:
+        ValueError: if the action is unknown
+    """
+    if action == 'send':
+        return send(ids, user=user)
+    if action == 'dismiss':
+        pending = FollowUp.objects.filter(pk__in=ids, status='pending')
+        record_many(FollowUp, pending.values_list('pk', flat=True), 'update')
+        return pending.update(status='dismissed', updated_at=timezone.now())
+    raise ValueError(f'Unknown follow-up action: {action}')
@@ -1,7 +1,15 @@
+from decimal import Decimal
+
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from .models import Investor, Artifact, EmailDraft, CommunicationLog, ResponseFunding
+from django.core.validators import DecimalValidator
+from django.urls import reverse
+from .bulk import INVESTOR_ACTIONS, RESPONSE_ACTIONS
+from .followups import FOLLOW_UP_ACTIONS
+from .personalization import PLACEHOLDERS, unknown_placeholders
+from .segments import HELP as SEGMENT_HELP, SegmentError, parse as parse_segment
+from .models import Investor, Artifact, EmailDraft, CommunicationLog, ResponseFunding, Segment
 
 
 class UserRegistrationForm(UserCreationForm):
@@ -83,7 +91,7 @@ class EmailDraftForm(forms.ModelForm):
     
     class Meta:
         model = EmailDraft
-        fields = ['name', 'subject', 'body', 'artifacts']
+        fields = ['name', 'subject', 'body', 'artifacts', 'attachment_budget']
         widgets = {
             'name': forms.TextInput(attrs={
                 'class': 'form-input',
@@ -101,8 +109,59 @@ class EmailDraftForm(forms.ModelForm):
             'artifacts': forms.CheckboxSelectMultiple(attrs={
                 'class': 'form-checkbox-group'
             }),
+            'attachment_budget': forms.NumberInput(attrs={
+                'class': 'form-input',
+                'placeholder': 'Site default',
+                'min': 0
+            }),
         }
 
+    def _check_placeholders(self, text):
+        unknown = unknown_placeholders(text)
+        if unknown:
+            raise forms.ValidationError(
+                f"Unknown placeholders: {', '.join(unknown)}. "
+                f"Available: {', '.join(PLACEHOLDERS)}."
+            )
+        return text
+
+    def clean_subject(self):
+        return self._check_placeholders(self.cleaned_data['subject'])
+
+    def clean_body(self):
+        return self._check_placeholders(self.cleaned_data['body'])
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Select for a ModelChoiceField that renders only the selected option.
+    static/js/autocomplete.js loads the other options from `url_name` as the user types;
+    `depends_on` names a field whose value is passed along to narrow the search.
+    """
+
+    def __init__(self, url_name, depends_on=None, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+        self.depends_on = depends_on
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = reverse(self.url_name)
+        if self.depends_on:
+            attrs['data-depends-on'] = self.depends_on
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '---------', False, 0))
+        selected = [v for v in value if str(v).isdigit()]
+        if selected:
+            field = self.choices.field
+            for obj in field.queryset.filter(pk__in=selected):
+                options.append(self.create_option(name, obj.pk, field.label_from_instance(obj), True, len(options)))
+        return [(None, options, 0)]
+
 
 class ResponseFundingForm(forms.ModelForm):
     """Form for recording investor responses."""
@@ -111,10 +170,10 @@ class ResponseFundingForm(forms.ModelForm):
         model = ResponseFunding
         fields = ['communication', 'investor', 'response_status', 'amount_offered', 'notes', 'response_date']
         widgets = {
-            'communication': forms.Select(attrs={
+            'communication': AutocompleteSelect('lookup_communications', depends_on='investor', attrs={
                 'class': 'form-select'
             }),
-            'investor': forms.Select(attrs={
+            'investor': AutocompleteSelect('lookup_investors', attrs={
                 'class': 'form-select'
             }),
             'response_status': forms.Select(attrs={
@@ -135,6 +194,144 @@ class ResponseFundingForm(forms.ModelForm):
             }),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The communication label shows the investor's email
+        self.fields['communication'].queryset = CommunicationLog.objects.select_related('investor')
+
+
+class SegmentForm(forms.ModelForm):
+    """Form for creating/editing saved investor segments."""
+
+    class Meta:
+        model = Segment
+        fields = ['name', 'definition', 'description']
+        help_texts = {'definition': SEGMENT_HELP}
+        widgets = {
+            'name': forms.TextInput(attrs={
+                'class': 'form-input',
+                'placeholder': 'e.g., Cold seed VCs'
+            }),
+            'definition': forms.Textarea(attrs={
+                'class': 'form-textarea',
+                'placeholder': 'label in (VC, Seed) and amount > 10L and last_contact > 30d and response != failure',
+                'rows': 3
+            }),
+            'description': forms.Textarea(attrs={
+                'class': 'form-textarea',
+                'placeholder': 'What this segment is used for',
+                'rows': 2
+            }),
+        }
+
+    def clean_definition(self):
+        definition = ' '.join(self.cleaned_data['definition'].split())
+        try:
+            parse_segment(definition)
+        except SegmentError as e:
+            raise forms.ValidationError(str(e))
+        return definition
+
+
+class InvestorMergeForm(forms.Form):
+    """Merge one investor into another from the duplicates page."""
+    keep = forms.IntegerField(widget=forms.HiddenInput)
+    merge = forms.IntegerField(widget=forms.HiddenInput)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('keep') is not None and cleaned_data.get('keep') == cleaned_data.get('merge'):
+            raise forms.ValidationError('An investor cannot be merged into itself.')
+        return cleaned_data
+
+
+class BulkActionForm(forms.Form):
+    """Base form for list page bulk actions; subclasses set the action choices."""
+    ids = forms.Field(widget=forms.MultipleHiddenInput)
+    action = forms.ChoiceField(widget=forms.Select(attrs={'class': 'form-select'}))
+    value = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-input', 'placeholder': 'Value'})
+    )
+
+    def clean_ids(self):
+        ids = self.cleaned_data['ids'] or []
+        try:
+            ids = sorted({int(pk) for pk in ids})
+        except (TypeError, ValueError):
+            raise forms.ValidationError('Invalid selection.')
+        if not ids:
+            raise forms.ValidationError('Select at least one row.')
+        return ids
+
+    def parse_amount(self, value, field):
+        """Parse a non-negative amount for the model DecimalField `field`, rounded to its places."""
+        try:
+            amount = Decimal(value)
+            if not amount.is_finite() or amount < 0:
+                raise forms.ValidationError('Enter a valid amount.')
+            amount = amount.quantize(Decimal(1).scaleb(-field.decimal_places))
+        except ArithmeticError:
+            raise forms.ValidationError('Enter a valid amount.')
+        # The update runs in bulk, so the column limits are checked here rather than by the database
+        DecimalValidator(field.max_digits, field.decimal_places)(amount)
+        return amount
+
+
+class InvestorBulkActionForm(BulkActionForm):
+    """Bulk actions on the investor list."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['action'].choices = INVESTOR_ACTIONS
+
+    def clean(self):
+        cleaned_data = super().clean()
+        action = cleaned_data.get('action')
+        value = cleaned_data.get('value', '').strip()
+        if action in ('add_label', 'remove_label'):
+            if not value or ',' in value:
+                self.add_error('value', 'Enter a single label.')
+        elif action == 'set_amount':
+            try:
+                value = self.parse_amount(value, Investor._meta.get_field('amount'))
+            except forms.ValidationError as e:
+                self.add_error('value', e)
+        cleaned_data['value'] = value
+        return cleaned_data
+
+
+class ResponseBulkActionForm(BulkActionForm):
+    """Bulk actions on the response list."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['action'].choices = RESPONSE_ACTIONS
+        self.fields['value'].widget.attrs['list'] = 'bulk-status-values'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        action = cleaned_data.get('action')
+        value = cleaned_data.get('value', '').strip()
+        if action == 'set_status':
+            if value not in dict(ResponseFunding.RESPONSE_STATUS):
+                self.add_error('value', 'Choose a valid status.')
+        elif action == 'set_amount':
+            try:
+                value = self.parse_amount(value, ResponseFunding._meta.get_field('amount_offered'))
+            except forms.ValidationError as e:
+                self.add_error('value', e)
+        cleaned_data['value'] = value
+        return cleaned_data
+
+
+class FollowUpBulkActionForm(BulkActionForm):
+    """Bulk actions on the follow-up queue."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['action'].choices = FOLLOW_UP_ACTIONS
+
 
 class ChatbotForm(forms.Form):
     """Form for chatbot input."""
@@ -0,0 +1,225 @@
+"""
+Response-time tracking.
+Every ResponseFunding stores its email's draft, the seconds from the email being sent to
+the response, and whether it is the first response to that email. The fields are set when
+a response is saved (see core.signals) and filled for existing rows by
+`python manage.py backfill_response_latency`, so reports read them from the
+(draft, is_first_response, latency_seconds) index instead of joining response dates
+against send times over the whole history. Rows rewritten here are recorded in the
+change feed and invalidate the cached analytics, like any other write.
+"""
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q
+
+from . import analytics, changes
+from .analytics import CACHE_TIMEOUT, cache_version
+from .models import EmailDraft, CommunicationLog, ResponseFunding
+
+
+PERCENTILES = [50, 90]
+
+BATCH_SIZE = 1000
+
+
+# ==================== Maintenance ====================
+
+def latency_seconds(sent_at, response_date):
+    if sent_at is None or response_date is None:
+        return None
+    return int((response_date - sent_at).total_seconds())
+
+
+def set_fields(response):
+    """Copy the communication's draft and the response latency onto an unsaved response."""
+    row = CommunicationLog.objects.filter(pk=response.communication_id).values_list('draft_id', 'sent_at').first()
+    draft_id, sent_at = row or (None, None)
+    response.draft_id = draft_id
+    response.latency_seconds = latency_seconds(sent_at, response.response_date)
+
+
+def _record(response_ids):
+    """Record rewritten responses in the change feed and drop cached analytics once committed."""
+    if response_ids:
+        changes.record_many(ResponseFunding, response_ids, 'update')
+        transaction.on_commit(analytics.invalidate_cache)
+
+
+def _fix_first_responses(communication_ids=None):
+    """
+    Flag the earliest response to each email (ties broken by id) and clear the rest,
+    for the given communications or, by default, all of them.
+
+    Returns:
+        list: ids of the responses whose flag changed
+    """
+    earlier = ResponseFunding.objects.filter(communication=OuterRef('communication')).filter(
+        Q(response_date__lt=OuterRef('response_date'))
+        | Q(response_date=OuterRef('response_date'), pk__lt=OuterRef('pk'))
+    )
+    responses = ResponseFunding.objects.order_by()
+    if communication_ids is None:
+        scopes = [responses]
+    else:
+        communication_ids = sorted(set(communication_ids))
+        scopes = [
+            responses.filter(communication_id__in=communication_ids[start:start + BATCH_SIZE])
+            for start in range(0, len(communication_ids), BATCH_SIZE)
+        ]
+    changed = []
+    for scope in scopes:
+        # Only rows whose flag is wrong are rewritten, so the change feed sees real changes
+        wrong = list(
+            scope.alias(first=~Exists(earlier)).exclude(is_first_response=F('first')).values_list('pk', flat=True)
+        )
+        for start in range(0, len(wrong), BATCH_SIZE):
+            ResponseFunding.objects.filter(pk__in=wrong[start:start + BATCH_SIZE]).update(
+                is_first_response=~Exists(earlier)
+            )
+        changed += wrong
+    return changed
+
+
+def mark_first_responses(communication_ids=None):
+    """
+    Fix the first-response flags of the responses to the given communications (all by
+    default), recording the rewritten rows in the change feed.
+
+    Returns:
+        int: number of responses whose flag changed
+    """
+    changed = _fix_first_responses(communication_ids)
+    _record(changed)
+    return len(changed)
+
+
+def _write_latency(rows):
+    """
+    UPDATE (draft_id, latency_seconds, pk) rows with one prepared statement; bulk_update's
+    CASE expressions cost more to compile than the update itself on large backfills.
+    """
+    if not rows:
+        return
+    quote = connection.ops.quote_name
+    opts = ResponseFunding._meta
+    sql = 'UPDATE {} SET {} = %s, {} = %s WHERE {} = %s'.format(
+        quote(opts.db_table), quote(opts.get_field('draft').column),
+        quote(opts.get_field('latency_seconds').column), quote(opts.pk.column),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def refresh(communication_ids=None):
+    """
+    Recompute draft, latency and first-response flags for the responses to the given
+    communications (all responses by default).
+
+    Returns:
+        int: number of responses whose draft, latency or first-response flag changed
+    """
+    responses = ResponseFunding.objects.order_by('pk')
+    if communication_ids is not None:
+        communication_ids = sorted(set(communication_ids))
+        responses = responses.filter(communication_id__in=communication_ids)
+
+    changed = set()
+    last_pk = 0
+    while True:
+        rows = list(responses.filter(pk__gt=last_pk).values_list(
+            'pk', 'draft_id', 'latency_seconds', 'response_date', 'communication__draft_id', 'communication__sent_at',
+        )[:BATCH_SIZE])
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        stale = []
+        for pk, draft_id, latency, response_date, communication_draft_id, sent_at in rows:
+            expected = latency_seconds(sent_at, response_date)
+            if (draft_id, latency) != (communication_draft_id, expected):
+                stale.append((communication_draft_id, expected, pk))
+        _write_latency(stale)
+        changed.update(pk for _, _, pk in stale)
+
+    changed.update(_fix_first_responses(communication_ids))
+    _record(sorted(changed))
+    return len(changed)
+
+
+# ==================== Reporting ====================
+
+def nearest_rank(count, point):
+    """Zero-based index of the `point` percentile among `count` sorted values."""
+    return max(0, -(-count * point // 100) - 1)
+
+
+def first_responses():
+    # `__in` compiles to "is_first_response IN (1)", which SQLite treats as an equality on the
+    # index column and so walks the index in latency order; a bare boolean test does not
+    return ResponseFunding.objects.filter(is_first_response__in=[True], latency_seconds__isnull=False)
+
+
+def draft_percentiles(points=PERCENTILES):
+    """
+    Time to first response per draft.
+
+    Each percentile is one lookup that steps through the draft's entries of the
+    (draft, is_first_response, latency_seconds) index to the wanted rank.
+
+    Returns:
+        list: {'draft_id', 'draft', 'responses', 'p50', ...} in seconds, most responses first
+    """
+    counts = list(first_responses().order_by().values('draft_id').annotate(responses=Count('pk')))
+    names = dict(EmailDraft.objects.filter(pk__in=[row['draft_id'] for row in counts]).values_list('pk', 'name'))
+    rows = []
+    for row in counts:
+        entry = {
+            'draft_id': row['draft_id'],
+            'draft': names.get(row['draft_id'], 'Custom Email'),
+            'responses': row['responses'],
+        }
+        latencies = first_responses().filter(draft_id=row['draft_id']).order_by('latency_seconds')
+        for point in points:
+            rank = nearest_rank(row['responses'], point)
+            entry[f'p{point}'] = latencies.values_list('latency_seconds', flat=True)[rank]
+        rows.append(entry)
+    return sorted(rows, key=lambda entry: (-entry['responses'], entry['draft']))
+
+
+def label_percentiles(points=PERCENTILES):
+    """
+    Time to first response per investor label.
+
+    Labels live in a comma-separated field, so first responses are read once in
+    latency order from the (is_first_response, latency_seconds) index and split per
+    label; each label's list is then already sorted. This still reads every first
+    response, so the result relies on the analytics cache.
+
+    Returns:
+        list: {'label', 'responses', 'p50', ...} in seconds, most responses first
+    """
+    by_label = defaultdict(list)
+    rows = first_responses().order_by('latency_seconds').values_list('latency_seconds', 'investor__labels')
+    for latency, labels in rows.iterator(chunk_size=5000):
+        names = {label.strip() for label in (labels or '').split(',') if label.strip()}
+        for name in names or {'Unlabelled'}:
+            by_label[name].append(latency)
+
+    result = []
+    for name, latencies in by_label.items():
+        entry = {'label': name, 'responses': len(latencies)}
+        for point in points:
+            entry[f'p{point}'] = latencies[nearest_rank(len(latencies), point)]
+        result.append(entry)
+    return sorted(result, key=lambda entry: (-entry['responses'], entry['label']))
+
+
+def response_times():
+    """Per-draft and per-label time to first response, cached with the other analytics."""
+    key = f'analytics:response_times:{cache_version()}'
+    result = cache.get(key)
+    if result is None:
+        result = {'drafts': draft_percentiles(), 'labels': label_percentiles()}
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,79 @@
+"""
+Typeahead lookups for the investor and communication selectors.
+Matches are prefix searches expressed as index ranges (upper(name) and lower(email)), so a
+keystroke costs a bounded index scan instead of a scan of every investor.
+"""
+from django.db.models import Q
+from django.db.models.functions import Lower, Upper
+
+from .models import Investor, CommunicationLog
+
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+# Sorts after any character a name or email can continue with
+RANGE_END = '\U0010ffff'
+
+
+def prefix_q(field, prefix):
+    """A >= / < range on `field` matching values that start with `prefix`; usable by a btree index."""
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + RANGE_END})
+
+
+def matching_investors(query):
+    """Investors whose name or email starts with `query`, ignoring case."""
+    query = query.strip()
+    investors = Investor.objects.annotate(name_upper=Upper('name'))
+    if not query:
+        return investors
+    # Stored emails keep their case; lower(email) has its own expression index
+    investors = investors.annotate(email_lower=Lower('email'))
+    return investors.filter(prefix_q('name_upper', query.upper()) | prefix_q('email_lower', query.lower()))
+
+
+def investor_label(name, email):
+    return f'{name} ({email})'
+
+
+def communication_label(email, sent_at):
+    return f"Email to {email} on {sent_at.strftime('%Y-%m-%d %H:%M')}"
+
+
+def search_investors(query, limit=DEFAULT_LIMIT):
+    """
+    Investors for a typeahead.
+
+    Returns:
+        tuple: ([{'id', 'text'}], more) where `more` says the list was cut at `limit`
+    """
+    rows = list(
+        matching_investors(query)
+        .order_by('name_upper', 'pk')
+        .values_list('pk', 'name', 'email')[:limit + 1]
+    )
+    results = [{'id': pk, 'text': investor_label(name, email)} for pk, name, email in rows[:limit]]
+    return results, len(rows) > limit
+
+
+def search_communications(query, investor_id=None, limit=DEFAULT_LIMIT):
+    """
+    Communications for a typeahead, newest first.
+    With `investor_id` only that investor's emails are listed; otherwise `query` is matched
+    against the investor's name and email.
+
+    Returns:
+        tuple: ([{'id', 'text'}], more)
+    """
+    communications = CommunicationLog.objects.all()
+    if investor_id is not None:
+        communications = communications.filter(investor_id=investor_id)
+    if query.strip():
+        communications = communications.filter(investor__in=matching_investors(query).values('pk'))
+    rows = list(
+        communications
+        .order_by('-sent_at', '-pk')
+        .values_list('pk', 'investor__email', 'sent_at')[:limit + 1]
+    )
+    results = [{'id': pk, 'text': communication_label(email, sent_at)} for pk, email, sent_at in rows[:limit]]
+    return results, len(rows) > limit
@@ -0,0 +1,28 @@
+"""
+Fill the denormalized draft, latency and first-response fields of existing responses.
+
+Responses saved through the app keep these fields current; run this once after
+upgrading, and again after importing responses with bulk tools.
+
+Usage:
+    python manage.py backfill_response_latency
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import analytics, latency
+
+
+class Command(BaseCommand):
+    help = 'Backfill response latency and first-response flags from the communication log.'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with transaction.atomic():
+            changed = latency.refresh()
+        analytics.invalidate_cache()
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated {changed} responses ({(time.perf_counter() - start) * 1000:.0f} ms).'
+        ))
@@ -0,0 +1,137 @@
+"""
+Measure EmailService throughput against an in-process SMTP sink.
+
+Creates a draft with attachments and N synthetic investors inside a transaction that is
+rolled back afterwards, sends through each send path and reports messages/sec, bytes/sec
+and the cost of the CommunicationLog (and rollup) writes. Nothing leaves the machine.
+
+Usage:
+    python manage.py benchmark_email
+    python manage.py benchmark_email --investors 500 --attachments 3 --attachment-kb 1024
+    python manage.py benchmark_email --latency-ms 20 --failure-rate 0.05
+"""
+import os
+import re
+import tempfile
+import time
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+
+from core.email_service import EmailService
+from core.models import Investor, Artifact, EmailDraft
+from core.personalization import DraftMessageBuilder
+from core.smtp_sink import SMTPSink
+
+
+# Writes made on behalf of the communication log: the log row itself and its rollups
+LOG_WRITE = re.compile(
+    r'^\s*(INSERT|UPDATE)\b.*\b(core_communicationlog|core_communicationdailyrollup)\b',
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+class LogWriteTimer:
+    """connection.execute_wrapper that times communication log writes."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if LOG_WRITE.match(sql):
+                self.queries += 1
+                self.seconds += time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = 'Benchmark email sending throughput through a local SMTP sink.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--investors', type=int, default=200, help='Synthetic recipients per send path')
+        parser.add_argument('--attachments', type=int, default=2, help='Artifacts attached to the draft')
+        parser.add_argument('--attachment-kb', type=int, default=256, help='Size of each attachment')
+        parser.add_argument('--batch-size', type=int, default=50, help='Recipients per send_draft_batch call')
+        parser.add_argument('--latency-ms', type=float, default=0, help='Sink delay per message')
+        parser.add_argument('--failure-rate', type=float, default=0, help='Fraction of messages the sink rejects')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        sink = SMTPSink(latency=options['latency_ms'] / 1000, failure_rate=options['failure_rate'], seed=options['seed'])
+        with tempfile.TemporaryDirectory() as media_root, sink, override_settings(
+            MEDIA_ROOT=media_root, ARTIFACT_PROCESSING_WORKERS=0, **sink.email_settings()
+        ):
+            with transaction.atomic():
+                draft, investor_ids = self.create_fixtures(options)
+                paths = [
+                    ('send_draft_email', lambda ids: self.send_single(draft, ids)),
+                    ('send_draft_batch', lambda ids: self.send_batched(draft, ids, options['batch_size'])),
+                ]
+                self.stdout.write(
+                    f"{'path':<18} {'sent':>6} {'failed':>6} {'msg/s':>9} {'KB/s':>10} "
+                    f"{'log writes':>10} {'log ms':>9} {'ms/msg':>7}"
+                )
+                for name, send in paths:
+                    self.report(name, sink, send, investor_ids)
+                transaction.set_rollback(True)
+
+    def create_fixtures(self, options):
+        user, _ = User.objects.get_or_create(username='benchmark')
+        draft = EmailDraft.objects.create(
+            name=f'benchmark-{int(time.time())}',
+            subject='Update for {{ first_name }}',
+            body='<html><body><p>Dear {{ name }},</p><p>Thank you for your interest of '
+                 '₹{{ amount }}.</p></body></html>',
+            attachment_budget=1024,
+            created_by=user,
+        )
+        for index in range(options['attachments']):
+            artifact = Artifact(name=f'Benchmark attachment {index}', artifact_type='presentation', created_by=user)
+            artifact.file.save(f'benchmark-{index}.pdf', ContentFile(os.urandom(options['attachment_kb'] * 1024)),
+                               save=False)
+            artifact.save()
+            draft.artifacts.add(artifact)
+
+        # Separate recipients per path so both send the same number of first-time emails
+        Investor.objects.bulk_create([
+            Investor(name=f'Benchmark Investor {index}', email=f'benchmark-{index}@example.invalid', amount=index * 1000)
+            for index in range(options['investors'] * 2)
+        ])
+        ids = list(Investor.objects.filter(email__endswith='@example.invalid').order_by('pk').values_list('pk', flat=True))
+        return draft, {'send_draft_email': ids[::2], 'send_draft_batch': ids[1::2]}
+
+    def send_single(self, draft, ids):
+        service = EmailService()
+        investors = Investor.objects.in_bulk(ids)
+        return sum(service.send_draft_email(investors[pk], draft)[0] for pk in ids)
+
+    def send_batched(self, draft, ids, batch_size):
+        service = EmailService()
+        builder = DraftMessageBuilder(draft)
+        sent = 0
+        for start in range(0, len(ids), batch_size):
+            results = service.send_draft_batch(ids[start:start + batch_size], draft, builder=builder)
+            sent += sum(success for success, *_ in results.values())
+        return sent
+
+    def report(self, name, sink, send, investor_ids):
+        ids = investor_ids[name]
+        sink.reset()
+        timer = LogWriteTimer()
+        with connection.execute_wrapper(timer):
+            start = time.perf_counter()
+            sent = send(ids)
+            elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{name:<18} {sent:>6} {len(ids) - sent:>6} {sent / elapsed:>9.1f} "
+            f"{sink.bytes_received / 1024 / elapsed:>10.1f} {timer.queries:>10} "
+            f"{timer.seconds * 1000:>9.1f} {timer.seconds * 1000 / max(len(ids), 1):>7.2f}"
+        )
@@ -0,0 +1,111 @@
+"""
+Compare page render times with and without the cached template loader.
+
+Synthetic investors are created inside a transaction that is rolled back afterwards.
+Each page is requested with the plain filesystem/app-directories loaders (every render
+re-reads and re-parses the templates) and with the production configuration: the cached
+loader, warmed up front.
+
+Usage:
+    python manage.py benchmark_templates
+    python manage.py benchmark_templates --investors 10000 --repeat 5
+    python manage.py benchmark_templates --pages investor_list dashboard
+"""
+import statistics
+import time
+from copy import deepcopy
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from core.models import Investor
+from core.warmup import warm_templates
+
+
+SOURCE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+PROFILES = [
+    ('uncached', SOURCE_LOADERS),
+    ('cached', [('django.template.loaders.cached.Loader', SOURCE_LOADERS)]),
+]
+
+DEFAULT_PAGES = [
+    'investor_list', 'communication_list', 'dashboard', 'draft_list', 'artifact_list', 'response_create',
+]
+
+
+def templates_setting(loaders):
+    templates = deepcopy(settings.TEMPLATES)
+    templates[0]['APP_DIRS'] = False
+    templates[0]['OPTIONS']['loaders'] = loaders
+    return templates
+
+
+class Command(BaseCommand):
+    help = 'Measure per-page render time with uncached vs cached, pre-warmed template loaders.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--investors', type=int, default=10000, help='Synthetic investors to add')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed requests per page and profile')
+        parser.add_argument('--pages', nargs='+', default=DEFAULT_PAGES, help='URL names to render')
+
+    def handle(self, *args, **options):
+        # Allows the 'testserver' host used by the test client
+        setup_test_environment()
+        try:
+            with transaction.atomic():
+                user = self.create_fixtures(options['investors'])
+                timings = {name: self.run_profile(loaders, user, options) for name, loaders in PROFILES}
+                transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(f"{'page':<18} {'uncached ms':>12} {'cached ms':>10} {'saved ms':>9} {'speedup':>8}")
+        for page in options['pages']:
+            before, after = timings['uncached'][page], timings['cached'][page]
+            self.stdout.write(
+                f'{page:<18} {before:>12.2f} {after:>10.2f} {before - after:>9.2f} {before / after:>7.2f}x'
+            )
+
+    def create_fixtures(self, count):
+        user, _ = User.objects.get_or_create(username='benchmark')
+        Investor.objects.bulk_create([
+            Investor(
+                name=f'Template Benchmark {index}',
+                email=f'template-benchmark-{index}@example.invalid',
+                labels='VC, Benchmark',
+                amount=index * 1000,
+            )
+            for index in range(count)
+        ], batch_size=1000)
+        return user
+
+    def run_profile(self, loaders, user, options):
+        """Median request time in ms per page under one loader configuration."""
+        with override_settings(TEMPLATES=templates_setting(loaders)):
+            start = time.perf_counter()
+            compiled = warm_templates()
+            if compiled:
+                self.stdout.write(f'Warmed {compiled} templates in {(time.perf_counter() - start) * 1000:.0f} ms')
+
+            client = Client()
+            client.force_login(user)
+            results = {}
+            for page in options['pages']:
+                path = reverse(page)
+                client.get(path)  # first request also fills non-template caches
+                samples = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    client.get(path)
+                    samples.append((time.perf_counter() - start) * 1000)
+                results[page] = statistics.median(samples)
+            return results
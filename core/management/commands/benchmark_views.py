@@ -0,0 +1,49 @@
+"""
+Benchmark every core URL and compare against a stored baseline.
+
+Usage:
+    python manage.py benchmark_views --output benchmark_results.json
+    python manage.py benchmark_views --baseline benchmark_baseline.json --threshold 0.2
+    python manage.py benchmark_views --output benchmark_baseline.json   # record a new baseline
+"""
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.benchmark import run_benchmark, find_regressions, save_results, load_results
+
+
+class Command(BaseCommand):
+    help = 'Measure latency, query count and peak memory for every core URL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', default='benchmark', help='User to log in as')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed requests per URL')
+        parser.add_argument('--output', default='benchmark_results.json', help='Where to write results')
+        parser.add_argument('--baseline', help='Baseline JSON to compare against')
+        parser.add_argument('--threshold', type=float, default=0.25, help='Allowed fractional slowdown')
+        parser.add_argument('--min-latency-ms', type=float, default=5.0, help='Ignore latency deltas below this')
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username=options['username'])
+
+        # Allows the 'testserver' host and swaps in the locmem email backend
+        setup_test_environment()
+        try:
+            results = run_benchmark(user, repeat=options['repeat'], stdout=self.stdout)
+        finally:
+            teardown_test_environment()
+
+        save_results(results, options['output'])
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if options['baseline']:
+            regressions = find_regressions(
+                results,
+                load_results(options['baseline']),
+                threshold=options['threshold'],
+                min_latency_ms=options['min_latency_ms'],
+            )
+            if regressions:
+                raise CommandError('Performance regressions detected:\n  ' + '\n  '.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against baseline.'))
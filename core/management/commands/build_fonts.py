@@ -0,0 +1,64 @@
+"""
+Build the self-hosted Inter font: a Latin subset of the variable font as WOFF2.
+Needs fontTools and brotli (`pip install fonttools brotli`); the source is the variable
+TTF from an Inter release, e.g. InterVariable.ttf. Run it before collectstatic, which
+fails while the font is missing (STATIC_REQUIRED_FILES).
+
+Usage:
+    python manage.py build_fonts --source ~/Downloads/Inter/InterVariable.ttf
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.storage import INTER_FONT, LATIN_UNICODE_RANGE
+
+
+# OpenType features used by the stylesheet (kerning, ligatures, tabular figures)
+LAYOUT_FEATURES = ['kern', 'liga', 'calt', 'tnum']
+
+
+def parse_unicode_range(text):
+    """Code points from a CSS unicode-range value such as 'U+0000-00FF, U+20B9'."""
+    points = set()
+    for item in text.split(','):
+        start, _, end = item.strip()[2:].partition('-')
+        points.update(range(int(start, 16), int(end or start, 16) + 1))
+    return sorted(points)
+
+
+class Command(BaseCommand):
+    help = 'Subset the Inter font to Latin and write it as WOFF2 into the static directory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', required=True, help='Path to the Inter variable TTF')
+        parser.add_argument('--output', help=f'Defaults to <first STATICFILES_DIRS entry>/{INTER_FONT}')
+
+    def handle(self, *args, **options):
+        try:
+            from fontTools import subset
+        except ImportError:
+            raise CommandError('fontTools is not installed: pip install fonttools brotli')
+
+        source = Path(options['source']).expanduser()
+        if not source.is_file():
+            raise CommandError(f'Font not found: {source}')
+        output = Path(options['output'] or Path(settings.STATICFILES_DIRS[0]) / INTER_FONT)
+        output.parent.mkdir(parents=True, exist_ok=True)
+
+        subset_options = subset.Options()
+        subset_options.flavor = 'woff2'
+        subset_options.layout_features = LAYOUT_FEATURES
+        try:
+            font = subset.load_font(str(source), subset_options)
+            subsetter = subset.Subsetter(subset_options)
+            subsetter.populate(unicodes=parse_unicode_range(LATIN_UNICODE_RANGE))
+            subsetter.subset(font)
+            subset.save_font(font, str(output), subset_options)
+        except ImportError:
+            raise CommandError('WOFF2 output needs brotli: pip install brotli')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {output} ({output.stat().st_size / 1024:.0f} KB, from {source.stat().st_size / 1024:.0f} KB)'
+        ))
@@ -0,0 +1,34 @@
+"""
+Scan investors for likely duplicates and store the pairs for the duplicates page.
+
+The scan scores every investor, which takes seconds on a large book; run it from cron
+(e.g. nightly) or after an import. The page shows the pairs from the latest run.
+
+Usage:
+    python manage.py find_duplicates
+    python manage.py find_duplicates --threshold 0.8
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import dedupe
+
+
+class Command(BaseCommand):
+    help = 'Find likely duplicate investors and store them for review.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold', type=float, default=dedupe.THRESHOLD,
+            help=f'Minimum similarity between 0 and 1 (default {dedupe.THRESHOLD})',
+        )
+
+    def handle(self, *args, **options):
+        if not 0 < options['threshold'] <= 1:
+            raise CommandError('--threshold must be between 0 and 1')
+        start = time.perf_counter()
+        stored = dedupe.store_duplicates(options['threshold'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {stored} likely duplicate pairs in {(time.perf_counter() - start) * 1000:.0f} ms.'
+        ))
@@ -0,0 +1,49 @@
+"""
+Generate previews and metadata for artifacts the background pool has not processed.
+
+Usage:
+    python manage.py process_artifacts                  # drain pending artifacts
+    python manage.py process_artifacts --retry          # also retry failed/interrupted ones
+    python manage.py process_artifacts --all            # reprocess every artifact
+    python manage.py process_artifacts --workers 4
+"""
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import media
+from core.models import Artifact
+
+
+def process(artifact_id):
+    try:
+        return media.process_artifact(artifact_id)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnails, previews and metadata for pending artifacts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry', action='store_true',
+                            help="Also retry 'failed' artifacts and ones stuck in 'processing'")
+        parser.add_argument('--all', action='store_true', help='Reprocess every artifact')
+        parser.add_argument('--workers', type=int, default=media.WORKERS or 1)
+
+    def handle(self, *args, **options):
+        artifacts = Artifact.objects.all()
+        if not options['all']:
+            statuses = ['pending', 'failed', 'processing'] if options['retry'] else ['pending']
+            artifacts = artifacts.filter(processing_status__in=statuses)
+        # Reset in one statement; process_artifact only claims 'pending' rows
+        artifacts.exclude(processing_status='pending').update(processing_status='pending')
+        ids = list(Artifact.objects.filter(processing_status='pending').values_list('pk', flat=True))
+
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            outcomes = Counter(status or 'claimed elsewhere' for status in pool.map(process, ids))
+
+        summary = ', '.join(f'{count} {status}' for status, count in sorted(outcomes.items()))
+        self.stdout.write(self.style.SUCCESS(f'Processed {len(ids)} artifacts ({summary or "nothing to do"}).'))
@@ -0,0 +1,31 @@
+"""
+Delete change feed entries older than the retention period.
+
+Readers whose cursor falls before the oldest kept entry get 410 from the feed and
+resync; segments re-evaluate in full. Entries left unnumbered by a writer that died
+after committing are sequenced first. Run daily from cron.
+
+Usage:
+    python manage.py prune_changes               # keep CHANGE_LOG_RETENTION_DAYS
+    python manage.py prune_changes --days 7
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core import changes
+
+
+class Command(BaseCommand):
+    help = 'Delete change log entries older than the retention period.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Keep this many days (default CHANGE_LOG_RETENTION_DAYS)')
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days is not None and days < 0:
+            raise CommandError('--days must not be negative')
+        changes.sequence_pending()
+        deleted = changes.prune(days)
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} change log entries; oldest cursor is now {changes.oldest_cursor()}.'
+        ))
@@ -0,0 +1,54 @@
+"""
+Delete expired sessions in small batches.
+Unlike `clearsessions`, which removes every expired row in one statement, each batch is
+its own short transaction, so a large backlog does not lock the session table.
+Schedule it (e.g. hourly from cron) so the table stays small.
+
+Usage:
+    python manage.py purge_sessions
+    python manage.py purge_sessions --batch-size 5000 --pause 0.1
+"""
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+# Engines that keep sessions in the django_session table
+DATABASE_ENGINES = {
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+}
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions from the database in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Sessions deleted per statement')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE not in DATABASE_ENGINES:
+            self.stdout.write(f'{settings.SESSION_ENGINE} keeps no sessions in the database; nothing to purge.')
+            return
+
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now).order_by('expire_date')
+        batch_size = max(1, options['batch_size'])
+        deleted = 0
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[:batch_size])
+            if not keys:
+                break
+            # Re-check expiry: a session refreshed since it was selected must survive
+            count, _ = Session.objects.filter(session_key__in=keys, expire_date__lt=now).delete()
+            deleted += count
+            if len(keys) < batch_size:
+                break
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired sessions.'))
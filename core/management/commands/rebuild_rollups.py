@@ -0,0 +1,37 @@
+"""
+Backfill or repair the daily rollup tables from raw communication/response rows.
+
+Usage:
+    python manage.py rebuild_rollups                          # full rebuild
+    python manage.py rebuild_rollups --since 2026-01-01       # repair a day range
+    python manage.py rebuild_rollups --since 2026-01-01 --until 2026-01-31
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import rollups
+
+
+def parse_day(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+
+class Command(BaseCommand):
+    help = 'Rebuild CommunicationDailyRollup and ResponseDailyRollup from raw data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--until', help='Last day to rebuild (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        start = parse_day(options['since']) if options['since'] else None
+        end = parse_day(options['until']) if options['until'] else None
+
+        comm_rows, resp_rows = rollups.rebuild(start, end)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {comm_rows} communication and {resp_rows} response rollup rows.'
+        ))
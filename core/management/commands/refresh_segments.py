@@ -0,0 +1,43 @@
+"""
+Bring materialized segment memberships up to date.
+
+Pages and the chatbot read segments without writing, falling back to evaluating a stale
+segment live; running this from cron (e.g. every minute) keeps the materialized members
+fresh and re-evaluates time-relative segments as days pass.
+
+Usage:
+    python manage.py refresh_segments                    # incremental, all segments
+    python manage.py refresh_segments --full             # re-evaluate every investor
+    python manage.py refresh_segments --segment "Cold seed VCs"
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import segments
+from core.models import Segment
+
+
+class Command(BaseCommand):
+    help = 'Refresh saved segment memberships from the change feed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--segment', action='append', help='Segment name (repeatable); default all')
+        parser.add_argument('--full', action='store_true', help='Re-evaluate all investors instead of changes only')
+
+    def handle(self, *args, **options):
+        queryset = Segment.objects.all()
+        if options['segment']:
+            found = [segments.find(name) for name in options['segment']]
+            missing = [name for name, segment in zip(options['segment'], found) if segment is None]
+            if missing:
+                raise CommandError(f"Unknown segment(s): {', '.join(missing)}")
+            queryset = queryset.filter(pk__in=[segment.pk for segment in found])
+
+        for segment in queryset:
+            start = time.perf_counter()
+            segment = segments.rebuild(segment) if options['full'] else segments.refresh(segment)
+            self.stdout.write(
+                f'{segment.name}: {segment.member_count} members ({(time.perf_counter() - start) * 1000:.0f} ms)'
+            )
+        self.stdout.write(self.style.SUCCESS('Segments refreshed.'))
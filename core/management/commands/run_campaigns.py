@@ -0,0 +1,39 @@
+"""
+Send scheduled campaigns, rate-limited per campaign.
+
+Safe to stop and restart at any time: progress and the token bucket live in the database.
+Run a single instance per database.
+
+Usage:
+    python manage.py run_campaigns                 # run forever, ticking every 30 seconds
+    python manage.py run_campaigns --interval 10
+    python manage.py run_campaigns --once          # one tick, e.g. from cron
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.campaigns import Scheduler
+
+
+class Command(BaseCommand):
+    help = 'Release due campaign emails within each campaign\'s rate limit.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=30, help='Seconds between ticks')
+        parser.add_argument('--once', action='store_true', help='Run a single tick and exit')
+
+    def handle(self, *args, **options):
+        scheduler = Scheduler()
+        try:
+            while True:
+                for campaign_id, counts in scheduler.tick().items():
+                    if counts['sent'] or counts['failed']:
+                        self.stdout.write(
+                            f"Campaign {campaign_id}: {counts['sent']} sent, {counts['failed']} failed"
+                        )
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped.')
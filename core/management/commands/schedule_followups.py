@@ -0,0 +1,44 @@
+"""
+Queue follow-ups for investors whose latest email has gone unanswered.
+
+Each run starts from the previous run's cutoff (per threshold), so running it from
+cron every few minutes only scans the emails that went stale in between, plus the
+investors whose emails, responses or follow-ups changed since the previous run.
+
+Usage:
+    python manage.py schedule_followups                      # FOLLOW_UP_AFTER_DAYS threshold
+    python manage.py schedule_followups --days 30 --draft followup_30
+    python manage.py schedule_followups --full               # rescan all emails
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import followups
+from core.models import EmailDraft
+
+
+class Command(BaseCommand):
+    help = 'Queue follow-up drafts for investors with stale, unanswered outreach.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Days without a response (default FOLLOW_UP_AFTER_DAYS)')
+        parser.add_argument('--draft', help="Draft name to send as the follow-up; default the original email's draft")
+        parser.add_argument('--full', action='store_true', help='Ignore the checkpoint and scan every email')
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] < 1:
+            raise CommandError('--days must be positive')
+        draft = None
+        if options['draft']:
+            draft = EmailDraft.objects.filter(name__iexact=options['draft']).first()
+            if draft is None:
+                raise CommandError(f"Draft '{options['draft']}' not found")
+
+        start = time.perf_counter()
+        run = followups.schedule(days=options['days'], draft=draft, full=options['full'])
+        scanned = f"since {run.since:%Y-%m-%d %H:%M}" if run.since else 'all emails'
+        self.stdout.write(self.style.SUCCESS(
+            f'Queued {run.queued} follow-ups ({run.after_days} days, {scanned}) '
+            f'in {(time.perf_counter() - start) * 1000:.0f} ms.'
+        ))
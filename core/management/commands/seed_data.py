@@ -0,0 +1,256 @@
+"""
+Seed the database with synthetic fundraising data for load testing.
+
+Usage:
+    python manage.py seed_data
+    python manage.py seed_data --investors 5000 --communications 500000 --responses 100000
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core import analytics, changes, latency, rollups, segments
+from core.models import Investor, Artifact, EmailDraft, CommunicationLog, ResponseFunding, Segment
+
+
+# Label -> relative weight. Each investor receives one to three labels.
+LABEL_WEIGHTS = {
+    'VC': 30,
+    'Angel': 25,
+    'Seed': 20,
+    'Tech': 30,
+    'Series-A': 12,
+    'Fintech': 10,
+    'Healthcare': 8,
+    'SaaS': 8,
+    'Family-Office': 5,
+    'Corporate': 4,
+}
+
+FIRST_NAMES = [
+    'Aarav', 'Priya', 'Rohan', 'Ananya', 'Vikram', 'Meera', 'Arjun', 'Kavya',
+    'Rahul', 'Isha', 'Sanjay', 'Neha', 'Karan', 'Divya', 'Amit', 'Pooja',
+]
+LAST_NAMES = [
+    'Sharma', 'Patel', 'Iyer', 'Reddy', 'Gupta', 'Nair', 'Mehta', 'Kapoor',
+    'Singh', 'Rao', 'Joshi', 'Desai', 'Menon', 'Chopra', 'Bose', 'Kulkarni',
+]
+EMAIL_DOMAINS = ['gmail.com', 'yahoo.com', 'outlook.com', 'capital.in', 'ventures.com', 'partners.co']
+
+SEGMENTS = {
+    'Cold seed VCs': 'label in (VC, Seed) and amount > 10L and last_contact > 30d and response != failure',
+    'Committed': 'response = success',
+}
+
+COMMUNICATION_STATUS_WEIGHTS = {'success': 94, 'failed': 6}
+RESPONSE_STATUS_WEIGHTS = {'pending': 50, 'failure': 35, 'success': 15}
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Temporarily disable auto_now/auto_now_add so seeded rows keep their dates."""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field, _, _ in saved:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+class Command(BaseCommand):
+    help = 'Seed realistic volumes of investors, artifacts, drafts, communications and responses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--investors', type=int, default=2000)
+        parser.add_argument('--artifacts', type=int, default=50)
+        parser.add_argument('--drafts', type=int, default=20)
+        parser.add_argument('--communications', type=int, default=200000)
+        parser.add_argument('--responses', type=int, default=50000)
+        parser.add_argument('--days', type=int, default=365, help='Spread communications over this many days')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible data')
+        parser.add_argument('--username', default='benchmark', help='User recorded as creator/sender')
+        parser.add_argument('--clear', action='store_true', help='Delete existing core data first')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+
+        user, _ = User.objects.get_or_create(username=options['username'])
+
+        with transaction.atomic(), rollups.suspended():
+            if options['clear']:
+                self._clear()
+
+            investor_ids = self._seed_investors(options['investors'])
+            artifact_ids = self._seed_artifacts(options['artifacts'], user)
+            draft_ids = self._seed_drafts(options['drafts'], user, artifact_ids)
+            self._seed_communications(options['communications'], options['days'], investor_ids, draft_ids, user)
+            self._seed_responses(options['responses'], user)
+
+            # bulk_create bypasses the rollup, latency and change log signals anyway; every
+            # batch records its rows in the change log itself
+            rollups.rebuild()
+            latency.mark_first_responses()
+        self._seed_segments(user)
+        analytics.invalidate_cache()
+
+        self.stdout.write(self.style.SUCCESS('Seeding complete.'))
+
+    def _seed_segments(self, user):
+        """Sample saved segments; existing ones are re-evaluated against the new rows."""
+        for name, definition in SEGMENTS.items():
+            segment, _ = Segment.objects.get_or_create(
+                name=name, defaults={'definition': definition, 'created_by': user},
+            )
+            segments.rebuild(segment)
+        self.stdout.write(f'Evaluated {len(SEGMENTS)} segments.')
+
+    def _clear(self):
+        for model in (ResponseFunding, CommunicationLog, EmailDraft, Artifact, Investor):
+            rows = model.objects.all()
+            changes.record_many(model, rows.values_list('pk', flat=True).iterator(chunk_size=self.batch_size), 'delete')
+            rows.delete()
+        self.stdout.write('Cleared existing data.')
+
+    def _record(self, model, objs):
+        """Record bulk-created rows in the change log, which their signals would have done."""
+        changes.record_many(model, [obj.pk for obj in objs], 'create')
+
+    def _weighted(self, weights):
+        return self.rng.choices(list(weights), weights=list(weights.values()))[0]
+
+    def _labels(self):
+        count = self.rng.choices([1, 2, 3], weights=[50, 35, 15])[0]
+        labels = []
+        while len(labels) < count:
+            label = self._weighted(LABEL_WEIGHTS)
+            if label not in labels:
+                labels.append(label)
+        return ', '.join(labels)
+
+    def _seed_investors(self, count):
+        start = Investor.objects.count()
+        investors = []
+        for i in range(start, start + count):
+            first = self.rng.choice(FIRST_NAMES)
+            last = self.rng.choice(LAST_NAMES)
+            investors.append(Investor(
+                name=f'{first} {last}',
+                email=f'{first.lower()}.{last.lower()}.{i}@{self.rng.choice(EMAIL_DOMAINS)}',
+                labels=self._labels(),
+                details='Synthetic investor created by seed_data',
+                amount=Decimal(self.rng.randrange(0, 500)) * 100000,
+                updated_by='seed_data',
+            ))
+        self._record(Investor, Investor.objects.bulk_create(investors, batch_size=self.batch_size))
+        self.stdout.write(f'Created {count} investors.')
+        return list(Investor.objects.values_list('id', flat=True))
+
+    def _seed_artifacts(self, count, user):
+        types = [choice for choice, _ in Artifact.ARTIFACT_TYPES]
+        extensions = {'image': 'png', 'video': 'mp4', 'presentation': 'pdf'}
+        artifacts = []
+        for i in range(count):
+            artifact_type = self.rng.choice(types)
+            artifacts.append(Artifact(
+                artifact_type=artifact_type,
+                artifact_labels=self._labels(),
+                file=f'artifacts/seed/artifact_{i}.{extensions[artifact_type]}',
+                name=f'Seed {artifact_type} {i}',
+                description='Synthetic artifact created by seed_data',
+                created_by=user,
+            ))
+        self._record(Artifact, Artifact.objects.bulk_create(artifacts, batch_size=self.batch_size))
+        self.stdout.write(f'Created {count} artifacts.')
+        return list(Artifact.objects.values_list('id', flat=True))
+
+    def _seed_drafts(self, count, user, artifact_ids):
+        start = EmailDraft.objects.count()
+        drafts = [
+            EmailDraft(
+                name=f'seed_draft_{i}',
+                subject=f'Investment opportunity #{i}',
+                body='<p>Hello,</p><p>Please find our latest update attached.</p>',
+                created_by=user,
+            )
+            for i in range(start, start + count)
+        ]
+        EmailDraft.objects.bulk_create(drafts, batch_size=self.batch_size)
+
+        new_ids = list(EmailDraft.objects.filter(name__in=[d.name for d in drafts]).values_list('id', flat=True))
+        if artifact_ids:
+            through = EmailDraft.artifacts.through
+            links = []
+            for draft_id in new_ids:
+                for artifact_id in self.rng.sample(artifact_ids, min(len(artifact_ids), self.rng.randint(1, 3))):
+                    links.append(through(emaildraft_id=draft_id, artifact_id=artifact_id))
+            through.objects.bulk_create(links, batch_size=self.batch_size, ignore_conflicts=True)
+        changes.record_many(EmailDraft, new_ids, 'create')
+
+        self.stdout.write(f'Created {count} drafts.')
+        return list(EmailDraft.objects.values_list('id', flat=True))
+
+    def _seed_communications(self, count, days, investor_ids, draft_ids, user):
+        if not investor_ids or not count:
+            return
+        seconds = days * 24 * 3600
+        created = 0
+        with explicit_timestamps(CommunicationLog._meta.get_field('sent_at')):
+            while created < count:
+                size = min(self.batch_size, count - created)
+                batch = [
+                    CommunicationLog(
+                        investor_id=self.rng.choice(investor_ids),
+                        draft_id=self.rng.choice(draft_ids) if draft_ids and self.rng.random() < 0.9 else None,
+                        sent_at=self.now - timedelta(seconds=self.rng.randrange(seconds)),
+                        status=self._weighted(COMMUNICATION_STATUS_WEIGHTS),
+                        sent_by=user,
+                        notes='Seeded communication',
+                    )
+                    for _ in range(size)
+                ]
+                self._record(CommunicationLog, CommunicationLog.objects.bulk_create(batch))
+                created += size
+        self.stdout.write(f'Created {count} communication logs.')
+
+    def _seed_responses(self, count, user):
+        communications = list(
+            CommunicationLog.objects.filter(status='success').values_list('id', 'investor_id', 'draft_id', 'sent_at')
+        )
+        if not communications or not count:
+            return
+        created = 0
+        with explicit_timestamps(ResponseFunding._meta.get_field('created_date')):
+            while created < count:
+                size = min(self.batch_size, count - created)
+                batch = []
+                for _ in range(size):
+                    comm_id, investor_id, draft_id, sent_at = self.rng.choice(communications)
+                    status = self._weighted(RESPONSE_STATUS_WEIGHTS)
+                    response_date = min(sent_at + timedelta(hours=self.rng.randrange(1, 30 * 24)), self.now)
+                    batch.append(ResponseFunding(
+                        communication_id=comm_id,
+                        investor_id=investor_id,
+                        response_status=status,
+                        amount_offered=Decimal(self.rng.randrange(1, 200)) * 50000 if status == 'success' else 0,
+                        notes='Seeded response',
+                        response_date=response_date,
+                        created_date=response_date,
+                        created_by=user,
+                        draft_id=draft_id,
+                        latency_seconds=latency.latency_seconds(sent_at, response_date),
+                    ))
+                self._record(ResponseFunding, ResponseFunding.objects.bulk_create(batch))
+                created += size
+        self.stdout.write(f'Created {count} responses.')
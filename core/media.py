@@ -0,0 +1,294 @@
+"""
+Background media processing for artifacts.
+Generates small preview images (image thumbnails, video poster frames, first slide of a
+presentation) and extracts size/dimension/duration/page-count metadata, so list pages
+never have to download the original uploads.
+
+Work is submitted after commit to an in-process worker pool; anything left pending
+(e.g. after a restart) is drained by `python manage.py process_artifacts`.
+Every converter is optional: Pillow for images, ffmpeg/ffprobe for videos and
+poppler (pdftoppm/pdfinfo) plus LibreOffice for presentations. Artifacts whose type
+has no tool available are marked 'skipped' and keep the generic icon.
+"""
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+
+from . import changes
+from .models import Artifact
+
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = getattr(settings, 'ARTIFACT_THUMBNAIL_SIZE', (320, 320))
+WORKERS = getattr(settings, 'ARTIFACT_PROCESSING_WORKERS', 2)
+TOOL_TIMEOUT = getattr(settings, 'ARTIFACT_PROCESSING_TIMEOUT', 120)
+
+
+class Unsupported(Exception):
+    """No local tool can process this artifact."""
+
+
+# ==================== Optional Tools ====================
+
+@lru_cache(maxsize=None)
+def load_pillow():
+    """
+    Import Pillow on first use.
+
+    Returns:
+        tuple or None: (Image, ImageOps) modules, or None if Pillow is not installed
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+    return Image, ImageOps
+
+
+@lru_cache(maxsize=None)
+def find_tool(name):
+    """Path to an external executable, or None when it is not installed."""
+    return shutil.which(name)
+
+
+def run_tool(*args):
+    return subprocess.run(args, capture_output=True, check=True, timeout=TOOL_TIMEOUT)
+
+
+# ==================== Worker Pool ====================
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='artifact-media')
+        return _executor
+
+
+def _run_in_worker(artifact_id):
+    try:
+        process_artifact(artifact_id)
+    except Exception:
+        logger.exception('Processing artifact %s failed', artifact_id)
+    finally:
+        close_old_connections()
+
+
+def enqueue(artifact_id):
+    """
+    Process an artifact on the worker pool. Call after the artifact is committed.
+
+    With ARTIFACT_PROCESSING_WORKERS = 0 nothing runs in-process and pending
+    artifacts are left for the process_artifacts command.
+    """
+    if WORKERS > 0:
+        get_executor().submit(_run_in_worker, artifact_id)
+
+
+# ==================== Processing ====================
+
+@contextmanager
+def local_path(field_file):
+    """A filesystem path for a stored file, copying it to a temp file for remote storages."""
+    try:
+        path = field_file.path
+    except NotImplementedError:
+        path = None
+    if path:
+        yield path
+        return
+
+    suffix = os.path.splitext(field_file.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+        with field_file.open('rb') as source:
+            shutil.copyfileobj(source, tmp)
+        tmp.flush()
+        yield tmp.name
+
+
+def _thumbnail_from_image(image_file):
+    """Scale an image (path or file object) down to a JPEG thumbnail. Returns (bytes, width, height)."""
+    pillow = load_pillow()
+    if pillow is None:
+        raise Unsupported('Pillow is not installed')
+    Image, ImageOps = pillow
+
+    with Image.open(image_file) as image:
+        image = ImageOps.exif_transpose(image)
+        width, height = image.size
+        image.thumbnail(THUMBNAIL_SIZE)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        output = BytesIO()
+        image.save(output, format='JPEG', quality=80, optimize=True)
+    return output.getvalue(), width, height
+
+
+def process_image(artifact, path):
+    thumbnail, width, height = _thumbnail_from_image(path)
+    return {'width': width, 'height': height}, thumbnail
+
+
+def process_video(artifact, path):
+    ffprobe, ffmpeg = find_tool('ffprobe'), find_tool('ffmpeg')
+    if not ffprobe or not ffmpeg:
+        raise Unsupported('ffmpeg/ffprobe are not installed')
+
+    probe = json.loads(run_tool(
+        ffprobe, '-v', 'error', '-print_format', 'json', '-show_format',
+        '-show_streams', '-select_streams', 'v:0', path,
+    ).stdout)
+    stream = (probe.get('streams') or [{}])[0]
+    duration = float(probe.get('format', {}).get('duration') or 0) or None
+    metadata = {'duration': duration, 'width': stream.get('width'), 'height': stream.get('height')}
+
+    # Poster frame a little into the clip, avoiding black lead-in frames on longer videos
+    offset = min(1.0, duration / 2) if duration else 0
+    frame = run_tool(
+        ffmpeg, '-v', 'error', '-ss', str(offset), '-i', path, '-frames:v', '1',
+        '-vf', f'scale={THUMBNAIL_SIZE[0]}:-2', '-f', 'image2', '-c:v', 'mjpeg', 'pipe:1',
+    ).stdout
+    return metadata, frame or None
+
+
+def _slide_count(path):
+    """Slides in an OOXML presentation, read from the zip directory without rendering."""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return sum(
+                1 for name in archive.namelist()
+                if name.startswith('ppt/slides/slide') and name.endswith('.xml')
+            ) or None
+    except zipfile.BadZipFile:
+        return None
+
+
+def _pdf_page_count(pdf_path):
+    pdfinfo = find_tool('pdfinfo')
+    if not pdfinfo:
+        return None
+    for line in run_tool(pdfinfo, pdf_path).stdout.decode(errors='replace').splitlines():
+        if line.startswith('Pages:'):
+            return int(line.split(':', 1)[1])
+    return None
+
+
+def _render_first_page(pdf_path, workdir):
+    pdftoppm = find_tool('pdftoppm')
+    if not pdftoppm:
+        return None
+    prefix = os.path.join(workdir, 'page')
+    run_tool(
+        pdftoppm, '-f', '1', '-l', '1', '-singlefile', '-jpeg',
+        '-scale-to', str(max(THUMBNAIL_SIZE)), pdf_path, prefix,
+    )
+    with open(f'{prefix}.jpg', 'rb') as f:
+        return f.read()
+
+
+def process_presentation(artifact, path):
+    is_pdf = path.lower().endswith('.pdf')
+    metadata = {'page_count': None if is_pdf else _slide_count(path)}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        pdf_path = path
+        if not is_pdf:
+            soffice = find_tool('soffice') or find_tool('libreoffice')
+            if not soffice:
+                if metadata['page_count']:
+                    return metadata, None
+                raise Unsupported('LibreOffice is not installed')
+            run_tool(soffice, '--headless', '--convert-to', 'pdf', '--outdir', workdir, path)
+            pdf_path = os.path.join(workdir, os.path.splitext(os.path.basename(path))[0] + '.pdf')
+
+        if metadata['page_count'] is None:
+            metadata['page_count'] = _pdf_page_count(pdf_path)
+        thumbnail = _render_first_page(pdf_path, workdir)
+
+    if thumbnail is None and metadata['page_count'] is None:
+        raise Unsupported('poppler-utils are not installed')
+    return metadata, thumbnail
+
+
+PROCESSORS = {
+    'image': process_image,
+    'video': process_video,
+    'presentation': process_presentation,
+}
+
+
+def process_artifact(artifact_id):
+    """
+    Generate the preview and metadata for one pending artifact.
+
+    The artifact is claimed with a conditional update, so concurrent workers (or the
+    management command running alongside the pool) never process it twice.
+
+    Returns:
+        str or None: the resulting processing_status, or None if nothing was claimed or
+        the file was replaced while it was being processed
+    """
+    claimed = Artifact.objects.filter(pk=artifact_id, processing_status='pending').update(
+        processing_status='processing'
+    )
+    if not claimed:
+        return None
+
+    artifact = Artifact.objects.get(pk=artifact_id)
+    fields = {'processing_error': ''}
+    thumbnail = None
+    try:
+        if not artifact.file:
+            raise Unsupported('No file uploaded')
+        fields['file_size'] = artifact.file.size
+        with local_path(artifact.file) as path:
+            metadata, thumbnail = PROCESSORS[artifact.artifact_type](artifact, path)
+        fields.update(metadata)
+        fields['processing_status'] = 'done'
+    except Unsupported as e:
+        fields['processing_status'] = 'skipped'
+        fields['processing_error'] = str(e)
+    except Exception as e:
+        logger.warning('Could not process artifact %s: %s', artifact_id, e)
+        fields['processing_status'] = 'failed'
+        fields['processing_error'] = str(e)[:1000]
+
+    previous_thumbnail = artifact.thumbnail.name
+    if thumbnail:
+        name = f'{os.path.splitext(os.path.basename(artifact.file.name))[0]}.jpg'
+        artifact.thumbnail.save(name, ContentFile(thumbnail), save=False)
+        fields['thumbnail'] = artifact.thumbnail.name
+
+    # A plain update: no save signals, so finishing does not re-trigger processing.
+    # It only applies while the artifact still holds the file this job read; a file
+    # uploaded meanwhile was reset to pending and gets its own job.
+    finished = Artifact.objects.filter(
+        pk=artifact_id, processing_status='processing', file=artifact.file.name,
+    ).update(**fields)
+    storage = artifact.thumbnail.storage
+    if not finished:
+        if thumbnail:
+            storage.delete(fields['thumbnail'])
+        return None
+    if thumbnail and previous_thumbnail:
+        storage.delete(previous_thumbnail)
+    changes.record(Artifact, artifact_id, 'update')
+    return fields['processing_status']
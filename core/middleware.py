@@ -0,0 +1,251 @@
+"""
+Response middleware: static file serving and compression.
+
+StaticAssetMiddleware serves collected static files. Hashed files from the collectstatic
+manifest never change, so they are sent with far-future immutable caching; a
+pre-compressed .br or .gz variant is chosen from the request's Accept-Encoding. Only
+active with DEBUG off and a local STATIC_URL.
+
+CompressionMiddleware compresses dynamic text responses (HTML, JSON) with brotli or gzip.
+Streaming responses are compressed chunk by chunk and flushed after each one, so
+streamed pages keep their early first byte. Every compressed response carries a random
+amount of padding that decoders skip (the gzip file name, a brotli metadata block), as
+Django's GZipMiddleware does, so response lengths do not reveal how well a secret such
+as the CSRF token compressed against reflected input (BREACH).
+"""
+import gzip
+import io
+import mimetypes
+import os
+import secrets
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .storage import load_brotli
+
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Unhashed names (e.g. referenced by third-party code) may change on deploy
+UNHASHED_MAX_AGE = 3600
+
+# Preferred first
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+def accepted_encodings(header):
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        if params.strip().replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticAssetMiddleware:
+    """Serve files from STATIC_ROOT with caching headers and pre-compressed variants."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if settings.DEBUG or not settings.STATIC_ROOT or '://' in settings.STATIC_URL:
+            raise MiddlewareNotUsed
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+        self.root = str(settings.STATIC_ROOT)
+        self.immutable = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path_info.startswith(self.prefix):
+            response = self.serve(request, request.path_info[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except ValueError:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        stat = os.stat(path)
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+            response = HttpResponseNotModified()
+        else:
+            encoding, served = None, path
+            accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+            for coding, suffix in ENCODINGS:
+                if coding in accepted and os.path.isfile(path + suffix):
+                    encoding, served = coding, path + suffix
+                    break
+            content_type, _ = mimetypes.guess_type(path)
+            response = FileResponse(
+                open(served, 'rb'),
+                content_type=content_type or 'application/octet-stream',
+                filename=os.path.basename(path),
+            )
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+
+        response.headers['Last-Modified'] = http_date(stat.st_mtime)
+        response.headers['Vary'] = 'Accept-Encoding'
+        if name in self.immutable:
+            response.headers['Cache-Control'] = IMMUTABLE
+        else:
+            response.headers['Cache-Control'] = f'public, max-age={UNHASHED_MAX_AGE}'
+        return response
+
+
+# ==================== Compression ====================
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+
+# Smaller bodies are not worth the CPU or the gzip header
+MIN_SIZE = 500
+
+# Dynamic responses favour speed over ratio
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+# Upper bound of the random padding added to each compressed response, in bytes
+MAX_PADDING = 100
+
+
+def padding_length():
+    return secrets.randbelow(MAX_PADDING + 1)
+
+
+def brotli_metadata(length):
+    """
+    A brotli metadata meta-block carrying `length` (1-256) skipped bytes (RFC 7932, 9.2).
+    Must be written where the compressed stream is byte-aligned, i.e. after a flush.
+    """
+    # ISLAST=0, MNIBBLES=0 (coded 3), reserved bit, MSKIPBYTES=1, then MSKIPLEN-1 over 8 bits
+    header = (3 << 1) | (1 << 4) | ((length - 1) << 6)
+    return header.to_bytes(2, 'little') + bytes(length)
+
+
+class GzipStream:
+    def __init__(self, padding):
+        self.buffer = io.BytesIO()
+        # The padding travels as the gzip header's file name
+        self.file = gzip.GzipFile(
+            filename=b'a' * padding, mode='wb', compresslevel=GZIP_LEVEL, fileobj=self.buffer, mtime=0,
+        )
+
+    def read(self):
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+    def compress(self, chunk):
+        self.file.write(chunk)
+        self.file.flush()
+        return self.read()
+
+    def finish(self):
+        self.file.close()
+        return self.read()
+
+
+class BrotliStream:
+    def __init__(self, brotli, padding):
+        self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        # A flush writes the stream header and leaves the output byte-aligned for the padding
+        self.pending = self.compressor.flush() + (brotli_metadata(padding) if padding else b'')
+
+    def take_pending(self):
+        data, self.pending = self.pending, b''
+        return data
+
+    def compress(self, chunk):
+        return self.take_pending() + self.compressor.process(chunk) + self.compressor.flush()
+
+    def finish(self):
+        return self.take_pending() + self.compressor.finish()
+
+
+class CompressionMiddleware:
+    """Compress text responses with brotli (when installed) or gzip, as the client accepts."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', MIN_SIZE)
+        self.brotli = load_brotli()
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.choose_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            self.compress_stream(response, encoding)
+        else:
+            if len(response.content) < self.min_size:
+                return response
+            body = self.compress(response.content, encoding)
+            if len(body) >= len(response.content):
+                return response
+            response.content = body
+            response.headers['Content-Length'] = str(len(body))
+
+        response.headers['Content-Encoding'] = encoding
+        # The compressed body is a different byte sequence from the one a strong ETag names
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        return response
+
+    def compressible(self, response):
+        if response.status_code in (204, 304) or response.has_header('Content-Encoding'):
+            return False
+        return response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)
+
+    def choose_encoding(self, request):
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if self.brotli and 'br' in accepted:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return None
+
+    def compress(self, data, encoding):
+        stream = self.stream(encoding)
+        return stream.compress(data) + stream.finish()
+
+    def stream(self, encoding):
+        padding = padding_length()
+        return BrotliStream(self.brotli, padding) if encoding == 'br' else GzipStream(padding)
+
+    def compress_stream(self, response, encoding):
+        stream = self.stream(encoding)
+        if response.is_async:
+            async def compressed(chunks):
+                async for chunk in chunks:
+                    data = stream.compress(chunk)
+                    if data:
+                        yield data
+                yield stream.finish()
+        else:
+            def compressed(chunks):
+                for chunk in chunks:
+                    data = stream.compress(chunk)
+                    if data:
+                        yield data
+                yield stream.finish()
+        response.streaming_content = compressed(response.streaming_content)
+        del response['Content-Length']
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+    """Populate the rollups from existing communication and response rows."""
+    from django.db.models import Count, Sum
+    from django.db.models.functions import TruncDate
+
+    CommunicationLog = apps.get_model('core', 'CommunicationLog')
+    ResponseFunding = apps.get_model('core', 'ResponseFunding')
+    CommunicationDailyRollup = apps.get_model('core', 'CommunicationDailyRollup')
+    ResponseDailyRollup = apps.get_model('core', 'ResponseDailyRollup')
+
+    CommunicationDailyRollup.objects.bulk_create([
+        CommunicationDailyRollup(day=row['day'], draft_id=row['draft_id'], status=row['status'], count=row['n'])
+        for row in CommunicationLog.objects.annotate(day=TruncDate('sent_at')).order_by()
+        .values('day', 'draft_id', 'status').annotate(n=Count('id'))
+    ], batch_size=1000)
+    ResponseDailyRollup.objects.bulk_create([
+        ResponseDailyRollup(
+            day=row['day'], draft_id=row['communication__draft_id'], response_status=row['response_status'],
+            count=row['n'], total_amount=row['amount'] or 0,
+        )
+        for row in ResponseFunding.objects.annotate(day=TruncDate('response_date')).order_by()
+        .values('day', 'communication__draft_id', 'response_status').annotate(n=Count('id'), amount=Sum('amount_offered'))
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResponseDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='Day the responses were received')),
+                ('response_status', models.CharField(choices=[('success', 'Success'), ('failure', 'Failure'), ('pending', 'Pending')], max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('draft', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='response_rollups', to='core.emaildraft')),
+            ],
+            options={
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CommunicationDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='Day the emails were sent')),
+                ('status', models.CharField(choices=[('success', 'Success'), ('failed', 'Failed')], max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('draft', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='communication_rollups', to='core.emaildraft')),
+            ],
+            options={
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='responsedailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'response_status', 'draft'), name='unique_response_rollup'),
+        ),
+        migrations.AddConstraint(
+            model_name='communicationdailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'draft', 'status'), name='unique_communication_rollup'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
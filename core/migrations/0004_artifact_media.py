@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_change_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artifact',
+            name='duration',
+            field=models.FloatField(blank=True, help_text='Video duration in seconds', null=True),
+        ),
+        migrations.AddField(
+            model_name='artifact',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, help_text='File size in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='artifact',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='artifact',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, help_text='Pages/slides in a presentation', null=True),
+        ),
+        migrations.AddField(
+            model_name='artifact',
+            name='processing_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='artifact',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('skipped', 'Skipped'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='artifact',
+            name='thumbnail',
+            field=models.FileField(blank=True, help_text='Small preview image (thumbnail, video poster frame or first slide)', upload_to='artifacts/thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='artifact',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
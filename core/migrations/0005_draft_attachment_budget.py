@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_artifact_media'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emaildraft',
+            name='attachment_budget',
+            field=models.PositiveIntegerField(blank=True, help_text='Maximum total attachment size in MB; larger artifacts are sent as download links. Leave blank for the site default.', null=True),
+        ),
+    ]
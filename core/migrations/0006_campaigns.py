@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0005_draft_attachment_budget'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Campaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Campaign name', max_length=255)),
+                ('label', models.CharField(blank=True, help_text='Send to investors with this label; leave blank for all investors', max_length=100)),
+                ('send_after', models.DateTimeField(help_text='Start of the send window')),
+                ('send_before', models.DateTimeField(blank=True, help_text='End of the send window; recipients not reached by then are skipped', null=True)),
+                ('max_per_hour', models.PositiveIntegerField(default=100, help_text='Maximum emails sent per hour')),
+                ('burst', models.PositiveIntegerField(default=10, help_text='Maximum emails sent back to back')),
+                ('status', models.CharField(choices=[('scheduled', 'Scheduled'), ('running', 'Running'), ('paused', 'Paused'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], default='scheduled', max_length=10)),
+                ('tokens', models.FloatField(default=0)),
+                ('tokens_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='campaigns', to=settings.AUTH_USER_MODEL)),
+                ('draft', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='campaigns', to='core.emaildraft')),
+            ],
+            options={
+                'ordering': ['-send_after'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CampaignRecipient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed'), ('skipped', 'Skipped')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipients', to='core.campaign')),
+                ('communication', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='campaign_recipients', to='core.communicationlog')),
+                ('investor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='campaign_recipients', to='core.investor')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['campaign', 'status'], name='campaign_recipient_status_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='campaignrecipient',
+            constraint=models.UniqueConstraint(fields=('campaign', 'investor'), name='unique_campaign_recipient'),
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['status', 'send_after'], name='campaign_due_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_campaigns'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='communicationlog',
+            name='sent_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='responsefunding',
+            name='response_date',
+            field=models.DateTimeField(db_index=True, help_text='When response was received'),
+        ),
+    ]
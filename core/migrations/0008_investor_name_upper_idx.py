@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:56
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_admin_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='investor',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='investor_name_upper_idx'),
+        ),
+    ]
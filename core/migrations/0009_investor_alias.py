@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_investor_name_upper_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvestorAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('investor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='core.investor')),
+            ],
+            options={
+                'verbose_name_plural': 'investor aliases',
+                'ordering': ['email'],
+            },
+        ),
+    ]
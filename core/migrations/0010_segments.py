@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0009_investor_alias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Segment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Segment name', max_length=100, unique=True)),
+                ('definition', models.TextField(help_text="Filter, e.g. 'label in (VC, Seed) and amount > 10L and last_contact > 30d'")),
+                ('description', models.TextField(blank=True, help_text='What this segment is used for')),
+                ('member_count', models.PositiveIntegerField(default=0)),
+                ('change_cursor', models.BigIntegerField(default=0, help_text='Last change log entry applied to the members')),
+                ('rebuilt_at', models.DateTimeField(blank=True, help_text='When members were last evaluated in full', null=True)),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('last_updated_on', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='segments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='campaign',
+            name='label',
+            field=models.CharField(blank=True, help_text='Send to investors with this label; leave label and segment blank for all investors', max_length=100),
+        ),
+        migrations.CreateModel(
+            name='SegmentMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('added_at', models.DateTimeField(auto_now_add=True)),
+                ('investor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segment_memberships', to='core.investor')),
+                ('segment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='core.segment')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='segment',
+            field=models.ForeignKey(blank=True, help_text='Send to the members of this segment', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='campaigns', to='core.segment'),
+        ),
+        migrations.AddConstraint(
+            model_name='segmentmembership',
+            constraint=models.UniqueConstraint(fields=('segment', 'investor'), name='unique_segment_member'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_segments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowUpRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('after_days', models.PositiveIntegerField(help_text='Days without a response before following up')),
+                ('since', models.DateTimeField(blank=True, help_text='Previous cutoff; None for a full scan', null=True)),
+                ('cutoff', models.DateTimeField(help_text='Emails sent before this were considered')),
+                ('queued', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['after_days', '-cutoff'], name='follow_up_run_checkpoint_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='FollowUp',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('dismissed', 'Dismissed')], default='pending', max_length=10)),
+                ('due_date', models.DateTimeField(help_text='When the email became stale')),
+                ('error', models.TextField(blank=True)),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('communication', models.ForeignKey(help_text='The unanswered email being followed up', on_delete=django.db.models.deletion.CASCADE, related_name='follow_ups', to='core.communicationlog')),
+                ('draft', models.ForeignKey(blank=True, help_text='Draft sent as the follow-up', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='follow_ups', to='core.emaildraft')),
+                ('investor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follow_ups', to='core.investor')),
+                ('sent_communication', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.communicationlog')),
+            ],
+            options={
+                'ordering': ['due_date'],
+                'indexes': [models.Index(fields=['status', 'due_date'], name='follow_up_status_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='followup',
+            constraint=models.UniqueConstraint(fields=('communication',), name='unique_follow_up_communication'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_follow_ups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='responsefunding',
+            name='draft',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.emaildraft'),
+        ),
+        migrations.AddField(
+            model_name='responsefunding',
+            name='is_first_response',
+            field=models.BooleanField(default=False, editable=False, help_text='Earliest response to its email'),
+        ),
+        migrations.AddField(
+            model_name='responsefunding',
+            name='latency_seconds',
+            field=models.IntegerField(blank=True, editable=False, help_text='Seconds from the email being sent to this response', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='responsefunding',
+            index=models.Index(fields=['draft', 'is_first_response', 'latency_seconds'], name='response_draft_latency_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='responsefunding',
+            index=models.Index(fields=['is_first_response', 'latency_seconds'], name='response_latency_idx'),
+        ),
+    ]
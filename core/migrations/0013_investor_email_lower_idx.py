@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:45
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_response_latency'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='investor',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='investor_email_lower_idx'),
+        ),
+    ]
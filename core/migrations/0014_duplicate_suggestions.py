@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_investor_email_lower_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(help_text='Similarity between 0 and 1')),
+                ('reasons', models.CharField(blank=True, help_text='Semicolon-separated reasons', max_length=500)),
+                ('found_at', models.DateTimeField(help_text='When the scan that found the pair ran')),
+                ('first', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.investor')),
+                ('second', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.investor')),
+            ],
+            options={
+                'ordering': ['-score', 'first_id', 'second_id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='duplicatesuggestion',
+            constraint=models.UniqueConstraint(fields=('first', 'second'), name='unique_duplicate_pair'),
+        ),
+    ]
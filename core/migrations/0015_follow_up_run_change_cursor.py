@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_duplicate_suggestions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='followuprun',
+            name='change_cursor',
+            field=models.BigIntegerField(default=0, help_text='Last change log entry checked; investors changed after it are re-checked next run'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:06
+
+from django.db import migrations, models
+
+
+def number_existing_entries(apps, schema_editor):
+    """Existing entries keep their id as sequence number, so cursors handed out stay valid."""
+    from django.db.models import F, Max
+
+    ChangeLog = apps.get_model('core', 'ChangeLog')
+    ChangeSequence = apps.get_model('core', 'ChangeSequence')
+
+    ChangeLog.objects.update(sequence=F('id'))
+    ChangeSequence.objects.create(pk=1, last=ChangeLog.objects.aggregate(last=Max('id'))['last'] or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_follow_up_run_change_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='changelog',
+            name='sequence',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='Position in commit order; empty until the writing transaction commits', null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='changelog',
+            name='changed_at',
+            field=models.DateTimeField(auto_now_add=True, help_text='When the change committed, once sequenced'),
+        ),
+        migrations.RunPython(number_existing_entries, migrations.RunPython.noop),
+    ]
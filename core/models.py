@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.db.models.functions import Lower, Upper
 
 
 class Investor(models.Model):
@@ -28,6 +29,12 @@ class Investor(models.Model):
 
     class Meta:
         ordering = ['-created_date']
+        indexes = [
+            # Case-insensitive name prefix search (core.lookups)
+            models.Index(Upper('name'), name='investor_name_upper_idx'),
+            # Case-insensitive email prefix search (core.lookups)
+            models.Index(Lower('email'), name='investor_email_lower_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.email})"
@@ -39,6 +46,63 @@ class Investor(models.Model):
         return []
 
 
+class InvestorAlias(models.Model):
+    """
+    Investor Alias model.
+    Email address of an investor that was merged into another; resolves to the survivor.
+    """
+    email = models.EmailField(unique=True)
+    investor = models.ForeignKey(
+        Investor,
+        on_delete=models.CASCADE,
+        related_name='aliases'
+    )
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['email']
+        verbose_name_plural = 'investor aliases'
+
+    def __str__(self):
+        return f"{self.email} -> {self.investor_id}"
+
+
+class DuplicateSuggestion(models.Model):
+    """
+    Duplicate Suggestion model.
+    A likely duplicate investor pair found by the find_duplicates command (core.dedupe);
+    the duplicates page lists these rows instead of scanning every investor per request.
+    """
+    first = models.ForeignKey(
+        Investor,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    second = models.ForeignKey(
+        Investor,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField(help_text="Similarity between 0 and 1")
+    reasons = models.CharField(max_length=500, blank=True, help_text="Semicolon-separated reasons")
+    found_at = models.DateTimeField(help_text="When the scan that found the pair ran")
+
+    class Meta:
+        ordering = ['-score', 'first_id', 'second_id']
+        constraints = [
+            models.UniqueConstraint(fields=['first', 'second'], name='unique_duplicate_pair'),
+        ]
+
+    def __str__(self):
+        return f"{self.first_id} ~ {self.second_id} ({self.score})"
+
+    def get_reasons_list(self):
+        """Return reasons as a list."""
+        if self.reasons:
+            return [reason.strip() for reason in self.reasons.split(';')]
+        return []
+
+
 class Artifact(models.Model):
     """
     Artifact Inventory model.
@@ -50,6 +114,14 @@ class Artifact(models.Model):
         ('presentation', 'Presentation'),
     ]
 
+    PROCESSING_STATUS = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed'),
+    ]
+
     artifact_type = models.CharField(
         max_length=20, 
         choices=ARTIFACT_TYPES, 
@@ -71,6 +143,20 @@ class Artifact(models.Model):
         related_name='artifacts'
     )
 
+    # Derivatives and metadata filled in by the background media pipeline (core/media.py)
+    thumbnail = models.FileField(
+        upload_to='artifacts/thumbnails/', 
+        blank=True, 
+        help_text="Small preview image (thumbnail, video poster frame or first slide)"
+    )
+    file_size = models.BigIntegerField(null=True, blank=True, help_text="File size in bytes")
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True, help_text="Video duration in seconds")
+    page_count = models.PositiveIntegerField(null=True, blank=True, help_text="Pages/slides in a presentation")
+    processing_status = models.CharField(max_length=10, choices=PROCESSING_STATUS, default='pending')
+    processing_error = models.TextField(blank=True)
+
     class Meta:
         ordering = ['-created_date']
 
@@ -102,6 +188,12 @@ class EmailDraft(models.Model):
         related_name='email_drafts',
         help_text="Select artifacts to attach to this email"
     )
+    attachment_budget = models.PositiveIntegerField(
+        null=True, 
+        blank=True, 
+        help_text="Maximum total attachment size in MB; larger artifacts are sent as download links. "
+                  "Leave blank for the site default."
+    )
     created_date = models.DateTimeField(auto_now_add=True)
     last_updated_on = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(
@@ -139,7 +231,7 @@ class CommunicationLog(models.Model):
         null=True, 
         related_name='communications'
     )
-    sent_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(auto_now_add=True, db_index=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='success')
     sent_by = models.ForeignKey(
         User, 
@@ -190,7 +282,7 @@ class ResponseFunding(models.Model):
         help_text="Amount offered by investor (Rs.)"
     )
     notes = models.TextField(blank=True, help_text="Response notes/comments")
-    response_date = models.DateTimeField(help_text="When response was received")
+    response_date = models.DateTimeField(db_index=True, help_text="When response was received")
     created_date = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(
         User, 
@@ -198,11 +290,387 @@ class ResponseFunding(models.Model):
         null=True, 
         related_name='recorded_responses'
     )
+    # Denormalized from the communication for response-time reporting (core.latency)
+    draft = models.ForeignKey(
+        EmailDraft,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+'
+    )
+    latency_seconds = models.IntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Seconds from the email being sent to this response"
+    )
+    is_first_response = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text="Earliest response to its email"
+    )
 
     class Meta:
         ordering = ['-response_date']
         verbose_name = "Response/Funding"
         verbose_name_plural = "Responses/Funding"
+        indexes = [
+            models.Index(fields=['draft', 'is_first_response', 'latency_seconds'], name='response_draft_latency_idx'),
+            models.Index(fields=['is_first_response', 'latency_seconds'], name='response_latency_idx'),
+        ]
 
     def __str__(self):
         return f"{self.investor.name} - {self.response_status} ({self.response_date.strftime('%Y-%m-%d')})"
+
+
+class CommunicationDailyRollup(models.Model):
+    """
+    Daily Communication Rollup model.
+    Pre-aggregated email counts per day, draft and status, maintained incrementally by signals.
+    """
+    day = models.DateField(help_text="Day the emails were sent")
+    draft = models.ForeignKey(
+        EmailDraft,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='communication_rollups'
+    )
+    status = models.CharField(max_length=10, choices=CommunicationLog.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'draft', 'status'], name='unique_communication_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.draft_id or 'custom'} {self.status}: {self.count}"
+
+
+class ResponseDailyRollup(models.Model):
+    """
+    Daily Response Rollup model.
+    Pre-aggregated response counts and amounts per day, status and originating draft.
+    """
+    day = models.DateField(help_text="Day the responses were received")
+    response_status = models.CharField(max_length=10, choices=ResponseFunding.RESPONSE_STATUS)
+    draft = models.ForeignKey(
+        EmailDraft,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='response_rollups'
+    )
+    count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'response_status', 'draft'], name='unique_response_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.response_status} {self.draft_id or 'custom'}: {self.count}"
+
+
+class ChangeLog(models.Model):
+    """
+    Change Log model.
+    Append-only feed of inserts, updates and deletes on the core models, used for delta sync.
+    Entries are written inside the transaction making the change and numbered once it
+    commits (see core.changes); the sequence number, not the id, is the sync cursor.
+    """
+    ACTIONS = [
+        ('create', 'Create'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+    ]
+
+    resource = models.CharField(max_length=30, help_text="API resource name, e.g. 'investors'")
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTIONS)
+    changed_at = models.DateTimeField(auto_now_add=True, help_text="When the change committed, once sequenced")
+    sequence = models.BigIntegerField(
+        null=True,
+        blank=True,
+        unique=True,
+        editable=False,
+        help_text="Position in commit order; empty until the writing transaction commits"
+    )
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['resource', 'object_id'], name='changelog_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.sequence or '-'} {self.action} {self.resource}/{self.object_id}"
+
+
+class ChangeSequence(models.Model):
+    """
+    Change Sequence model.
+    Single row holding the last sequence number given to a change log entry. Its row lock
+    serializes numbering, so sequence numbers become visible in the order they are given.
+    """
+    last = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Change sequence at {self.last}"
+
+
+class Segment(models.Model):
+    """
+    Segment model.
+    A saved investor filter (see core.segments) whose members are materialized
+    in SegmentMembership and refreshed from the change feed.
+    """
+    name = models.CharField(max_length=100, unique=True, help_text="Segment name")
+    definition = models.TextField(
+        help_text="Filter, e.g. 'label in (VC, Seed) and amount > 10L and last_contact > 30d'"
+    )
+    description = models.TextField(blank=True, help_text="What this segment is used for")
+    member_count = models.PositiveIntegerField(default=0)
+    change_cursor = models.BigIntegerField(default=0, help_text="Last change log entry applied to the members")
+    rebuilt_at = models.DateTimeField(null=True, blank=True, help_text="When members were last evaluated in full")
+    created_date = models.DateTimeField(auto_now_add=True)
+    last_updated_on = models.DateTimeField(auto_now=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='segments'
+    )
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class SegmentMembership(models.Model):
+    """
+    Segment Membership model.
+    One row per investor currently matching a segment.
+    """
+    segment = models.ForeignKey(
+        Segment,
+        on_delete=models.CASCADE,
+        related_name='memberships'
+    )
+    investor = models.ForeignKey(
+        Investor,
+        on_delete=models.CASCADE,
+        related_name='segment_memberships'
+    )
+    added_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['segment', 'investor'], name='unique_segment_member'),
+        ]
+
+    def __str__(self):
+        return f"{self.segment_id} -> {self.investor_id}"
+
+
+class Campaign(models.Model):
+    """
+    Campaign model.
+    A scheduled send of one draft to every investor in a segment and/or with a label,
+    released by the run_campaigns command at no more than max_per_hour emails.
+    """
+    STATUS_CHOICES = [
+        ('scheduled', 'Scheduled'),
+        ('running', 'Running'),
+        ('paused', 'Paused'),
+        ('completed', 'Completed'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    name = models.CharField(max_length=255, help_text="Campaign name")
+    draft = models.ForeignKey(
+        EmailDraft, 
+        on_delete=models.PROTECT, 
+        related_name='campaigns'
+    )
+    segment = models.ForeignKey(
+        Segment,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='campaigns',
+        help_text="Send to the members of this segment"
+    )
+    label = models.CharField(
+        max_length=100, 
+        blank=True, 
+        help_text="Send to investors with this label; leave label and segment blank for all investors"
+    )
+    send_after = models.DateTimeField(help_text="Start of the send window")
+    send_before = models.DateTimeField(
+        null=True, 
+        blank=True, 
+        help_text="End of the send window; recipients not reached by then are skipped"
+    )
+    max_per_hour = models.PositiveIntegerField(default=100, help_text="Maximum emails sent per hour")
+    burst = models.PositiveIntegerField(default=10, help_text="Maximum emails sent back to back")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='scheduled')
+
+    # Token bucket state, persisted so a restarted scheduler keeps the same pace
+    tokens = models.FloatField(default=0)
+    tokens_updated_at = models.DateTimeField(null=True, blank=True)
+
+    created_date = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(
+        User, 
+        on_delete=models.SET_NULL, 
+        null=True, 
+        related_name='campaigns'
+    )
+
+    class Meta:
+        ordering = ['-send_after']
+        indexes = [
+            models.Index(fields=['status', 'send_after'], name='campaign_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class CampaignRecipient(models.Model):
+    """
+    Campaign Recipient model.
+    One row per investor in a campaign; the unique constraint and the 'sending' claim
+    guarantee nobody is emailed twice for the same campaign.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+        ('skipped', 'Skipped'),
+    ]
+
+    campaign = models.ForeignKey(
+        Campaign, 
+        on_delete=models.CASCADE, 
+        related_name='recipients'
+    )
+    investor = models.ForeignKey(
+        Investor, 
+        on_delete=models.CASCADE, 
+        related_name='campaign_recipients'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    communication = models.ForeignKey(
+        CommunicationLog, 
+        on_delete=models.SET_NULL, 
+        null=True, 
+        blank=True, 
+        related_name='campaign_recipients'
+    )
+    error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'investor'], name='unique_campaign_recipient'),
+        ]
+        indexes = [
+            models.Index(fields=['campaign', 'status'], name='campaign_recipient_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.campaign.name} -> {self.investor.email} ({self.status})"
+
+
+class FollowUp(models.Model):
+    """
+    Follow-Up model.
+    A queued reminder for an investor whose last successful email got no response,
+    created by the schedule_followups command and sent or dismissed from the follow-ups page.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('dismissed', 'Dismissed'),
+    ]
+
+    investor = models.ForeignKey(
+        Investor,
+        on_delete=models.CASCADE,
+        related_name='follow_ups'
+    )
+    communication = models.ForeignKey(
+        CommunicationLog,
+        on_delete=models.CASCADE,
+        related_name='follow_ups',
+        help_text="The unanswered email being followed up"
+    )
+    draft = models.ForeignKey(
+        EmailDraft,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='follow_ups',
+        help_text="Draft sent as the follow-up"
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    due_date = models.DateTimeField(help_text="When the email became stale")
+    sent_communication = models.ForeignKey(
+        CommunicationLog,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    error = models.TextField(blank=True)
+    created_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['due_date']
+        constraints = [
+            models.UniqueConstraint(fields=['communication'], name='unique_follow_up_communication'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'due_date'], name='follow_up_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Follow up {self.investor_id} ({self.status})"
+
+
+class FollowUpRun(models.Model):
+    """
+    Follow-Up Run model.
+    One schedule_followups pass; its cutoff is the checkpoint the next pass with the same
+    threshold starts from, so each run only scans emails that went stale since the last,
+    plus the investors whose emails, responses or follow-ups changed in between.
+    """
+    after_days = models.PositiveIntegerField(help_text="Days without a response before following up")
+    since = models.DateTimeField(null=True, blank=True, help_text="Previous cutoff; None for a full scan")
+    cutoff = models.DateTimeField(help_text="Emails sent before this were considered")
+    queued = models.PositiveIntegerField(default=0)
+    change_cursor = models.BigIntegerField(
+        default=0, help_text="Last change log entry checked; investors changed after it are re-checked next run"
+    )
+    started_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['after_days', '-cutoff'], name='follow_up_run_checkpoint_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.after_days}d run up to {self.cutoff:%Y-%m-%d %H:%M}: {self.queued} queued"
@@ -0,0 +1,162 @@
+"""
+Per-investor personalization of draft emails.
+Drafts may use placeholders such as {{ name }} or {{ amount }} in the subject and body.
+Each draft is compiled once into a list of literal and placeholder parts (cached by id and
+last_updated_on), so rendering a recipient is a join over prefetched investor values.
+Everything that does not vary per recipient (attachments, download links) is built once
+per batch by DraftMessageBuilder and reused for every message.
+"""
+import mimetypes
+import os
+import re
+import threading
+from email.mime.base import MIMEBase
+from email import encoders
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.utils.html import escape
+
+from .attachments import AttachmentPlan, links_section
+from .models import Investor
+
+
+PLACEHOLDER = re.compile(r'{{\s*(\w+)\s*}}')
+
+# Investor columns fetched per batch; placeholders are derived from these only
+INVESTOR_FIELDS = ['id', 'name', 'email', 'amount', 'labels']
+
+PLACEHOLDERS = {
+    'name': lambda row: row['name'],
+    'first_name': lambda row: row['name'].split()[0] if row['name'].strip() else '',
+    'email': lambda row: row['email'],
+    'amount': lambda row: f"{row['amount']:,.0f}",
+    'labels': lambda row: row['labels'],
+}
+
+CACHE_SIZE = 256
+
+
+def is_html(text):
+    return '<' in text and '>' in text
+
+
+def unknown_placeholders(text):
+    """Placeholder names in text that cannot be filled."""
+    return sorted({name for name in PLACEHOLDER.findall(text) if name not in PLACEHOLDERS})
+
+
+class CompiledTemplate:
+    """A template split into literal strings and placeholder getters."""
+
+    def __init__(self, text, html=False):
+        self.parts = []
+        position = 0
+        for match in PLACEHOLDER.finditer(text):
+            self.parts.append(text[position:match.start()])
+            # Unknown placeholders are kept verbatim rather than silently dropped
+            self.parts.append(PLACEHOLDERS.get(match.group(1), match.group(0)))
+            position = match.end()
+        self.parts.append(text[position:])
+        self.html = html
+        self.static = len(self.parts) == 1
+
+    def render(self, row):
+        if self.static:
+            return self.parts[0]
+        out = []
+        for part in self.parts:
+            if isinstance(part, str):
+                out.append(part)
+            else:
+                value = str(part(row))
+                out.append(escape(value) if self.html else value)
+        return ''.join(out)
+
+
+class CompiledDraft:
+    def __init__(self, draft):
+        self.html = is_html(draft.body)
+        self.subject = CompiledTemplate(draft.subject)
+        self.body = CompiledTemplate(draft.body, html=self.html)
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def compile_draft(draft):
+    """Compiled subject and body of a draft, cached until the draft is edited."""
+    key = (draft.pk, draft.last_updated_on)
+    compiled = _cache.get(key)
+    if compiled is None:
+        compiled = CompiledDraft(draft)
+        with _cache_lock:
+            if len(_cache) >= CACHE_SIZE:
+                _cache.pop(next(iter(_cache)))
+            _cache[key] = compiled
+    return compiled
+
+
+def investor_rows(investor_ids):
+    """Personalization values for a batch of investors in one query, keyed by id."""
+    return {row['id']: row for row in Investor.objects.filter(pk__in=investor_ids).values(*INVESTOR_FIELDS)}
+
+
+def investor_row(investor):
+    return {field: getattr(investor, field) for field in INVESTOR_FIELDS}
+
+
+def mime_attachment(path):
+    """A base64-encoded MIME part for a file; encoded once and attachable to many messages."""
+    mimetype, _ = mimetypes.guess_type(path)
+    maintype, subtype = (mimetype or 'application/octet-stream').split('/', 1)
+    part = MIMEBase(maintype, subtype)
+    with open(path, 'rb') as f:
+        part.set_payload(f.read())
+    encoders.encode_base64(part)
+    part.add_header('Content-Disposition', 'attachment', filename=os.path.basename(path))
+    return part
+
+
+class DraftMessageBuilder:
+    """
+    Builds personalized EmailMessages for one draft.
+
+    Create one per batch/campaign: attachments are read and encoded and download links
+    signed once in the constructor, then shared by every message.
+    """
+
+    def __init__(self, draft):
+        self.draft = draft
+        self.compiled = compile_draft(draft)
+        self.plan = AttachmentPlan(draft)
+        self.links = links_section(self.plan.linked, html=self.compiled.html)
+
+        self.attachments = []
+        self.warnings = []
+        for artifact, _ in self.plan.attached:
+            try:
+                self.attachments.append(mime_attachment(artifact.file.path))
+            except Exception as e:
+                self.warnings.append(f'Could not attach file {artifact.file.name}: {e}')
+
+    def body(self, row):
+        body = self.compiled.body.render(row)
+        if self.compiled.html and '</body>' in body:
+            return body.replace('</body>', self.links + '</body>', 1)
+        return body + self.links
+
+    def message(self, row, connection=None):
+        email = EmailMessage(
+            subject=self.compiled.subject.render(row),
+            body=self.body(row),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[row['email']],
+            connection=connection,
+        )
+        if self.compiled.html:
+            email.content_subtype = 'html'
+        for part in self.attachments:
+            email.attach(part)
+        return email
@@ -0,0 +1,179 @@
+"""
+Daily rollup maintenance for communication and response analytics.
+Keeps CommunicationDailyRollup and ResponseDailyRollup in step with the raw
+CommunicationLog / ResponseFunding rows, either incrementally or by rebuilding a day range.
+"""
+import threading
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import CommunicationLog, ResponseFunding, CommunicationDailyRollup, ResponseDailyRollup
+
+
+_state = threading.local()
+
+
+@contextmanager
+def suspended():
+    """
+    Skip incremental rollup maintenance inside the block.
+
+    For bulk jobs that touch many rows; the caller must rebuild() the affected days afterwards.
+    The change feed and analytics cache signal handlers are skipped as well, so the caller
+    also records its changes and invalidates the cache itself.
+    """
+    previous = getattr(_state, 'suspended', False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def is_suspended():
+    return getattr(_state, 'suspended', False)
+
+
+def to_day(value):
+    """Return the local calendar day of a datetime, matching TruncDate in queries."""
+    if timezone.is_aware(value):
+        return timezone.localdate(value)
+    return value.date()
+
+
+def day_start(day):
+    """Return the aware datetime at which a local calendar day begins."""
+    value = datetime.combine(day, time.min)
+    return timezone.make_aware(value) if settings.USE_TZ else value
+
+
+def _bump(model, key, **deltas):
+    """Add deltas to the rollup row for key, creating it if needed."""
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**key).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Created concurrently between the update and the insert
+        model.objects.filter(**key).update(**updates)
+
+
+def bump_communication(day, draft_id, status, delta):
+    _bump(CommunicationDailyRollup, {'day': day, 'draft_id': draft_id, 'status': status}, count=delta)
+
+
+def bump_response(day, draft_id, status, amount, delta):
+    _bump(
+        ResponseDailyRollup,
+        {'day': day, 'draft_id': draft_id, 'response_status': status},
+        count=delta,
+        total_amount=amount * delta,
+    )
+
+
+def adjust(communications=None, responses=None, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) raw rows from the rollups, one grouped query per table.
+
+    For set-based changes: call with -1 before rows are updated or deleted and with 1
+    after an update, so only the rollup rows the change touches are written.
+    """
+    days = set()
+    if communications is not None:
+        rows = communications.annotate(day=TruncDate('sent_at')).order_by().values(
+            'day', 'draft_id', 'status'
+        ).annotate(n=Count('id'))
+        for row in rows:
+            bump_communication(row['day'], row['draft_id'], row['status'], sign * row['n'])
+            days.add(row['day'])
+    if responses is not None:
+        rows = responses.annotate(day=TruncDate('response_date')).order_by().values(
+            'day', 'communication__draft_id', 'response_status'
+        ).annotate(n=Count('id'), amount=Sum('amount_offered'))
+        for row in rows:
+            _bump(
+                ResponseDailyRollup,
+                {'day': row['day'], 'draft_id': row['communication__draft_id'], 'response_status': row['response_status']},
+                count=sign * row['n'],
+                total_amount=sign * (row['amount'] or 0),
+            )
+            days.add(row['day'])
+    if sign < 0 and days:
+        # rebuild() never leaves empty rows; neither do decrements
+        CommunicationDailyRollup.objects.filter(day__in=days, count=0).delete()
+        ResponseDailyRollup.objects.filter(day__in=days, count=0).delete()
+
+
+def fold_draft(draft_id):
+    """
+    Move a draft's rollup rows onto the 'custom email' (NULL draft) rows.
+
+    Called before a draft is deleted, mirroring the SET_NULL on CommunicationLog.draft.
+    """
+    for row in CommunicationDailyRollup.objects.filter(draft_id=draft_id):
+        bump_communication(row.day, None, row.status, row.count)
+    for row in ResponseDailyRollup.objects.filter(draft_id=draft_id):
+        _bump(
+            ResponseDailyRollup,
+            {'day': row.day, 'draft_id': None, 'response_status': row.response_status},
+            count=row.count,
+            total_amount=row.total_amount,
+        )
+    CommunicationDailyRollup.objects.filter(draft_id=draft_id).delete()
+    ResponseDailyRollup.objects.filter(draft_id=draft_id).delete()
+
+
+@transaction.atomic
+def rebuild(start=None, end=None):
+    """
+    Recompute rollups from the raw tables for days in [start, end].
+
+    Either bound may be None for an open range. Returns (communication_rows, response_rows).
+    """
+    comm_rollups = CommunicationDailyRollup.objects.all()
+    resp_rollups = ResponseDailyRollup.objects.all()
+    communications = CommunicationLog.objects.annotate(day=TruncDate('sent_at'))
+    responses = ResponseFunding.objects.annotate(day=TruncDate('response_date'))
+
+    # Raw rows are filtered on the timestamp columns so the range can use their indexes
+    if start:
+        comm_rollups = comm_rollups.filter(day__gte=start)
+        resp_rollups = resp_rollups.filter(day__gte=start)
+        communications = communications.filter(sent_at__gte=day_start(start))
+        responses = responses.filter(response_date__gte=day_start(start))
+    if end:
+        comm_rollups = comm_rollups.filter(day__lte=end)
+        resp_rollups = resp_rollups.filter(day__lte=end)
+        communications = communications.filter(sent_at__lt=day_start(end + timedelta(days=1)))
+        responses = responses.filter(response_date__lt=day_start(end + timedelta(days=1)))
+
+    comm_rollups.delete()
+    resp_rollups.delete()
+
+    comm_rows = [
+        CommunicationDailyRollup(day=row['day'], draft_id=row['draft_id'], status=row['status'], count=row['n'])
+        for row in communications.order_by().values('day', 'draft_id', 'status').annotate(n=Count('id'))
+    ]
+    resp_rows = [
+        ResponseDailyRollup(
+            day=row['day'],
+            draft_id=row['communication__draft_id'],
+            response_status=row['response_status'],
+            count=row['n'],
+            total_amount=row['amount'] or 0,
+        )
+        for row in responses.order_by().values('day', 'communication__draft_id', 'response_status').annotate(
+            n=Count('id'), amount=Sum('amount_offered')
+        )
+    ]
+    CommunicationDailyRollup.objects.bulk_create(comm_rows, batch_size=1000)
+    ResponseDailyRollup.objects.bulk_create(resp_rows, batch_size=1000)
+    return len(comm_rows), len(resp_rows)
@@ -0,0 +1,362 @@
+"""
+Saved investor segments.
+A segment is a small filter expression over investors and their activity, e.g.
+
+    label in (VC, Seed) and amount > 10L and last_contact > 30d and response != failure
+
+compiled to a single query over Investor with EXISTS subqueries on CommunicationLog and
+ResponseFunding. Members are materialized in SegmentMembership and kept current from the
+change feed: a refresh re-evaluates only the investors touched since the segment's cursor.
+Segments relative to today ('last_contact > 30d') are re-evaluated in full once their
+membership is older than SEGMENT_MAX_AGE, since time passing changes them without a write.
+
+Refreshes run from `python manage.py refresh_segments` (cron), when a definition is saved
+and before a campaign materializes its recipients. Pages and the chatbot apply up to
+REBUILD_THRESHOLD pending changes themselves before reading the materialized members; a
+segment that needs a full rebuild is evaluated live until the next refresh builds it.
+"""
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .bulk import label_pattern
+from .changes import head, oldest_cursor, sequenced, touched_investors
+from .models import Investor, CommunicationLog, ResponseFunding, Segment, SegmentMembership
+
+
+# Seconds a time-relative segment's membership is trusted before a full re-evaluation
+MAX_AGE = 3600
+
+# More pending changes than this are cheaper to apply with a full re-evaluation
+REBUILD_THRESHOLD = 5000
+
+BATCH_SIZE = 1000
+
+Condition = namedtuple('Condition', 'field op value')
+Compiled = namedtuple('Compiled', 'q relative sources')
+
+
+class SegmentError(ValueError):
+    """A segment definition that cannot be parsed."""
+
+
+# ==================== Parsing ====================
+
+# 'and' inside parentheses belongs to a value list, e.g. label in (Research and Development)
+AND = re.compile(r'\s+and\s+(?![^()]*\))', re.IGNORECASE)
+CLAUSE = re.compile(r'^([a-z_]+)\s*(not\s+in\b|in\b|>=|<=|!=|=|>|<|~)\s*(.+)$', re.IGNORECASE)
+DAYS = re.compile(r'^(\d+)\s*(?:d|days?)?$', re.IGNORECASE)
+AMOUNT = re.compile(r'^(\d+(?:\.\d+)?)\s*(k|l|lakh|lakhs|cr|crore|crores)?$', re.IGNORECASE)
+
+AMOUNT_UNITS = {'k': 1000, 'l': 100000, 'lakh': 100000, 'lakhs': 100000, 'cr': 10 ** 7, 'crore': 10 ** 7, 'crores': 10 ** 7}
+AMOUNT_LOOKUPS = {'>': 'gt', '>=': 'gte', '<': 'lt', '<=': 'lte', '=': 'exact', '!=': 'exact'}
+
+RESPONSE_VALUES = [status for status, _ in ResponseFunding.RESPONSE_STATUS] + ['none']
+
+FIELD_OPS = {
+    'label': ('in', 'not in', '=', '!='),
+    'name': ('~', '=', '!='),
+    'email': ('~', '=', '!='),
+    'amount': ('>', '>=', '<', '<=', '=', '!='),
+    'last_contact': ('>', '<', '=', '!='),
+    'response': ('=', '!='),
+}
+
+HELP = (
+    "Conditions joined with 'and': label in (VC, Seed) · label != Angel · name ~ capital · "
+    "email ~ @sequoia.com · amount > 10L (k, L and cr units) · last_contact > 30d (no email in "
+    "30 days) · last_contact < 7d · last_contact = never · response = success · "
+    "response != failure · response = none"
+)
+
+
+def _parse_amount(text):
+    match = AMOUNT.match(text.replace(',', '').replace('_', ''))
+    if not match:
+        raise SegmentError(f"'{text}' is not an amount, e.g. 500000, 5L or 2cr.")
+    try:
+        value = Decimal(match.group(1))
+    except InvalidOperation:
+        raise SegmentError(f"'{text}' is not an amount, e.g. 500000, 5L or 2cr.")
+    return value * AMOUNT_UNITS.get((match.group(2) or '').lower(), 1)
+
+
+def _parse_value(field, op, text):
+    if field == 'label':
+        labels = [label.strip() for label in text.strip('()').split(',') if label.strip()]
+        if not labels:
+            raise SegmentError('A label condition needs at least one label.')
+        return labels
+    if field == 'amount':
+        return _parse_amount(text)
+    if field == 'last_contact':
+        if text.lower() == 'never':
+            if op not in ('=', '!='):
+                raise SegmentError("Use 'last_contact = never' or 'last_contact != never'.")
+            return None
+        match = DAYS.match(text)
+        if not match or op not in ('>', '<'):
+            raise SegmentError("Use 'last_contact > 30d', 'last_contact < 7d' or 'last_contact = never'.")
+        return int(match.group(1))
+    if field == 'response':
+        value = text.lower()
+        if value not in RESPONSE_VALUES:
+            raise SegmentError(f"Response must be one of: {', '.join(RESPONSE_VALUES)}.")
+        return value
+    return text
+
+
+def parse(definition):
+    """
+    Split a definition into conditions.
+
+    Returns:
+        list: Condition(field, op, value) tuples
+
+    Raises:
+        SegmentError: with a message suitable for showing to the user
+    """
+    conditions = []
+    for clause in AND.split((definition or '').strip()):
+        clause = clause.strip()
+        if not clause:
+            continue
+        match = CLAUSE.match(clause)
+        if not match:
+            raise SegmentError(f"Cannot read '{clause}'; expected <field> <operator> <value>.")
+        field, op, text = match.group(1).lower(), ' '.join(match.group(2).lower().split()), match.group(3).strip()
+        if field not in FIELD_OPS:
+            raise SegmentError(f"Unknown field '{field}'. Fields: {', '.join(FIELD_OPS)}.")
+        if op not in FIELD_OPS[field]:
+            raise SegmentError(f"'{op}' cannot be used with {field}; use one of: {', '.join(FIELD_OPS[field])}.")
+        conditions.append(Condition(field, op, _parse_value(field, op, text)))
+    if not conditions:
+        raise SegmentError('A segment needs at least one condition.')
+    return conditions
+
+
+# ==================== Compiling ====================
+
+def _condition_q(condition, now):
+    field, op, value = condition
+    negate = op in ('not in', '!=')
+
+    if field == 'label':
+        q = Q()
+        for label in value:
+            q |= Q(labels__iregex=label_pattern(label))
+    elif field in ('name', 'email'):
+        q = Q(**{f'{field}__icontains' if op == '~' else f'{field}__iexact': value})
+    elif field == 'amount':
+        q = Q(**{f'amount__{AMOUNT_LOOKUPS[op]}': value})
+    elif field == 'last_contact':
+        emails = CommunicationLog.objects.filter(investor=OuterRef('pk'), status='success')
+        if value is None:
+            # '= never': no email at all; '!= never': at least one
+            q, negate = Exists(emails), op == '='
+        else:
+            q, negate = Exists(emails.filter(sent_at__gte=now - timedelta(days=value))), op == '>'
+    else:
+        responses = ResponseFunding.objects.filter(investor=OuterRef('pk'))
+        if value == 'none':
+            q, negate = Exists(responses), op == '='
+        else:
+            q = Exists(responses.filter(response_status=value))
+    return ~q if negate else q
+
+
+def compile_definition(definition, now=None):
+    """
+    Compile a definition to one filter.
+
+    Returns:
+        Compiled: (q for Investor, whether it depends on the current time,
+        change feed resources that can change membership)
+    """
+    now = now or timezone.now()
+    conditions = parse(definition)
+    q = Q()
+    sources = {'investors'}
+    for condition in conditions:
+        q &= _condition_q(condition, now)
+        if condition.field == 'last_contact':
+            sources.add('communications')
+        elif condition.field == 'response':
+            sources.add('responses')
+    relative = any(c.field == 'last_contact' and c.value is not None for c in conditions)
+    return Compiled(q, relative, sources)
+
+
+def matching(definition, now=None):
+    """Investors matching a definition, evaluated live."""
+    return Investor.objects.filter(compile_definition(definition, now).q)
+
+
+# ==================== Materialized Membership ====================
+
+def max_age():
+    return timedelta(seconds=getattr(settings, 'SEGMENT_MAX_AGE', MAX_AGE))
+
+
+def _batches(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def _apply(segment, compiled, investor_ids=None):
+    """Make memberships match the query, for all investors or only `investor_ids`."""
+    matched = Investor.objects.filter(compiled.q)
+    current = SegmentMembership.objects.filter(segment=segment)
+    if investor_ids is not None:
+        matched = matched.filter(pk__in=investor_ids)
+        current = current.filter(investor_id__in=investor_ids)
+    matched = set(matched.values_list('pk', flat=True))
+    current = set(current.values_list('investor_id', flat=True))
+
+    for batch in _batches(current - matched):
+        SegmentMembership.objects.filter(segment=segment, investor_id__in=batch).delete()
+    for batch in _batches(matched - current):
+        SegmentMembership.objects.bulk_create(
+            [SegmentMembership(segment=segment, investor_id=pk) for pk in batch], ignore_conflicts=True,
+        )
+    return matched != current
+
+
+def _save_state(segment, cursor, now, rebuilt, changed):
+    segment.change_cursor = cursor
+    if not (rebuilt or changed):
+        # Only the cursor moved: no save signal, so no change log entry invalidating pages
+        Segment.objects.filter(pk=segment.pk).update(change_cursor=cursor)
+        return
+    segment.member_count = segment.memberships.count()
+    fields = ['change_cursor', 'member_count', 'last_updated_on']
+    if rebuilt:
+        segment.rebuilt_at = now
+        fields.append('rebuilt_at')
+    segment.save(update_fields=fields)
+
+
+def _needs_rebuild(segment, compiled, now):
+    return (
+        segment.rebuilt_at is None
+        or (compiled.relative and now - segment.rebuilt_at > max_age())
+        # Entries the segment had not applied yet were pruned
+        or segment.change_cursor < oldest_cursor()
+    )
+
+
+@transaction.atomic
+def rebuild(segment, now=None):
+    """Re-evaluate a segment over all investors."""
+    now = now or timezone.now()
+    segment = Segment.objects.select_for_update().get(pk=segment.pk)
+    # Taken before the query: later changes are replayed by the next refresh
+    cursor = head()
+    changed = _apply(segment, compile_definition(segment.definition, now))
+    _save_state(segment, cursor, now, rebuilt=True, changed=changed)
+    return segment
+
+
+def _catch_up(segment, compiled, now):
+    """
+    Apply the changes made since the segment's cursor to the investors they touched.
+
+    Returns:
+        bool: False when that is not possible (more than REBUILD_THRESHOLD changes, or a
+        deleted communication or response) and the segment needs a rebuild
+    """
+    entries = list(
+        sequenced().filter(sequence__gt=segment.change_cursor, resource__in=compiled.sources)
+        .order_by('sequence')
+        .values_list('sequence', 'resource', 'object_id', 'action')[:REBUILD_THRESHOLD + 1]
+    )
+    if not entries:
+        return True
+    if len(entries) > REBUILD_THRESHOLD:
+        return False
+
+    touched = touched_investors([entry[1:] for entry in entries], compiled.sources)
+    if touched is None:
+        return False
+    changed = bool(touched) and _apply(segment, compiled, touched)
+    _save_state(segment, entries[-1][0], now, rebuilt=False, changed=changed)
+    return True
+
+
+@transaction.atomic
+def refresh(segment, now=None):
+    """
+    Bring a segment's membership up to date with the change feed.
+
+    Only investors touched since the segment's cursor are re-evaluated; a full rebuild
+    runs instead when the segment was never built, is time-relative and older than
+    SEGMENT_MAX_AGE, has more than REBUILD_THRESHOLD pending changes, or saw a
+    communication or response deleted.
+
+    Returns:
+        Segment: the refreshed segment
+    """
+    now = now or timezone.now()
+    segment = Segment.objects.select_for_update().get(pk=segment.pk)
+    compiled = compile_definition(segment.definition, now)
+    if _needs_rebuild(segment, compiled, now) or not _catch_up(segment, compiled, now):
+        return rebuild(segment, now)
+    return segment
+
+
+def is_fresh(segment, compiled=None, now=None):
+    """Whether the materialized members are current: built, not expired, no changes pending."""
+    now = now or timezone.now()
+    compiled = compiled or compile_definition(segment.definition, now)
+    if _needs_rebuild(segment, compiled, now):
+        return False
+    return not sequenced().filter(sequence__gt=segment.change_cursor, resource__in=compiled.sources).exists()
+
+
+def members(segment, now=None):
+    """
+    The segment's investors. Pending changes are applied first when the materialized
+    members can be caught up incrementally; a segment that needs a full rebuild is
+    evaluated live instead, leaving the rebuild to refresh().
+    """
+    now = now or timezone.now()
+    compiled = compile_definition(segment.definition, now)
+    if not _needs_rebuild(segment, compiled, now):
+        with transaction.atomic():
+            current = Segment.objects.select_for_update().get(pk=segment.pk)
+            if not _needs_rebuild(current, compiled, now) and _catch_up(current, compiled, now):
+                segment.change_cursor, segment.member_count = current.change_cursor, current.member_count
+                return Investor.objects.filter(segment_memberships__segment=segment)
+    return Investor.objects.filter(compiled.q)
+
+
+def window_start(segment_id, now=None):
+    """
+    Start of the current SEGMENT_MAX_AGE window for a time-relative segment, the latest
+    time its members can have changed without a write; None for other segments.
+    Pages filtered by the segment include it in their validators (core.conditional).
+    """
+    segment = Segment.objects.filter(pk=segment_id).only('definition').first()
+    if segment is None:
+        return None
+    try:
+        relative = compile_definition(segment.definition, now).relative
+    except SegmentError:
+        return None
+    if not relative:
+        return None
+    seconds = max_age().total_seconds()
+    stamp = (now or timezone.now()).timestamp()
+    return datetime.fromtimestamp(stamp - stamp % seconds, tz=dt_timezone.utc)
+
+
+def find(name):
+    """Segment by case-insensitive name, or None."""
+    return Segment.objects.filter(name__iexact=name.strip()).first()
@@ -0,0 +1,244 @@
+"""
+Signal handlers for the core app.
+Connected in CoreConfig.ready().
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from . import analytics, auth, changes, latency, media, rollups
+from .models import Investor, Artifact, EmailDraft, CommunicationLog, ResponseFunding
+
+
+# ==================== Rollup Maintenance ====================
+
+def _communication_key(comm):
+    return rollups.to_day(comm.sent_at), comm.draft_id, comm.status
+
+
+def _response_key(response, draft_id):
+    return rollups.to_day(response.response_date), draft_id, response.response_status, response.amount_offered
+
+
+def _communication_draft_id(communication_id):
+    return CommunicationLog.objects.filter(pk=communication_id).values_list('draft_id', flat=True).first()
+
+
+@receiver(pre_save, sender=CommunicationLog)
+def remember_communication_rollup(sender, instance, raw=False, **kwargs):
+    instance._rollup_key = None
+    if raw or rollups.is_suspended() or instance._state.adding or instance.pk is None:
+        return
+    old = sender.objects.filter(pk=instance.pk).first()
+    if old:
+        instance._rollup_key = _communication_key(old)
+
+
+@receiver(post_save, sender=CommunicationLog)
+def update_communication_rollup(sender, instance, created, raw=False, **kwargs):
+    if raw or rollups.is_suspended():
+        return
+    old_key = getattr(instance, '_rollup_key', None)
+    new_key = _communication_key(instance)
+    if old_key == new_key:
+        return
+    if old_key:
+        rollups.bump_communication(*old_key, -1)
+    rollups.bump_communication(*new_key, 1)
+
+
+@receiver(post_delete, sender=CommunicationLog)
+def remove_communication_rollup(sender, instance, **kwargs):
+    if rollups.is_suspended():
+        return
+    rollups.bump_communication(*_communication_key(instance), -1)
+
+
+@receiver(pre_save, sender=ResponseFunding)
+def remember_response_rollup(sender, instance, raw=False, **kwargs):
+    instance._rollup_key = None
+    if raw or rollups.is_suspended() or instance._state.adding or instance.pk is None:
+        return
+    old = sender.objects.filter(pk=instance.pk).select_related('communication').first()
+    if old:
+        instance._rollup_key = _response_key(old, old.communication.draft_id)
+
+
+@receiver(post_save, sender=ResponseFunding)
+def update_response_rollup(sender, instance, created, raw=False, **kwargs):
+    if raw or rollups.is_suspended():
+        return
+    old_key = getattr(instance, '_rollup_key', None)
+    new_key = _response_key(instance, _communication_draft_id(instance.communication_id))
+    if old_key == new_key:
+        return
+    if old_key:
+        rollups.bump_response(*old_key, -1)
+    rollups.bump_response(*new_key, 1)
+
+
+@receiver(pre_delete, sender=ResponseFunding)
+def remember_deleted_response_draft(sender, instance, **kwargs):
+    if rollups.is_suspended():
+        return
+    # The parent communication may be deleted in the same cascade
+    instance._rollup_draft_id = _communication_draft_id(instance.communication_id)
+
+
+@receiver(post_delete, sender=ResponseFunding)
+def remove_response_rollup(sender, instance, **kwargs):
+    if rollups.is_suspended():
+        return
+    draft_id = getattr(instance, '_rollup_draft_id', None)
+    rollups.bump_response(*_response_key(instance, draft_id), -1)
+
+
+@receiver(pre_delete, sender=EmailDraft)
+def fold_draft_rollups(sender, instance, **kwargs):
+    if rollups.is_suspended():
+        return
+    rollups.fold_draft(instance.pk)
+
+
+# ==================== Response Latency ====================
+
+@receiver(pre_save, sender=ResponseFunding)
+def set_response_latency(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._previous_communication_id = None
+    if not instance._state.adding and instance.pk is not None:
+        instance._previous_communication_id = (
+            sender.objects.filter(pk=instance.pk).values_list('communication_id', flat=True).first()
+        )
+    latency.set_fields(instance)
+
+
+@receiver(post_save, sender=ResponseFunding)
+def update_first_responses(sender, instance, created, raw=False, **kwargs):
+    if raw or rollups.is_suspended():
+        return
+    communication_ids = {instance.communication_id, getattr(instance, '_previous_communication_id', None)}
+    latency.mark_first_responses(communication_ids - {None})
+
+
+@receiver(post_delete, sender=ResponseFunding)
+def promote_next_response(sender, instance, **kwargs):
+    # Removing a later response leaves the first one in place
+    if rollups.is_suspended() or not instance.is_first_response:
+        return
+    latency.mark_first_responses([instance.communication_id])
+
+
+@receiver(post_save, sender=CommunicationLog)
+def refresh_response_latency(sender, instance, created, raw=False, **kwargs):
+    # A new email has no responses yet
+    if raw or created or rollups.is_suspended():
+        return
+    latency.refresh([instance.pk])
+
+
+# ==================== Analytics Cache ====================
+
+def invalidate_analytics(sender, **kwargs):
+    if rollups.is_suspended():
+        return
+    analytics.invalidate_cache()
+
+
+for model in (Investor, EmailDraft, CommunicationLog, ResponseFunding):
+    post_save.connect(invalidate_analytics, sender=model, dispatch_uid=f'invalidate_analytics_{model.__name__}_save')
+    post_delete.connect(invalidate_analytics, sender=model, dispatch_uid=f'invalidate_analytics_{model.__name__}_delete')
+
+
+# ==================== Change Feed ====================
+
+# Bulk jobs running with rollups suspended record their changes themselves
+
+def record_save(sender, instance, created, raw=False, **kwargs):
+    if raw or rollups.is_suspended():
+        return
+    changes.record(sender, instance.pk, 'create' if created else 'update')
+
+
+def record_delete(sender, instance, **kwargs):
+    if rollups.is_suspended():
+        return
+    changes.record(sender, instance.pk, 'delete')
+
+
+for model in changes.RESOURCE_NAMES:
+    post_save.connect(record_save, sender=model, dispatch_uid=f'record_change_{model.__name__}_save')
+    post_delete.connect(record_delete, sender=model, dispatch_uid=f'record_change_{model.__name__}_delete')
+
+
+@receiver(m2m_changed, sender=EmailDraft.artifacts.through)
+def record_draft_artifacts(sender, instance, action, reverse, pk_set, **kwargs):
+    if rollups.is_suspended() or action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # artifact.email_drafts changed; pk_set holds drafts (None on clear)
+        changes.record_many(EmailDraft, pk_set or instance.email_drafts.values_list('pk', flat=True), 'update')
+    else:
+        changes.record(EmailDraft, instance.pk, 'update')
+
+
+@receiver(pre_delete, sender=EmailDraft)
+def record_unlinked_communications(sender, instance, **kwargs):
+    if rollups.is_suspended():
+        return
+    # CommunicationLog.draft is SET_NULL in bulk, which sends no save signals
+    changes.record_many(CommunicationLog, instance.communications.values_list('pk', flat=True), 'update')
+
+
+@receiver(pre_delete, sender=Artifact)
+def record_unlinked_drafts(sender, instance, **kwargs):
+    if rollups.is_suspended():
+        return
+    # The draft/artifact links are removed without m2m_changed signals
+    changes.record_many(EmailDraft, instance.email_drafts.values_list('pk', flat=True), 'update')
+
+
+# ==================== Artifact Media ====================
+
+MEDIA_FIELDS = {
+    'thumbnail': '', 'file_size': None, 'width': None, 'height': None,
+    'duration': None, 'page_count': None, 'processing_status': 'pending', 'processing_error': '',
+}
+
+
+@receiver(pre_save, sender=Artifact)
+def reset_artifact_media(sender, instance, raw=False, **kwargs):
+    instance._media_changed = False
+    if raw:
+        return
+    if not instance._state.adding:
+        old = sender.objects.filter(pk=instance.pk).values('file', 'artifact_type', *MEDIA_FIELDS).first()
+        if old and old['file'] == instance.file.name and old['artifact_type'] == instance.artifact_type:
+            # Same upload: keep whatever the pipeline has written since this instance was loaded
+            for field in MEDIA_FIELDS:
+                setattr(instance, field, old[field])
+            return
+        if old and old['thumbnail']:
+            storage = instance.thumbnail.storage
+            transaction.on_commit(lambda: storage.delete(old['thumbnail']))
+    # New upload: previous derivatives no longer apply
+    for field, empty in MEDIA_FIELDS.items():
+        setattr(instance, field, empty)
+    instance._media_changed = True
+
+
+@receiver(post_save, sender=Artifact)
+def queue_artifact_media(sender, instance, raw=False, **kwargs):
+    if raw or not getattr(instance, '_media_changed', False):
+        return
+    transaction.on_commit(lambda: media.enqueue(instance.pk))
+
+
+# ==================== User Cache ====================
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    auth.invalidate_user(instance.pk)
@@ -0,0 +1,152 @@
+"""
+In-process SMTP sink for benchmarks and local testing.
+Speaks just enough SMTP for Django's smtp backend (no TLS, no AUTH), discards or keeps
+the messages it receives, and can add per-message latency and reject a fraction of
+messages with a transient error to imitate a throttling provider.
+
+    with SMTPSink(latency=0.05, failure_rate=0.1) as sink:
+        with override_settings(**sink.email_settings()):
+            ...send mail...
+        print(sink.messages, sink.bytes_received)
+"""
+import random
+import socketserver
+import threading
+import time
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        sink = self.server.sink
+        self.reply('220 localhost SMTP sink ready')
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+
+            if verb == 'EHLO':
+                self.wfile.write(b'250-localhost\r\n250-8BITMIME\r\n250 SMTPUTF8\r\n')
+            elif verb == 'HELO':
+                self.reply('250 localhost')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command.split(':', 1)[-1].strip())
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = self.read_data()
+                if data is None:
+                    return
+                self.reply(sink.accept(data, recipients))
+                recipients = []
+            elif verb in ('RSET', 'NOOP'):
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+    def read_data(self):
+        chunks = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return None
+            if line in (b'.\r\n', b'.\n'):
+                return b''.join(chunks)
+            chunks.append(line[1:] if line.startswith(b'..') else line)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """
+    Threaded local SMTP server.
+
+    Args:
+        host, port: bind address; port 0 picks a free port
+        latency: seconds to wait before answering each message
+        failure_rate: fraction of messages rejected with '451 Try again later'
+        keep_messages: store raw message bytes in `received`
+        seed: random seed for failure injection
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, failure_rate=0.0, keep_messages=False, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.keep_messages = keep_messages
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.server = _Server((host, port), _Handler)
+        self.server.sink = self
+        self.thread = None
+        self.reset()
+
+    @property
+    def host(self):
+        return self.server.server_address[0]
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def reset(self):
+        with self.lock:
+            self.messages = 0
+            self.rejected = 0
+            self.bytes_received = 0
+            self.received = []
+
+    def accept(self, data, recipients):
+        """Record one message; returns the SMTP reply line."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            if self.failure_rate and self.random.random() < self.failure_rate:
+                self.rejected += 1
+                return '451 Try again later'
+            self.messages += 1
+            self.bytes_received += len(data)
+            if self.keep_messages:
+                self.received.append((recipients, data))
+        return '250 OK: queued'
+
+    def email_settings(self):
+        """Settings overrides that point Django's smtp backend at this sink."""
+        return {
+            'EMAIL_BACKEND': 'django.core.mail.backends.smtp.EmailBackend',
+            'EMAIL_HOST': self.host,
+            'EMAIL_PORT': self.port,
+            'EMAIL_USE_SSL': False,
+            'EMAIL_USE_TLS': False,
+            'EMAIL_HOST_USER': '',
+            'EMAIL_HOST_PASSWORD': '',
+        }
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='smtp-sink', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,194 @@
+"""
+Static file build for production (`manage.py collectstatic`).
+Files are stored under content-hashed names with a manifest, the app's own CSS and
+JavaScript are minified, and gzip and brotli variants are written next to every
+compressible file so core.middleware.StaticAssetMiddleware can serve them as-is.
+"""
+import gzip
+import logging
+import os
+import re
+from fnmatch import fnmatch
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import ImproperlyConfigured
+
+
+logger = logging.getLogger(__name__)
+
+# Files (relative to STATIC_ROOT) that are minified during collectstatic
+MINIFY_PATTERNS = ['css/*.css', 'js/*.js']
+
+COMPRESSIBLE = ('.css', '.js', '.json', '.map', '.svg', '.txt', '.xml', '.html', '.ttf', '.otf', '.eot')
+
+# Smaller files gain nothing from compression
+MIN_COMPRESS_SIZE = 256
+
+
+@lru_cache(maxsize=None)
+def load_brotli():
+    """
+    Import brotli on first use.
+
+    Returns:
+        module or None: the brotli module, or None if it is not installed
+    """
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+@lru_cache(maxsize=None)
+def load_minifiers():
+    """
+    rcssmin/rjsmin when installed.
+
+    Returns:
+        tuple: (cssmin, jsmin) callables, None for each package that is missing
+    """
+    try:
+        from rcssmin import cssmin
+    except ImportError:
+        cssmin = None
+    try:
+        from rjsmin import jsmin
+    except ImportError:
+        jsmin = None
+    return cssmin, jsmin
+
+
+STRING = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''')
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+CSS_SPACE_AROUND = re.compile(r'\s*([{};,>])\s*')
+CSS_SPACE_AFTER_COLON = re.compile(r':\s+')
+
+
+def minify_css(text):
+    """Strip comments and whitespace from a stylesheet, leaving string literals untouched."""
+    cssmin, _ = load_minifiers()
+    if cssmin:
+        return cssmin(text)
+    text = CSS_COMMENT.sub('', text)
+    parts = STRING.split(text)
+    for index in range(0, len(parts), 2):
+        part = ' '.join(parts[index].split())
+        part = CSS_SPACE_AROUND.sub(r'\1', part)
+        parts[index] = CSS_SPACE_AFTER_COLON.sub(':', part).replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def minify_js(text):
+    """
+    Remove comment lines, indentation and blank lines from a script.
+    Line breaks are kept so automatic semicolon insertion behaves as in the source;
+    rjsmin, when installed, does a full minification instead.
+    """
+    _, jsmin = load_minifiers()
+    if jsmin:
+        return jsmin(text)
+    text = re.sub(r'^\s*/\*.*?\*/', '', text, flags=re.DOTALL | re.MULTILINE)
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//')) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def compressed_variants(data):
+    """{suffix: bytes} for the encodings that make `data` meaningfully smaller."""
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    brotli = load_brotli()
+    if brotli:
+        variants['.br'] = brotli.compress(data, quality=11)
+    return {suffix: body for suffix, body in variants.items() if len(body) < len(data) * 0.95}
+
+
+@lru_cache(maxsize=None)
+def warn_missing_manifest(path):
+    logger.warning(
+        'No static files manifest at %s: serving unhashed names without long-lived caching. '
+        'Run `manage.py collectstatic`.', path,
+    )
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage that also minifies and pre-compresses the collected files."""
+
+    def stored_name(self, name):
+        # Before the first collectstatic (development, tests) there is no manifest to consult;
+        # a name missing from an existing manifest still raises ValueError (manifest_strict)
+        if not self.hashed_files:
+            if not settings.DEBUG:
+                warn_missing_manifest(self.path(self.manifest_name))
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        for name in self.required_files:
+            if name not in paths:
+                # collectstatic re-raises this, so a build without the font fails
+                yield name, None, ImproperlyConfigured(
+                    f'{name} is missing from the static files; run `manage.py build_fonts` first.'
+                )
+                return
+
+        for name in paths:
+            names = {name, self.hashed_files.get(self.hash_key(self.clean_name(name)), name)}
+            for stored in names:
+                path = self.path(stored)
+                if not os.path.isfile(path):
+                    continue
+                if any(fnmatch(name, pattern) for pattern in self.minify_patterns):
+                    self.minify(path)
+                if stored.lower().endswith(COMPRESSIBLE):
+                    self.compress(path)
+
+    @property
+    def required_files(self):
+        return getattr(settings, 'STATIC_REQUIRED_FILES', REQUIRED_FILES)
+
+    @property
+    def minify_patterns(self):
+        return getattr(settings, 'STATIC_MINIFY_PATTERNS', MINIFY_PATTERNS)
+
+    def minify(self, path):
+        minifier = MINIFIERS.get(os.path.splitext(path)[1].lower())
+        if minifier is None:
+            return
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(minifier(text))
+
+    def compress(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, body in compressed_variants(data).items():
+            with open(path + suffix, 'wb') as f:
+                f.write(body)
+
+
+# ==================== Fonts ====================
+
+# Self-hosted Inter subset, built by `manage.py build_fonts`
+INTER_FONT = 'fonts/inter-latin.woff2'
+INTER_WEIGHTS = '300 700'
+
+# Files collectstatic must find; production pages preload the font, so a build without it fails
+REQUIRED_FILES = [INTER_FONT]
+
+# Basic Latin, Latin-1, common punctuation and the rupee sign
+LATIN_UNICODE_RANGE = (
+    'U+0000-00FF, U+0131, U+0152-0153, U+02BB-02BC, U+02C6, U+02DA, U+02DC, '
+    'U+2000-206F, U+20AC, U+20B9, U+2122, U+2191, U+2193, U+2212, U+2215, U+FEFF, U+FFFD'
+)
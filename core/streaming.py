@@ -0,0 +1,77 @@
+"""
+Streaming render for large list pages.
+The page template is rendered once with a marker in place of its table rows; the part
+before the marker (layout, filters, table head) is sent at once and the rows follow in
+chunks read from a server-side cursor, so memory and time to first byte do not grow
+with the number of rows. Under ASGI the chunks are produced by an async iterator so the
+server sends them as they are rendered instead of buffering the whole body.
+"""
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+
+MARKER = '<!-- stream-rows -->'
+
+CHUNK_SIZE = 500
+
+
+def chunk_size():
+    return getattr(settings, 'LIST_STREAMING_CHUNK_SIZE', CHUNK_SIZE)
+
+
+def iter_rows(template, queryset, size):
+    iterator = queryset.iterator(chunk_size=size)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield template.render({'rows': chunk})
+
+
+def stream_chunks(head, rows, tail):
+    yield head
+    yield from rows
+    yield tail
+
+
+async def async_chunks(chunks):
+    """Consume a sync iterator (which may query the database) from async code, chunk by chunk."""
+    next_chunk = sync_to_async(lambda: next(chunks, None), thread_sensitive=True)
+    while True:
+        chunk = await next_chunk()
+        if chunk is None:
+            return
+        yield chunk
+
+
+def render_list(request, template_name, rows_template, queryset, context):
+    """
+    Render a list page whose table rows come from `rows_template`.
+
+    The page template shows `{{ stream_rows }}` where the rows go when it is set, and
+    otherwise includes `rows_template` with rows=<the queryset>. `has_rows` is added to
+    the context so the template can show its empty state without loading the rows.
+
+    Returns:
+        StreamingHttpResponse, or a plain HttpResponse when LIST_STREAMING is off
+    """
+    context = {**context, 'has_rows': queryset.exists()}
+    if not getattr(settings, 'LIST_STREAMING', True):
+        return render(request, template_name, context)
+
+    # Rendered now rather than lazily so CSRF and session changes reach the response headers
+    page = get_template(template_name).render({**context, 'stream_rows': mark_safe(MARKER)}, request)
+    head, _, tail = page.partition(MARKER)
+    rows = iter_rows(get_template(rows_template), queryset, chunk_size()) if context['has_rows'] else iter(())
+
+    chunks = stream_chunks(head, rows, tail)
+    if isinstance(request, ASGIRequest):
+        chunks = async_chunks(chunks)
+    return StreamingHttpResponse(chunks, content_type='text/html; charset=utf-8')
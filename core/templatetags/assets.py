@@ -0,0 +1,35 @@
+"""Template tags for self-hosted static assets."""
+from functools import lru_cache
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from core.storage import INTER_FONT, INTER_WEIGHTS, LATIN_UNICODE_RANGE
+
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def font_available(name):
+    return finders.find(name) is not None
+
+
+@register.simple_tag
+def inter_font():
+    """
+    Preload and @font-face rules for the self-hosted Inter subset.
+    Renders nothing until `manage.py build_fonts` has produced the font; the
+    stylesheet's system font stack is used meanwhile.
+    """
+    if not font_available(INTER_FONT):
+        return ''
+    url = static(INTER_FONT)
+    return format_html(
+        '<link rel="preload" href="{}" as="font" type="font/woff2" crossorigin>\n'
+        '    <style>@font-face{{font-family:\'Inter\';font-style:normal;font-weight:{};font-display:swap;'
+        'src:url("{}") format("woff2");unicode-range:{}}}</style>',
+        url, INTER_WEIGHTS, url, LATIN_UNICODE_RANGE,
+    )
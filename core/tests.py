@@ -1,3 +1,1286 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import smtplib
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core import mail, signing
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.template import Context, Template, engines
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    admin, analytics, attachments, auth, bulk, campaigns, changes, checks, cohorts, dedupe, followups, latency, lookups, media,
+    personalization, rollups, segments, storage, streaming, timeline, warmup,
+)
+from .benchmark import collect_targets, run_benchmark, find_regressions
+from .forms import InvestorBulkActionForm, ResponseBulkActionForm
+from .smtp_sink import SMTPSink
+from .templatetags import assets
+from .models import (
+    Investor, Artifact, EmailDraft, CommunicationLog, ResponseFunding, ChangeLog, CommunicationDailyRollup,
+    ResponseDailyRollup, Segment, SegmentMembership, DuplicateSuggestion, Campaign, CampaignRecipient, FollowUp,
+)
+
+
+class BenchmarkHarnessTests(TestCase):
+    """Smoke tests for the seed_data command and the view benchmark harness."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_data', investors=25, artifacts=3, drafts=3, communications=300, responses=60,
+            seed=1, stdout=StringIO(),
+        )
+        cls.user = User.objects.get(username='benchmark')
+
+    def test_seed_volumes(self):
+        self.assertEqual(Investor.objects.count(), 25)
+        self.assertEqual(CommunicationLog.objects.count(), 300)
+        self.assertEqual(ResponseFunding.objects.count(), 60)
+
+    def test_seeded_rows_are_in_the_change_log(self):
+        for model, resource in ((Investor, 'investors'), (EmailDraft, 'drafts'), (CommunicationLog, 'communications'),
+                                (ResponseFunding, 'responses')):
+            with self.subTest(resource=resource):
+                recorded = ChangeLog.objects.filter(resource=resource, action='create')
+                self.assertEqual(
+                    set(recorded.values_list('object_id', flat=True)), set(model.objects.values_list('pk', flat=True)),
+                )
+
+        investor_ids = set(Investor.objects.values_list('pk', flat=True))
+        call_command('seed_data', investors=5, communications=0, responses=0, clear=True, seed=2, stdout=StringIO())
+        deleted = set(ChangeLog.objects.filter(resource='investors', action='delete').values_list('object_id', flat=True))
+        self.assertEqual(deleted, investor_ids)
+
+    def test_every_url_is_benchmarked(self):
+        results = run_benchmark(self.user, repeat=1)
+        names = {name for name, _ in collect_targets()}
+        self.assertEqual(set(results), names)
+        for name, result in results.items():
+            self.assertNotIn('skipped', result, name)
+            self.assertLess(result['status'], 500, name)
+
+    def test_regression_detection(self):
+        baseline = {'dashboard': {'latency_ms': 10.0, 'queries': 5, 'peak_memory_kb': 100.0}}
+        self.assertEqual(find_regressions(baseline, baseline), [])
+
+        slower = {'dashboard': {'latency_ms': 50.0, 'queries': 7, 'peak_memory_kb': 100.0}}
+        regressions = find_regressions(slower, baseline)
+        self.assertEqual(len(regressions), 2)
+
+
+class FunnelTests(TestCase):
+    """Draft and label conversion funnel computed by grouped queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('funnel', password='x')
+        draft = EmailDraft.objects.create(name='intro', subject='Hello', body='Hi')
+        vc = Investor.objects.create(name='Ada', email='ada@example.com', labels='VC, Seed')
+        angel = Investor.objects.create(name='Bo', email='bo@example.com', labels='Angel')
+        now = timezone.now()
+
+        answered = CommunicationLog.objects.create(investor=vc, draft=draft)
+        ResponseFunding.objects.create(
+            investor=vc, communication=answered, response_status='success', amount_offered=100, response_date=now,
+        )
+        ResponseFunding.objects.create(investor=vc, communication=answered, response_date=now)
+        CommunicationLog.objects.create(investor=vc, draft=draft, status='failed')
+        CommunicationLog.objects.create(investor=angel, draft=draft)
+        custom = CommunicationLog.objects.create(investor=angel)
+        ResponseFunding.objects.create(investor=angel, communication=custom, response_status='failure', response_date=now)
+
+        old = CommunicationLog.objects.create(investor=angel, draft=draft)
+        CommunicationLog.objects.filter(pk=old.pk).update(sent_at=now - timedelta(days=30))
+        ResponseFunding.objects.create(
+            investor=angel, communication=old, response_status='success', amount_offered=50, response_date=now,
+        )
+
+    def rows(self, chart):
+        return {
+            label: {key: values[i] for key, values in chart['series'].items()} for i, label in enumerate(chart['labels'])
+        }
+
+    def test_funnel_counts_emails_sent_in_the_window(self):
+        today = timezone.localdate()
+        result = analytics.funnel(today - timedelta(days=6), today)
+        self.assertEqual(self.rows(result['drafts']), {
+            'intro': {'sent': 2, 'responded': 1, 'success': 1, 'amount': Decimal('100')},
+            'Custom Email': {'sent': 1, 'responded': 1, 'success': 0, 'amount': 0},
+        })
+        labels = self.rows(result['investor_labels'])
+        self.assertEqual(labels['VC'], labels['Seed'])
+        self.assertEqual(labels['VC'], {'sent': 1, 'responded': 1, 'success': 1, 'amount': Decimal('100')})
+        self.assertEqual(labels['Angel'], {'sent': 2, 'responded': 1, 'success': 0, 'amount': 0})
+
+    def test_endpoint_rejects_bad_windows(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/api/analytics/funnel/?days=7')
+        self.assertEqual(response.json()['drafts']['labels'], ['intro', 'Custom Email'])
+        response = self.client.get('/api/analytics/funnel/?days=0')
+        self.assertEqual((response.status_code, response.json()['type']), (400, 'error'))
+
+
+class ImportTimeTests(TestCase):
+    """
+    Guard worker/command startup cost by parsing `python -X importtime`.
+
+    A stand-in `google.generativeai` package is put on the path so the check is
+    meaningful whether or not the real SDK is installed.
+    """
+
+    # Optional heavy dependencies that must only load on first use
+    LAZY_MODULES = ['google.generativeai']
+
+    # Cumulative import budget for the app's entry modules, in microseconds
+    IMPORT_BUDGET_US = 1_000_000
+
+    def _importtime(self, statement):
+        with tempfile.TemporaryDirectory() as stub_dir:
+            package = os.path.join(stub_dir, 'google', 'generativeai')
+            os.makedirs(package)
+            open(os.path.join(stub_dir, 'google', '__init__.py'), 'w').close()
+            open(os.path.join(package, '__init__.py'), 'w').close()
+
+            env = dict(os.environ)
+            env['PYTHONPATH'] = os.pathsep.join(filter(None, [stub_dir, os.getcwd(), env.get('PYTHONPATH')]))
+            env.setdefault('DJANGO_SETTINGS_MODULE', 'fundraise.settings')
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', f'import django; django.setup(); {statement}'],
+                capture_output=True, text=True, env=env, check=True,
+            )
+
+        timings = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, module = line[len('import time:'):].split('|')
+            timings[module.strip()] = int(cumulative)
+        return timings
+
+    def test_heavy_modules_are_lazy(self):
+        timings = self._importtime('import core.urls, core.views, core.chatbot, core.email_service')
+        for module in self.LAZY_MODULES:
+            self.assertFalse(module in timings, f'{module} is imported at startup')
+
+    def test_entry_modules_within_budget(self):
+        timings = self._importtime('import core.urls')
+        total = sum(us for module, us in timings.items() if module in ('core.urls', 'core.views'))
+        self.assertLess(total, self.IMPORT_BUDGET_US)
+
+
+class TimelineTests(TestCase):
+    """Investor timeline pages merged from communications and responses."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('timeline', password='x')
+        cls.investor = Investor.objects.create(name='Ada', email='ada@example.com')
+        base = timezone.now().replace(microsecond=0)
+        for i in range(25):
+            log = CommunicationLog.objects.create(investor=cls.investor)
+            CommunicationLog.objects.filter(pk=log.pk).update(sent_at=base - timedelta(hours=i))
+            # Every other response shares its email's timestamp to exercise tie-breaking
+            ResponseFunding.objects.create(
+                investor=cls.investor, communication=log, response_date=base - timedelta(hours=i, minutes=30 * (i % 2)),
+            )
+
+    def test_pages_cover_every_entry_once_newest_first(self):
+        seen, cursor = [], None
+        while True:
+            entries, cursor = timeline.investor_timeline(self.investor, before=cursor, limit=7)
+            self.assertLessEqual(len(entries), 7)
+            seen += entries
+            if cursor is None:
+                break
+        self.assertEqual(len({(entry['kind'], entry['id']) for entry in seen}), 50)
+        self.assertEqual(seen, sorted(seen, key=timeline._sort_key, reverse=True))
+
+    def test_endpoint_pages_and_rejects_bad_cursors(self):
+        self.client.force_login(self.user)
+        url = f'/investors/{self.investor.pk}/timeline/'
+        _, cursor = timeline.investor_timeline(self.investor)
+        data = self.client.get(url, {'before': cursor}).json()
+        self.assertEqual(len(data['entries']), 20)
+        self.assertIsNotNone(data['next_cursor'])
+
+        for cursor in ('garbage', '2024-01-01T00:00:00|note|1'):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(url, {'before': cursor}).status_code, 400)
+
+
+class RestAPITests(TestCase):
+    """Bulk writes and validators of the JSON REST API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('api', password='x')
+        cls.investors = [
+            Investor.objects.create(name=f'Investor {i}', email=f'investor{i}@example.com') for i in range(3)
+        ]
+        cls.draft = EmailDraft.objects.create(name='Intro', subject='Hi', body='Hello', created_by=cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def send(self, method, url, data):
+        return getattr(self.client, method)(url, json.dumps(data), content_type='application/json')
+
+    def test_bulk_create_and_update(self):
+        response = self.send('post', '/api/investors/', [
+            {'name': 'New A', 'email': 'new-a@example.com'},
+            {'name': 'New B', 'email': 'new-b@example.com'},
+        ])
+        self.assertEqual(response.status_code, 201)
+        ids = [row['id'] for row in response.json()['results']]
+
+        response = self.send('patch', '/api/investors/', [{'id': pk, 'labels': 'VC'} for pk in ids])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Investor.objects.filter(pk__in=ids, labels='VC').count(), 2)
+
+    def test_invalid_item_rolls_back_the_batch(self):
+        response = self.send('post', '/api/investors/', [
+            {'name': 'Valid', 'email': 'valid@example.com'},
+            {'name': 'Invalid', 'email': 'not-an-email'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('1', response.json()['errors'])
+        self.assertFalse(Investor.objects.filter(email='valid@example.com').exists())
+
+    def test_malformed_ids_are_rejected(self):
+        self.assertEqual(self.send('patch', '/api/investors/', [{'id': 'abc'}]).status_code, 400)
+        self.assertEqual(self.send('delete', '/api/investors/', {'ids': ['abc']}).status_code, 400)
+        self.assertEqual(self.send('delete', '/api/investors/', {'ids': [999999]}).status_code, 404)
+        self.assertEqual(Investor.objects.count(), 3)
+
+    def test_many_to_many_ids_are_validated(self):
+        url = f'/api/drafts/{self.draft.pk}/'
+        for artifacts in ([999999], ['x']):
+            response = self.send('patch', url, {'artifacts': artifacts})
+            self.assertEqual(response.status_code, 400, artifacts)
+            self.assertIn('artifacts', response.json()['errors']['0'])
+
+    def test_delete_moves_last_modified(self):
+        response = self.client.get('/api/investors/')
+        since = response['Last-Modified']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.send('delete', '/api/investors/', {'ids': [self.investors[0].pk]})
+        ChangeLog.objects.update(changed_at=timezone.now() + timedelta(seconds=5))
+
+        response = self.client.get('/api/investors/', HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+
+
+class ChangeFeedTests(TestCase):
+    """Change log writes, pruning and expired cursors."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('feed', password='x')
+
+    def test_changes_are_recorded_in_the_writing_transaction(self):
+        with transaction.atomic():
+            investor = Investor.objects.create(name='Feed', email='feed@example.com')
+            self.assertTrue(ChangeLog.objects.filter(resource='investors', object_id=investor.pk).exists())
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Investor.objects.create(name='Rolled back', email='rolled@example.com')
+            raise RuntimeError
+        self.assertEqual(ChangeLog.objects.filter(resource='investors').count(), 1)
+
+    def test_entries_are_numbered_in_commit_order(self):
+        # Committed and read first, although a long transaction holds a lower id
+        ChangeLog.objects.create(pk=100, resource='investors', object_id=1, action='update')
+        changes.sequence_pending()
+        page = changes.feed(since=0)
+        self.assertEqual([change['id'] for change in page['changes']], [1])
+
+        # The long transaction commits an entry written well before the reader's cursor
+        ChangeLog.objects.create(pk=50, resource='investors', object_id=2, action='update')
+        ChangeLog.objects.filter(pk=50).update(changed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(changes.feed(since=page['next_cursor'])['changes'], [])
+        changes.sequence_pending()
+        late = changes.feed(since=page['next_cursor'])['changes']
+        self.assertEqual([change['id'] for change in late], [2])
+        self.assertGreater(late[0]['cursor'], page['next_cursor'])
+        self.assertEqual(changes.head(), late[0]['cursor'])
+
+    def test_writes_are_numbered_when_they_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                investor = Investor.objects.create(name='Feed', email='feed@example.com')
+                self.assertEqual(changes.feed(since=0)['changes'], [])
+        self.assertEqual([change['id'] for change in changes.feed(since=0)['changes']], [investor.pk])
+
+    def test_prune_keeps_the_head_and_expires_old_cursors(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(5):
+                Investor.objects.create(name=f'Old {i}', email=f'old{i}@example.com')
+        ChangeLog.objects.update(changed_at=timezone.now() - timedelta(days=60))
+        newest = changes.head()
+
+        self.assertEqual(changes.prune(days=30), 4)
+        self.assertEqual(list(ChangeLog.objects.values_list('sequence', flat=True)), [newest])
+        with self.assertRaises(changes.CursorExpired):
+            changes.feed(since=0)
+
+        self.client.force_login(self.user)
+        response = self.client.get('/api/changes/?since=0')
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(response.json()['head'], newest)
+
+
+class BulkActionRollupTests(TestCase):
+    """Bulk action validation, and daily rollups kept equal to a full rebuild."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_data', investors=20, artifacts=2, drafts=2, communications=200, responses=80,
+            seed=3, stdout=StringIO(),
+        )
+
+    def rollup_state(self):
+        return (
+            set(CommunicationDailyRollup.objects.values_list('day', 'draft_id', 'status', 'count')),
+            set(ResponseDailyRollup.objects.values_list('day', 'draft_id', 'response_status', 'count', 'total_amount')),
+        )
+
+    def assertRollupsMatchRebuild(self):
+        incremental = self.rollup_state()
+        rollups.rebuild()
+        self.assertEqual(incremental, self.rollup_state())
+
+    def test_response_actions(self):
+        ids = list(ResponseFunding.objects.values_list('pk', flat=True)[:30])
+        bulk.response_action(ids[:10], 'set_status', 'success')
+        bulk.response_action(ids[10:20], 'set_amount', Decimal('125000'))
+        bulk.response_action(ids[20:], 'delete')
+        self.assertRollupsMatchRebuild()
+
+    def test_investor_delete(self):
+        ids = list(Investor.objects.values_list('pk', flat=True)[:5])
+        bulk.investor_action(ids, 'delete')
+        self.assertRollupsMatchRebuild()
+
+    def test_amounts_must_fit_the_column(self):
+        for form_class in (InvestorBulkActionForm, ResponseBulkActionForm):
+            for value, valid in [('125000.005', True), ('9999999999999.99', True), ('1e20', False),
+                                 ('1e400', False), ('-1', False), ('NaN', False), ('lots', False)]:
+                with self.subTest(form=form_class.__name__, value=value):
+                    form = form_class({'ids': ['1'], 'action': 'set_amount', 'value': value})
+                    self.assertEqual(form.is_valid(), valid, form.errors)
+        form = InvestorBulkActionForm({'ids': ['1'], 'action': 'set_amount', 'value': '125000.005'})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['value'], Decimal('125000.00'))
+
+
+class ArtifactMediaTests(TestCase):
+    """Claiming, finishing and superseding artifact processing jobs."""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+
+    def artifact(self, artifact_type='video', name='clip.mp4'):
+        return Artifact.objects.create(
+            artifact_type=artifact_type, name=name, file=SimpleUploadedFile(name, b'original'),
+        )
+
+    def test_missing_tools_skip_the_artifact(self):
+        artifact = self.artifact()
+        with mock.patch.object(media, 'find_tool', return_value=None):
+            self.assertEqual(media.process_artifact(artifact.pk), 'skipped')
+        artifact.refresh_from_db()
+        self.assertEqual(artifact.processing_status, 'skipped')
+        self.assertIn('ffmpeg', artifact.processing_error)
+        self.assertEqual(artifact.file_size, len(b'original'))
+
+    def test_claimed_once_and_finished(self):
+        artifact = self.artifact()
+        process = mock.Mock(return_value=({'duration': 2.5, 'width': 640, 'height': 360}, b'jpeg'))
+        with mock.patch.dict(media.PROCESSORS, video=process):
+            self.assertEqual(media.process_artifact(artifact.pk), 'done')
+            # No longer pending: a second worker finds nothing to claim
+            self.assertIsNone(media.process_artifact(artifact.pk))
+        self.assertEqual(process.call_count, 1)
+        artifact.refresh_from_db()
+        self.assertEqual((artifact.processing_status, artifact.width, artifact.duration), ('done', 640, 2.5))
+        self.assertTrue(artifact.thumbnail.storage.exists(artifact.thumbnail.name))
+
+    def test_file_replaced_mid_job_is_left_for_its_own_job(self):
+        artifact = self.artifact()
+
+        def replace_file(job_artifact, path):
+            replacement = Artifact.objects.get(pk=job_artifact.pk)
+            replacement.file = SimpleUploadedFile('new.mp4', b'replacement')
+            replacement.save()
+            return {'duration': 1.0}, b'stale'
+
+        with mock.patch.dict(media.PROCESSORS, video=replace_file):
+            self.assertIsNone(media.process_artifact(artifact.pk))
+        artifact.refresh_from_db()
+        self.assertEqual((artifact.processing_status, artifact.duration, artifact.thumbnail.name), ('pending', None, ''))
+        # The stale job's thumbnail was saved, then removed again
+        self.assertEqual(artifact.thumbnail.storage.listdir('artifacts/thumbnails')[1], [])
+
+        with mock.patch.dict(media.PROCESSORS, video=mock.Mock(return_value=({'duration': 3.0}, None))):
+            self.assertEqual(media.process_artifact(artifact.pk), 'done')
+        artifact.refresh_from_db()
+        self.assertEqual((artifact.processing_status, artifact.duration), ('done', 3.0))
+
+
+class ArtifactLinkTests(TestCase):
+    """Signed, expiring download links for artifacts too large to attach."""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+        self.artifact = Artifact.objects.create(
+            artifact_type='presentation', name='Deck', file=SimpleUploadedFile('deck.pdf', b'%PDF-deck'),
+        )
+
+    def url(self, token):
+        return reverse('artifact_download', kwargs={'token': token})
+
+    def test_signed_link_downloads_the_file(self):
+        link = attachments.download_url(self.artifact)
+        self.assertTrue(link.endswith(self.url(attachments.make_token(self.artifact))))
+        response = self.client.get(self.url(attachments.make_token(self.artifact)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-deck')
+
+    def test_tampered_tokens_are_rejected(self):
+        token = attachments.make_token(self.artifact)
+        value, signature = token.split(':', 1)
+        other = Artifact.objects.create(artifact_type='image', name='Other', file=SimpleUploadedFile('o.png', b'png'))
+        for forged in (f'{other.pk}:{signature}', token[:-1] + ('A' if token[-1] != 'A' else 'B'), 'garbage'):
+            with self.subTest(token=forged):
+                self.assertEqual(self.client.get(self.url(forged)).status_code, 404)
+
+    def test_expired_links_are_gone(self):
+        issued = time.time() - attachments.link_max_age() - 60
+        with mock.patch('django.core.signing.time.time', return_value=issued):
+            token = attachments.make_token(self.artifact)
+        with self.assertRaises(signing.SignatureExpired):
+            attachments.read_token(token)
+        self.assertEqual(self.client.get(self.url(token)).status_code, 410)
+
+
+class PersonalizationTests(TestCase):
+    """Compiled draft templates and per-batch message building."""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+        self.draft = EmailDraft.objects.create(
+            name='intro', subject='Hi {{ first_name }}', body='<p>Dear {{name}}, about {{ amount }} {{ stage }}</p>',
+        )
+        self.investors = [
+            Investor.objects.create(name='Ada <Lovelace>', email='ada@example.com', amount=Decimal('2500000')),
+            Investor.objects.create(name='Bo', email='bo@example.com'),
+        ]
+
+    def test_placeholders_are_filled_and_escaped(self):
+        self.assertEqual(personalization.unknown_placeholders(self.draft.body), ['stage'])
+        compiled = personalization.compile_draft(self.draft)
+        row = personalization.investor_row(self.investors[0])
+        self.assertEqual(compiled.subject.render(row), 'Hi Ada')
+        self.assertEqual(
+            compiled.body.render(row), '<p>Dear Ada &lt;Lovelace&gt;, about 2,500,000 {{ stage }}</p>',
+        )
+        self.assertTrue(personalization.CompiledTemplate('No placeholders').static)
+
+    def test_compiled_until_the_draft_is_edited(self):
+        compiled = personalization.compile_draft(self.draft)
+        self.assertIs(personalization.compile_draft(EmailDraft.objects.get(pk=self.draft.pk)), compiled)
+        self.draft.subject = 'Hello {{ name }}'
+        self.draft.save()
+        recompiled = personalization.compile_draft(self.draft)
+        self.assertIsNot(recompiled, compiled)
+        self.assertEqual(recompiled.subject.render({'name': 'Bo'}), 'Hello Bo')
+
+    def test_builder_shares_attachments_across_messages(self):
+        artifact = Artifact.objects.create(
+            artifact_type='presentation', name='Deck', file=SimpleUploadedFile('deck.pdf', b'%PDF-deck'),
+        )
+        self.draft.artifacts.add(artifact)
+        builder = personalization.DraftMessageBuilder(self.draft)
+        rows = personalization.investor_rows([investor.pk for investor in self.investors])
+        first, second = (builder.message(rows[investor.pk]) for investor in self.investors)
+
+        self.assertEqual((first.to, second.to), (['ada@example.com'], ['bo@example.com']))
+        self.assertEqual((first.subject, second.subject), ('Hi Ada', 'Hi Bo'))
+        self.assertEqual(first.content_subtype, 'html')
+        self.assertEqual(len(builder.attachments), 1)
+        self.assertIs(first.attachments[0], second.attachments[0])
+
+
+class CampaignTests(TestCase):
+    """Rate-limited campaign sending: retries, token bucket and crash recovery."""
+
+    def setUp(self):
+        self.now = timezone.now()
+        draft = EmailDraft.objects.create(name='intro', subject='Hi {{ first_name }}', body='<p>Hello</p>')
+        for i in range(3):
+            Investor.objects.create(name=f'Investor {i}', email=f'investor{i}@example.com')
+        self.campaign = Campaign.objects.create(
+            name='Seed', draft=draft, send_after=self.now, max_per_hour=3600, burst=3,
+        )
+
+    def tick(self, seconds=0):
+        return campaigns.Scheduler().tick(self.now + timedelta(seconds=seconds))[self.campaign.pk]
+
+    def statuses(self):
+        return sorted(self.campaign.recipients.values_list('status', flat=True))
+
+    def test_temporary_rejections_are_retried_and_delivered_once(self):
+        with SMTPSink(failure_rate=1.0) as sink, override_settings(**sink.email_settings()):
+            with self.assertLogs('core.campaigns', 'WARNING'):
+                self.assertEqual(self.tick(), {'sent': 0, 'failed': 3})
+            self.assertEqual(self.statuses(), ['pending'] * 3)
+            self.assertIn('Try again later', self.campaign.recipients.first().error)
+
+            sink.failure_rate = 0
+            self.assertEqual(self.tick(3), {'sent': 3, 'failed': 0})
+            self.assertEqual(self.tick(60), {'sent': 0, 'failed': 0})
+        self.assertEqual((sink.rejected, sink.messages), (3, 3))
+        self.assertEqual(self.statuses(), ['sent'] * 3)
+
+    def test_other_failures_are_left_for_review(self):
+        errors = [smtplib.SMTPDataError(554, b'Rejected as spam'), smtplib.SMTPServerDisconnected('Connection lost')]
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=errors), \
+                self.assertLogs('core.campaigns', 'WARNING'):
+            self.assertEqual(self.tick(), {'sent': 0, 'failed': 3})
+        rows = self.campaign.recipients.order_by('pk')
+        self.assertEqual([row.status for row in rows], ['failed', 'failed', 'pending'])
+        self.assertIn('connection lost', rows[2].error)
+
+        self.assertEqual(self.tick(3), {'sent': 1, 'failed': 0})
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_bucket_refills_at_the_hourly_rate(self):
+        self.campaign.burst = 1
+        self.campaign.save()
+        self.assertEqual(self.tick()['sent'], 1)
+        self.assertEqual(self.tick()['sent'], 0)
+        self.assertEqual(self.tick(1)['sent'], 1)
+        self.assertEqual(self.tick(1.5)['sent'], 0)
+        self.assertEqual(self.tick(2)['sent'], 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_resume_after_a_crash_does_not_resend(self):
+        self.campaign.burst = 1
+        self.campaign.save()
+        self.tick()
+        # A scheduler claims the next recipient and dies before recording the result
+        self.campaign.refresh_from_db()
+        [(interrupted, _)] = campaigns.claim(self.campaign, 1, self.now)
+
+        later = (campaigns.STALE_SENDING + timedelta(seconds=1)).total_seconds()
+        self.assertEqual(self.tick(later), {'sent': 1, 'failed': 0})
+        row = CampaignRecipient.objects.get(pk=interrupted)
+        self.assertEqual(row.status, 'failed')
+        self.assertIn('Interrupted', row.error)
+        self.assertEqual(self.statuses(), ['failed', 'sent', 'sent'])
+        self.assertEqual(len(mail.outbox), 2)
+
+
+class SMTPSinkTests(TestCase):
+    """The local SMTP sink used by the email benchmarks."""
+
+    def send(self, sink):
+        with smtplib.SMTP(sink.host, sink.port) as client:
+            client.sendmail('from@example.com', ['to@example.com'], 'Subject: Hi\r\n\r\nHello')
+
+    def test_accepts_and_keeps_messages(self):
+        with SMTPSink(keep_messages=True) as sink:
+            self.send(sink)
+        self.assertEqual(sink.messages, 1)
+        [(recipients, data)] = sink.received
+        self.assertEqual(recipients, ['<to@example.com>'])
+        self.assertIn(b'Hello', data)
+
+    def test_failure_injection_replies_451(self):
+        with SMTPSink(failure_rate=1.0) as sink:
+            with self.assertRaises(smtplib.SMTPDataError) as raised:
+                self.send(sink)
+        self.assertEqual(raised.exception.smtp_code, 451)
+        self.assertEqual((sink.messages, sink.rejected), (0, 1))
+
+
+class AdminChangelistTests(TestCase):
+    """Changelists of large tables skip the full result count."""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        investors = [Investor.objects.create(name=f'Investor {i}', email=f'i{i}@example.com') for i in range(5)]
+        investors[-1].delete()
+
+    def test_investor_changelist_uses_the_estimated_paginator(self):
+        response = self.client.get('/admin/core/investor/')
+        changelist = response.context['cl']
+        self.assertIsInstance(changelist.paginator, admin.EstimatedCountPaginator)
+        self.assertEqual(changelist.paginator.count, 4)
+        self.assertEqual(changelist.date_hierarchy, 'created_date')
+
+    def test_filtered_count_is_capped(self):
+        with mock.patch.object(admin.EstimatedCountPaginator, 'EXACT_COUNT_LIMIT', 2):
+            response = self.client.get('/admin/core/investor/', {'q': 'Investor'})
+        self.assertEqual(response.context['cl'].paginator.count, 2)
+
+
+class LookupTests(TestCase):
+    """Typeahead prefix matching."""
+
+    def test_email_prefix_ignores_case(self):
+        investor = Investor.objects.create(name='Zed', email='Jane.Doe@Example.com')
+        for query in ('jane.d', 'JANE.DOE@', 'Jane'):
+            self.assertEqual(list(lookups.matching_investors(query).values_list('pk', flat=True)), [investor.pk])
+
+        plan = lookups.matching_investors('jane').explain()
+        self.assertIn('investor_email_lower_idx', plan)
+
+
+class StaticBuildTests(TestCase):
+    """collectstatic output and the self-hosted font tag."""
+
+    def setUp(self):
+        build = tempfile.TemporaryDirectory()
+        self.addCleanup(build.cleanup)
+        self.root = os.path.join(build.name, 'staticfiles')
+        self.extra = os.path.join(build.name, 'static')
+        os.makedirs(os.path.join(self.extra, 'fonts'))
+        self.enterContext(override_settings(
+            STATIC_ROOT=self.root, STATICFILES_DIRS=[*settings.STATICFILES_DIRS, self.extra],
+        ))
+        assets.font_available.cache_clear()
+        self.addCleanup(assets.font_available.cache_clear)
+
+    def collect(self):
+        call_command('collectstatic', interactive=False, verbosity=0, stderr=StringIO())
+
+    def test_build_fails_without_the_font(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'build_fonts'):
+            self.collect()
+
+    def test_missing_manifest_is_reported(self):
+        storage.warn_missing_manifest.cache_clear()
+        with self.assertLogs('core.storage', 'WARNING') as logs:
+            self.assertEqual(staticfiles_storage.stored_name('css/styles.css'), 'css/styles.css')
+        self.assertIn('collectstatic', logs.output[0])
+
+    def test_font_is_hashed_and_preloaded(self):
+        with open(os.path.join(self.extra, 'fonts', 'inter-latin.woff2'), 'wb') as f:
+            f.write(b'wOF2' + os.urandom(4096))
+        self.collect()
+
+        font = staticfiles_storage.stored_name('fonts/inter-latin.woff2')
+        self.assertRegex(font, r'^fonts/inter-latin\.[0-9a-f]{12}\.woff2$')
+        self.assertTrue(os.path.isfile(os.path.join(self.root, font)))
+        # WOFF2 is already compressed; text assets get a gzip variant
+        self.assertFalse(os.path.exists(os.path.join(self.root, font + '.gz')))
+        styles = staticfiles_storage.stored_name('css/styles.css')
+        self.assertTrue(os.path.isfile(os.path.join(self.root, styles + '.gz')))
+
+        html = Template('{% load assets %}{% inter_font %}').render(Context())
+        self.assertIn(f'<link rel="preload" href="/static/{font}" as="font" type="font/woff2" crossorigin>', html)
+        self.assertIn(f'src:url("/static/{font}") format("woff2")', html)
+
+
+class TemplateWarmupTests(TestCase):
+    """Compiling templates into the cached loader at startup."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        os.makedirs(os.path.join(directory.name, 'nested'))
+        for name, source in [
+            ('page.html', '{% extends "nested/base.html" %}'),
+            ('nested/base.html', '<p>{{ value }}</p>'),
+            ('broken.html', '{% load not_a_library %}'),
+            ('notes.txt', 'not a template'),
+        ]:
+            with open(os.path.join(directory.name, name), 'w') as f:
+                f.write(source)
+        backend = 'django.template.backends.django.DjangoTemplates'
+        self.enterContext(override_settings(TEMPLATES=[
+            {'BACKEND': backend, 'DIRS': [directory.name]},
+            {'BACKEND': backend, 'NAME': 'uncached', 'DIRS': [directory.name],
+             'OPTIONS': {'loaders': ['django.template.loaders.filesystem.Loader']}},
+        ]))
+
+    def test_compiles_templates_of_cached_engines_only(self):
+        with self.assertLogs('core.warmup', 'DEBUG') as logs:
+            self.assertEqual(warmup.warm_templates(), 2)
+        self.assertIn('skipped broken.html', '\n'.join(logs.output))
+
+        [loader] = engines['django'].engine.template_loaders
+        self.assertEqual(set(loader.get_template_cache), {'page.html', 'nested/base.html'})
+        [loader] = engines['uncached'].engine.template_loaders
+        self.assertFalse(hasattr(loader, 'get_template_cache'))
+
+
+class ListStreamingTests(TestCase):
+    """Large list pages are streamed in row chunks."""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('streamer', password='pw'))
+
+    def names(self, body):
+        return [name for name in (f'Investor {i}' for i in range(5)) if name in body]
+
+    @override_settings(LIST_STREAMING_CHUNK_SIZE=2)
+    def test_rows_follow_the_page_head_in_chunks(self):
+        for i in range(5):
+            Investor.objects.create(name=f'Investor {i}', email=f'i{i}@example.com')
+
+        response = self.client.get('/investors/')
+        self.assertTrue(response.streaming)
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 5)
+        self.assertIn('<table', chunks[0])
+        self.assertEqual(self.names(chunks[0]), [])
+        self.assertEqual([len(self.names(chunk)) for chunk in chunks[1:4]], [2, 2, 1])
+        self.assertIn('</table>', chunks[-1])
+
+        with override_settings(LIST_STREAMING=False):
+            plain = self.client.get('/investors/')
+        self.assertFalse(plain.streaming)
+        self.assertEqual(self.names(plain.content.decode()), self.names(''.join(chunks)))
+
+    def test_empty_list_streams_no_rows(self):
+        response = self.client.get('/investors/')
+        chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 2)
+        self.assertNotIn(streaming.MARKER.encode(), b''.join(chunks))
+
+    def test_async_chunks_preserve_order(self):
+        async def collect():
+            return [chunk async for chunk in streaming.async_chunks(iter(['head', 'rows', 'tail']))]
+
+        self.assertEqual(async_to_sync(collect)(), ['head', 'rows', 'tail'])
+
+
+class ConditionalPageTests(TestCase):
+    """Page validators from the change log head, and compression padding."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('pages', password='x')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_segment_changes_invalidate_the_page(self):
+        etag = self.client.get('/segments/')['ETag']
+        self.assertEqual(self.client.get('/segments/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            segment = Segment.objects.create(name='VCs', definition='label in (VC)')
+        response = self.client.get('/segments/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            segment.delete()
+        self.assertEqual(self.client.get('/segments/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_feed_hides_internal_resources(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Segment.objects.create(name='VCs', definition='label in (VC)')
+        self.assertTrue(ChangeLog.objects.filter(resource='segments').exists())
+        self.assertEqual(changes.feed(since=0)['changes'], [])
+
+    def test_compressed_lengths_are_padded(self):
+        Investor.objects.create(name='Padded', email='padded@example.com')
+        lengths = set()
+        for _ in range(10):
+            response = self.client.get('/investors/', HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+            self.assertIn(b'padded@example.com', gzip.decompress(content))
+            lengths.add(len(content))
+        self.assertGreater(len(lengths), 1)
+
+
+class CachedUserTests(TestCase):
+    """request.user caching only through a cache shared by every worker."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cached', password='x')
+
+    def test_process_local_cache_reads_the_database(self):
+        backend = auth.CachedModelBackend()
+        self.assertEqual(backend.get_user(self.user.pk), self.user)
+        # An update from another process sends no signal here
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(backend.get_user(self.user.pk))
+
+    def test_shared_cache_is_invalidated_on_save(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location},
+        }):
+            backend = auth.CachedModelBackend()
+            self.assertEqual(backend.get_user(self.user.pk), self.user)
+            with self.assertNumQueries(0):
+                backend.get_user(self.user.pk)
+
+            self.user.is_active = False
+            self.user.save()
+            self.assertIsNone(backend.get_user(self.user.pk))
+
+    def test_cached_sessions_need_a_shared_cache(self):
+        self.assertEqual(checks.check_shared_cache(None), [])
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db'):
+            self.assertEqual([error.id for error in checks.check_shared_cache(None)], ['core.E001'])
+            with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location},
+            }):
+                self.assertEqual(checks.check_shared_cache(None), [])
+
+
+class InvestorMergeTests(TestCase):
+    """Stored duplicate scans and what merging keeps."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('merge', password='x')
+        cls.draft = EmailDraft.objects.create(name='intro', subject='Hello', body='Hi')
+        cls.survivor = Investor.objects.create(name='Asha Rao', email='asha@fund.com')
+        cls.duplicate = Investor.objects.create(name='Asha Rao', email='asha.rao@fund.com')
+
+    def email(self, investor, days_ago):
+        log = CommunicationLog.objects.create(investor=investor, draft=self.draft)
+        CommunicationLog.objects.filter(pk=log.pk).update(sent_at=timezone.now() - timedelta(days=days_ago))
+        log.refresh_from_db()
+        return log
+
+    def test_page_lists_the_stored_scan(self):
+        call_command('find_duplicates', stdout=StringIO())
+        pair = DuplicateSuggestion.objects.get()
+        self.assertEqual((pair.first_id, pair.second_id), (self.survivor.pk, self.duplicate.pk))
+        self.assertIn('same name', pair.get_reasons_list())
+
+        self.client.force_login(self.user)
+        with self.assertNumQueries(5):
+            response = self.client.get('/investors/duplicates/')
+        self.assertContains(response, 'asha.rao@fund.com')
+
+        dedupe.merge_investors(self.survivor.pk, [self.duplicate.pk])
+        self.assertFalse(DuplicateSuggestion.objects.exists())
+
+    def test_sent_campaign_recipient_is_kept(self):
+        now = timezone.now()
+        campaign = Campaign.objects.create(
+            name='Seed', draft=self.draft, label='VC', send_after=now, send_before=now + timedelta(days=1),
+        )
+        sent = self.email(self.duplicate, 1)
+        CampaignRecipient.objects.create(campaign=campaign, investor=self.survivor, status='pending')
+        CampaignRecipient.objects.create(campaign=campaign, investor=self.duplicate, status='sent', communication=sent)
+
+        dedupe.merge_investors(self.survivor.pk, [self.duplicate.pk])
+        row = CampaignRecipient.objects.get(campaign=campaign)
+        self.assertEqual((row.investor_id, row.status, row.communication_id), (self.survivor.pk, 'sent', sent.pk))
+
+    def test_only_the_latest_email_keeps_a_pending_follow_up(self):
+        older, newer = self.email(self.survivor, 20), self.email(self.duplicate, 18)
+        for log in (older, newer):
+            FollowUp.objects.create(investor=log.investor, communication=log, draft=self.draft, due_date=log.sent_at)
+
+        dedupe.merge_investors(self.survivor.pk, [self.duplicate.pk])
+        self.assertEqual(
+            dict(FollowUp.objects.values_list('communication_id', 'status')),
+            {older.pk: 'dismissed', newer.pk: 'pending'},
+        )
+        self.assertEqual(set(FollowUp.objects.values_list('investor_id', flat=True)), {self.survivor.pk})
+
+
+class SegmentTests(TestCase):
+    """Segment parsing, compiling, incremental refresh and pages catching up on read."""
+
+    DEFINITIONS = [
+        'label in (VC, Seed) and amount > 10L',
+        'label != Angel and response = none',
+        'last_contact > 30d and response != failure',
+        'last_contact < 60d',
+        'last_contact = never',
+        'response = success',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_data', investors=40, artifacts=2, drafts=2, communications=200, responses=60,
+            seed=4, stdout=StringIO(),
+        )
+        changes.sequence_pending()
+        cls.user = User.objects.get(username='benchmark')
+
+    def commit(self):
+        # Test transactions never commit, so number the pending change log entries here
+        changes.sequence_pending()
+        return timezone.now()
+
+    def members(self, segment):
+        return set(SegmentMembership.objects.filter(segment=segment).values_list('investor_id', flat=True))
+
+    def test_parse(self):
+        conditions = segments.parse('label in (VC, Research and Development) and amount >= 5L and last_contact > 30d')
+        self.assertEqual(conditions, [
+            segments.Condition('label', 'in', ['VC', 'Research and Development']),
+            segments.Condition('amount', '>=', Decimal('500000')),
+            segments.Condition('last_contact', '>', 30),
+        ])
+        self.assertEqual(segments.parse('LABEL NOT IN (Angel)')[0], segments.Condition('label', 'not in', ['Angel']))
+        self.assertEqual(segments.parse('amount < 2cr')[0].value, Decimal('20000000'))
+        self.assertEqual(segments.parse('last_contact = never')[0].value, None)
+
+    def test_parse_errors(self):
+        for definition, message in [
+            ('', 'at least one condition'),
+            ('stage = seed', "Unknown field 'stage'"),
+            ('amount ~ 5L', "'~' cannot be used with amount"),
+            ('amount > lots', "'lots' is not an amount"),
+            ('last_contact > soon', "Use 'last_contact > 30d'"),
+            ('last_contact < never', "Use 'last_contact = never'"),
+            ('response = maybe', 'Response must be one of'),
+            ('label in ()', 'at least one label'),
+            ('label', 'Cannot read'),
+        ]:
+            with self.subTest(definition=definition):
+                with self.assertRaisesMessage(segments.SegmentError, message):
+                    segments.parse(definition)
+
+    def test_compile(self):
+        compiled = segments.compile_definition('label in (VC) and last_contact > 30d and response = success')
+        self.assertTrue(compiled.relative)
+        self.assertEqual(compiled.sources, {'investors', 'communications', 'responses'})
+        self.assertFalse(segments.compile_definition('last_contact = never').relative)
+
+        now = timezone.now()
+        quiet = Investor.objects.create(name='Quiet', email='quiet@example.com', labels='VC')
+        recent = Investor.objects.create(name='Recent', email='recent@example.com', labels='VC')
+        log = CommunicationLog.objects.create(investor=recent)
+        self.assertIn(quiet, segments.matching('last_contact = never', now))
+        self.assertNotIn(recent, segments.matching('last_contact = never', now))
+        self.assertIn(recent, segments.matching('last_contact < 7d', now))
+        CommunicationLog.objects.filter(pk=log.pk).update(sent_at=now - timedelta(days=40))
+        self.assertIn(recent, segments.matching('last_contact > 30d', now))
+
+    def test_incremental_refresh_matches_full_evaluation(self):
+        leaving = Investor.objects.create(name='Leaving', email='leaving@example.com', labels='VC')
+        built = [
+            segments.rebuild(Segment.objects.create(name=f'S{i}', definition=definition))
+            for i, definition in enumerate(self.DEFINITIONS)
+        ]
+
+        investors = list(Investor.objects.order_by('pk')[:12])
+        for investor in investors[:4]:
+            investor.labels = 'VC, Seed'
+            investor.amount = Decimal('2500000')
+            investor.save()
+        Investor.objects.create(name='New', email='new@example.com', labels='Seed', amount=Decimal('5000000'))
+        for investor in investors[4:8]:
+            CommunicationLog.objects.create(investor=investor)
+        for investor in investors[8:]:
+            ResponseFunding.objects.create(
+                investor=investor, communication=CommunicationLog.objects.create(investor=investor),
+                response_status='success', amount_offered=Decimal('100000'), response_date=timezone.now(),
+            )
+        leaving.delete()
+
+        now = self.commit()
+        for segment in built:
+            rebuilt_at = segment.rebuilt_at
+            segment = segments.refresh(segment, now)
+            # Applied from the change feed, not by a full rebuild
+            self.assertEqual(segment.rebuilt_at, rebuilt_at)
+            live = set(segments.matching(segment.definition, now).values_list('pk', flat=True))
+            self.assertEqual(self.members(segment), live, segment.definition)
+            self.assertEqual(segment.member_count, len(live))
+
+    def page(self, segment):
+        self.client.force_login(self.user)
+        response = self.client.get(f'/investors/?segment={segment.pk}')
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_pages_apply_pending_changes(self):
+        segment = segments.rebuild(Segment.objects.create(name='VCs', definition='label in (VC)'))
+        rebuilt_at = segment.rebuilt_at
+        added = Investor.objects.create(name='Zeta Ventures', email='zeta@example.com', labels='VC')
+        self.commit()
+
+        self.assertIn(b'zeta@example.com', self.page(segment))
+        segment.refresh_from_db()
+        self.assertEqual(segment.rebuilt_at, rebuilt_at)
+        self.assertTrue(segments.is_fresh(segment))
+        self.assertTrue(SegmentMembership.objects.filter(segment=segment, investor=added).exists())
+
+    def test_pages_evaluate_live_above_the_threshold(self):
+        segment = segments.rebuild(Segment.objects.create(name='VCs', definition='label in (VC)'))
+        added = [
+            Investor.objects.create(name=f'Zeta {i}', email=f'zeta{i}@example.com', labels='VC') for i in range(3)
+        ]
+        self.commit()
+        cursor = segment.change_cursor
+
+        with mock.patch.object(segments, 'REBUILD_THRESHOLD', 2):
+            content = self.page(segment)
+        # Too many changes to apply on a read: the definition was evaluated live
+        self.assertIn(b'zeta2@example.com', content)
+        self.assertFalse(SegmentMembership.objects.filter(investor__in=added).exists())
+        segment.refresh_from_db()
+        self.assertEqual(segment.change_cursor, cursor)
+
+        with mock.patch.object(segments, 'REBUILD_THRESHOLD', 2):
+            segment = segments.refresh(segment)
+        self.assertTrue(segments.is_fresh(segment))
+        self.assertEqual(SegmentMembership.objects.filter(investor__in=added).count(), 3)
+
+    @override_settings(SEGMENT_MAX_AGE=3600)
+    def test_time_relative_pages_change_with_the_window(self):
+        relative = Segment.objects.create(name='Cold', definition='last_contact > 30d')
+        fixed = Segment.objects.create(name='Never', definition='last_contact = never')
+        now = timezone.now().replace(minute=59, second=0, microsecond=0)
+        self.assertIsNone(segments.window_start(fixed.pk, now))
+        start = segments.window_start(relative.pk, now)
+        self.assertEqual(start, now.replace(minute=0))
+        self.assertEqual(segments.window_start(relative.pk, now + timedelta(minutes=2)), start + timedelta(hours=1))
+
+
+class FollowUpScheduleTests(TestCase):
+    """Full and incremental follow-up scans, and sending one email per investor."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.draft = EmailDraft.objects.create(name='intro', subject='Hello', body='Hi')
+
+    def email(self, name, days_ago, status='success', draft=True):
+        investor = Investor.objects.filter(name=name).first() or Investor.objects.create(
+            name=name, email=f'{name.lower()}@example.com',
+        )
+        log = CommunicationLog.objects.create(investor=investor, draft=self.draft if draft else None, status=status)
+        CommunicationLog.objects.filter(pk=log.pk).update(sent_at=timezone.now() - timedelta(days=days_ago))
+        log.refresh_from_db()
+        return log
+
+    def run_at(self, seconds, **kwargs):
+        # Test transactions never commit, so number the pending change log entries first
+        changes.sequence_pending()
+        return followups.schedule(days=15, now=timezone.now() + timedelta(seconds=seconds), **kwargs)
+
+    def pending(self):
+        return set(FollowUp.objects.filter(status='pending').values_list('communication__investor__name', flat=True))
+
+    def test_full_scan(self):
+        self.email('Due', 20)
+        answered = self.email('Answered', 20)
+        ResponseFunding.objects.create(
+            investor=answered.investor, communication=answered, response_date=timezone.now(),
+        )
+        self.email('Recent', 20)
+        self.email('Recent', 3)
+        self.email('Custom', 20, draft=False)
+
+        run = self.run_at(5, full=True)
+        self.assertEqual((run.since, run.queued), (None, 1))
+        self.assertEqual(self.pending(), {'Due'})
+        # Already queued: nothing new, and the count says so
+        self.assertEqual(self.run_at(10, full=True).queued, 0)
+
+    def test_incremental_scan_rechecks_changed_investors(self):
+        failed = self.email('Retried', 20, status='failed')
+        self.assertIsNone(self.run_at(5).since)
+
+        # Logged after the checkpoint although sent before it
+        self.email('Late', 20)
+        again = self.email('Again', 20)
+        FollowUp.objects.create(investor=again.investor, communication=again, draft=self.draft, due_date=again.sent_at)
+        self.email('Again', 1)
+        run = self.run_at(10)
+        self.assertIsNotNone(run.since)
+        self.assertEqual((run.queued, self.pending()), (1, {'Late'}))
+        self.assertEqual(FollowUp.objects.get(communication=again).status, 'dismissed')
+
+        failed.status = 'success'
+        failed.save()
+        run = self.run_at(15)
+        self.assertEqual((run.queued, self.pending()), (1, {'Late', 'Retried'}))
+
+        # Deleting the newer email makes the older one due again; its investor is unknown
+        CommunicationLog.objects.filter(investor__name='Again', sent_at__gt=again.sent_at).delete()
+        self.assertEqual(self.run_at(20).since, None)
+        self.assertEqual(self.pending(), {'Late', 'Retried'})
+
+    def test_send_emails_each_investor_once(self):
+        older, newer = self.email('Twice', 25), self.email('Twice', 20)
+        ids = [
+            FollowUp.objects.create(investor=log.investor, communication=log, draft=self.draft, due_date=log.sent_at).pk
+            for log in (older, newer)
+        ]
+        self.assertEqual(followups.send(ids), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            dict(FollowUp.objects.values_list('communication_id', 'status')),
+            {older.pk: 'dismissed', newer.pk: 'sent'},
+        )
+
+
+class CohortTests(TestCase):
+    """Cohort report parsing, loading and the NumPy/plain Python engines."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_data', investors=60, artifacts=2, drafts=3, communications=600, responses=200,
+            days=90, seed=5, stdout=StringIO(),
+        )
+
+    def origin(self, weeks=12):
+        today = timezone.localdate()
+        return today - timedelta(days=today.weekday() + 7 * (weeks - 1))
+
+    def report(self, weeks=12):
+        columns = cohorts.load_columns(self.origin(weeks), weeks)
+        return {
+            'cohorts': cohorts.cohort_curves(columns, weeks),
+            'latency': cohorts.latency_distribution(columns),
+            'labels': cohorts.label_conversion(columns),
+        }
+
+    def test_parse_weeks(self):
+        self.assertEqual(cohorts.parse_weeks({'weeks': '8'}), 8)
+        self.assertEqual(cohorts.parse_weeks({}), cohorts.default_weeks())
+        for value in ('abc', '2.5', '0', '500'):
+            with self.subTest(value=value):
+                with self.assertRaisesMessage(ValueError, 'weeks must be a whole number between 1 and 104'):
+                    cohorts.parse_weeks({'weeks': value})
+
+    def test_only_cohort_investors_are_loaded(self):
+        outside = Investor.objects.create(name='Old', email='old@example.com', labels='Legacy')
+        log = CommunicationLog.objects.create(investor=outside)
+        CommunicationLog.objects.filter(pk=log.pk).update(sent_at=timezone.now() - timedelta(days=400))
+        ResponseFunding.objects.create(
+            investor=outside, communication=log, response_status='success', response_date=timezone.now(),
+        )
+        # First contacts, then labels and responses for the one batch of cohort investors
+        with self.assertNumQueries(3):
+            columns = cohorts.load_columns(self.origin(), 12)
+        self.assertTrue(columns['cohort'])
+        self.assertNotIn(('Legacy',), columns['labels'])
+        self.assertEqual(len(columns['labels']), len(columns['cohort']))
+
+    @skipUnless(cohorts.load_numpy(), 'NumPy is not installed')
+    def test_numpy_matches_plain_python(self):
+        with_numpy = self.report()
+        with mock.patch.object(cohorts, 'load_numpy', return_value=None):
+            without = self.report()
+        self.assertEqual(with_numpy['cohorts'], without['cohorts'])
+        self.assertEqual(with_numpy['labels'], without['labels'])
+        self.assertEqual(with_numpy['latency']['histogram'], without['latency']['histogram'])
+        for key, value in with_numpy['latency']['percentiles'].items():
+            self.assertAlmostEqual(value, without['latency']['percentiles'][key], places=2)
+
+
+class ResponseLatencyTests(TestCase):
+    """Response latency fields kept by the signals and rebuilt by the backfill."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.investor = Investor.objects.create(name='Ada', email='ada@example.com')
+        cls.draft = EmailDraft.objects.create(name='intro', subject='Hello', body='Hi')
+        cls.log = CommunicationLog.objects.create(investor=cls.investor, draft=cls.draft)
+        cls.sent_at = timezone.now().replace(microsecond=0) - timedelta(days=5)
+        CommunicationLog.objects.filter(pk=cls.log.pk).update(sent_at=cls.sent_at)
+
+    def respond(self, days):
+        return ResponseFunding.objects.create(
+            investor=self.investor, communication=self.log, response_date=self.sent_at + timedelta(days=days),
+        )
+
+    def entries(self, response):
+        return ChangeLog.objects.filter(resource='responses', object_id=response.pk, action='update').count()
+
+    def test_saving_a_response_sets_the_fields(self):
+        response = self.respond(2)
+        response.refresh_from_db()
+        self.assertEqual(response.draft_id, self.draft.pk)
+        self.assertEqual(response.latency_seconds, 2 * 86400)
+        self.assertTrue(response.is_first_response)
+
+    def test_earlier_response_takes_over_and_is_recorded(self):
+        later = self.respond(3)
+        # The flag is set after the insert, so it is recorded as an update
+        self.assertEqual(self.entries(later), 1)
+        earlier = self.respond(1)
+        later.refresh_from_db()
+        earlier.refresh_from_db()
+        self.assertEqual((earlier.is_first_response, later.is_first_response), (True, False))
+        self.assertEqual(self.entries(later), 2)
+
+        earlier.delete()
+        later.refresh_from_db()
+        self.assertTrue(later.is_first_response)
+        self.assertEqual(self.entries(later), 3)
+
+    def test_resent_email_refreshes_latency(self):
+        response = self.respond(2)
+        entries = self.entries(response)
+        self.log.sent_at = self.sent_at + timedelta(days=1)
+        self.log.save()
+        response.refresh_from_db()
+        self.assertEqual(response.latency_seconds, 86400)
+        self.assertEqual(self.entries(response), entries + 1)
+
+    def test_rewrites_invalidate_the_analytics_cache(self):
+        response = self.respond(2)
+        ResponseFunding.objects.filter(pk=response.pk).update(is_first_response=False)
+        version = analytics.cache_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(latency.mark_first_responses([self.log.pk]), 1)
+        self.assertNotEqual(analytics.cache_version(), version)
+
+        # Nothing to fix: no entries and no invalidation
+        version, entries = analytics.cache_version(), ChangeLog.objects.count()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.assertEqual(latency.mark_first_responses([self.log.pk]), 0)
+        self.assertEqual((analytics.cache_version(), ChangeLog.objects.count(), callbacks), (version, entries, []))
+
+    def test_backfill_fixes_stale_rows(self):
+        first, second = self.respond(1), self.respond(4)
+        ResponseFunding.objects.filter(pk=first.pk).update(draft=None, latency_seconds=None, is_first_response=False)
+        ResponseFunding.objects.filter(pk=second.pk).update(is_first_response=True)
+        ChangeLog.objects.all().delete()
+        out = StringIO()
+        call_command('backfill_response_latency', stdout=out)
+
+        self.assertIn('Updated 2 responses', out.getvalue())
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.draft_id, first.latency_seconds, first.is_first_response), (self.draft.pk, 86400, True))
+        self.assertFalse(second.is_first_response)
+        self.assertEqual((self.entries(first), self.entries(second)), (1, 1))
@@ -0,0 +1,110 @@
+"""
+Investor activity timeline.
+Merges an investor's communications and funding responses into one reverse-chronological
+stream, one bounded query per source, with keyset cursors for loading older pages.
+"""
+from datetime import datetime
+
+from django.db.models import Q
+
+# Sort rank breaks timestamp ties between sources; higher ranks come first.
+KIND_RANK = {'communication': 1, 'response': 0}
+
+PAGE_SIZE = 20
+
+
+def encode_cursor(entry):
+    return f"{entry['timestamp'].isoformat()}|{entry['kind']}|{entry['id']}"
+
+
+def decode_cursor(cursor):
+    """
+    Parse a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    timestamp, kind, pk = cursor.split('|')
+    if kind not in KIND_RANK:
+        raise ValueError(f'Unknown timeline entry kind: {kind}')
+    return datetime.fromisoformat(timestamp), kind, int(pk)
+
+
+def _older_than(cursor, time_field, kind):
+    """Q selecting rows of `kind` that sort after the cursor position."""
+    timestamp, cursor_kind, pk = cursor
+    q = Q(**{f'{time_field}__lt': timestamp})
+    if KIND_RANK[kind] < KIND_RANK[cursor_kind]:
+        q |= Q(**{time_field: timestamp})
+    elif kind == cursor_kind:
+        q |= Q(**{time_field: timestamp, 'pk__lt': pk})
+    return q
+
+
+def _communication_entry(comm):
+    return {
+        'kind': 'communication',
+        'id': comm.id,
+        'timestamp': comm.sent_at,
+        'title': comm.draft.name if comm.draft else 'Custom Email',
+        'status': comm.status,
+        'amount': None,
+        'notes': comm.notes,
+        'user': comm.sent_by.username if comm.sent_by else 'System',
+    }
+
+
+def _response_entry(response):
+    return {
+        'kind': 'response',
+        'id': response.id,
+        'timestamp': response.response_date,
+        'title': 'Funding response',
+        'status': response.response_status,
+        'amount': response.amount_offered,
+        'notes': response.notes,
+        'user': response.created_by.username if response.created_by else 'System',
+    }
+
+
+def _sort_key(entry):
+    return entry['timestamp'], KIND_RANK[entry['kind']], entry['id']
+
+
+def investor_timeline(investor, before=None, limit=PAGE_SIZE):
+    """
+    Return one page of an investor's activity, newest first.
+
+    Args:
+        investor: Investor model instance
+        before: optional cursor string; only entries older than it are returned
+        limit: maximum number of entries
+
+    Returns:
+        tuple: (entries: list of dicts, next_cursor: str or None)
+    """
+    cursor = decode_cursor(before) if before else None
+
+    communications = investor.communications.select_related('draft', 'sent_by').order_by('-sent_at', '-pk')
+    responses = investor.funding_responses.select_related('created_by').order_by('-response_date', '-pk')
+    if cursor:
+        communications = communications.filter(_older_than(cursor, 'sent_at', 'communication'))
+        responses = responses.filter(_older_than(cursor, 'response_date', 'response'))
+
+    # Fetch one extra row per source to know whether an older page exists
+    entries = [_communication_entry(c) for c in communications[:limit + 1]]
+    entries += [_response_entry(r) for r in responses[:limit + 1]]
+    entries.sort(key=_sort_key, reverse=True)
+
+    page = entries[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(entries) > limit else None
+    return page, next_cursor
+
+
+def serialize_entry(entry):
+    """JSON-ready form of a timeline entry."""
+    return {
+        **entry,
+        'timestamp': entry['timestamp'].isoformat(),
+        'amount': str(entry['amount']) if entry['amount'] is not None else None,
+    }
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     # Authentication
@@ -13,18 +13,52 @@ urlpatterns = [
     # Chatbot API
     path('api/chatbot/', views.chatbot_api, name='chatbot_api'),
     
+    # Analytics API
+    path('api/analytics/drafts/', views.analytics_drafts, name='analytics_drafts'),
+    path('api/analytics/timeseries/', views.analytics_timeseries, name='analytics_timeseries'),
+    path('api/analytics/funnel/', views.analytics_funnel, name='analytics_funnel'),
+    path('api/analytics/cohorts/', views.analytics_cohorts, name='analytics_cohorts'),
+    
+    # REST API
+    path('api/investors/', api.collection, {'resource': 'investors'}, name='api_investors'),
+    path('api/investors/<int:pk>/', api.item, {'resource': 'investors'}, name='api_investor'),
+    path('api/artifacts/', api.collection, {'resource': 'artifacts'}, name='api_artifacts'),
+    path('api/artifacts/<int:pk>/', api.item, {'resource': 'artifacts'}, name='api_artifact'),
+    path('api/drafts/', api.collection, {'resource': 'drafts'}, name='api_drafts'),
+    path('api/drafts/<int:pk>/', api.item, {'resource': 'drafts'}, name='api_draft'),
+    path('api/communications/', api.collection, {'resource': 'communications'}, name='api_communications'),
+    path('api/communications/<int:pk>/', api.item, {'resource': 'communications'}, name='api_communication'),
+    path('api/responses/', api.collection, {'resource': 'responses'}, name='api_responses'),
+    path('api/responses/<int:pk>/', api.item, {'resource': 'responses'}, name='api_response'),
+    path('api/changes/', views.changes_feed, name='api_changes'),
+    
+    # Lookup API
+    path('api/lookup/investors/', views.lookup_investors, name='lookup_investors'),
+    path('api/lookup/communications/', views.lookup_communications, name='lookup_communications'),
+    
     # Investors
     path('investors/', views.investor_list, name='investor_list'),
     path('investors/add/', views.investor_create, name='investor_create'),
+    path('investors/bulk/', views.investor_bulk, name='investor_bulk'),
+    path('investors/duplicates/', views.investor_duplicates, name='investor_duplicates'),
+    path('investors/merge/', views.investor_merge, name='investor_merge'),
     path('investors/<int:pk>/', views.investor_detail, name='investor_detail'),
+    path('investors/<int:pk>/timeline/', views.investor_timeline, name='investor_timeline'),
     path('investors/<int:pk>/edit/', views.investor_edit, name='investor_edit'),
     path('investors/<int:pk>/delete/', views.investor_delete, name='investor_delete'),
     
+    # Segments
+    path('segments/', views.segment_list, name='segment_list'),
+    path('segments/add/', views.segment_create, name='segment_create'),
+    path('segments/<int:pk>/edit/', views.segment_edit, name='segment_edit'),
+    path('segments/<int:pk>/delete/', views.segment_delete, name='segment_delete'),
+    
     # Artifacts
     path('artifacts/', views.artifact_list, name='artifact_list'),
     path('artifacts/add/', views.artifact_create, name='artifact_create'),
     path('artifacts/<int:pk>/edit/', views.artifact_edit, name='artifact_edit'),
     path('artifacts/<int:pk>/delete/', views.artifact_delete, name='artifact_delete'),
+    path('artifacts/download/<str:token>/', views.artifact_download, name='artifact_download'),
     
     # Email Drafts
     path('drafts/', views.draft_list, name='draft_list'),
@@ -35,9 +69,14 @@ urlpatterns = [
     # Responses/Funding
     path('responses/', views.response_list, name='response_list'),
     path('responses/add/', views.response_create, name='response_create'),
+    path('responses/bulk/', views.response_bulk, name='response_bulk'),
     path('responses/<int:pk>/edit/', views.response_edit, name='response_edit'),
     path('responses/<int:pk>/delete/', views.response_delete, name='response_delete'),
     
+    # Follow-Ups
+    path('follow-ups/', views.followup_list, name='followup_list'),
+    path('follow-ups/bulk/', views.followup_bulk, name='followup_bulk'),
+    
     # Communication Logs
     path('communications/', views.communication_list, name='communication_list'),
 ]
@@ -2,18 +2,27 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, logout, authenticate
 from django.contrib import messages
-from django.http import JsonResponse
-from django.db.models import Count, Sum, Q
-from django.utils import timezone
-from datetime import timedelta
+from django.core import signing
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.db.models import Q
+from django.utils.http import url_has_allowed_host_and_scheme
 import json
+import os
 
-from .models import Investor, Artifact, EmailDraft, CommunicationLog, ResponseFunding
+from . import (
+    analytics, api, attachments, bulk, changes, cohorts, dedupe, followups, latency, lookups, segments, streaming,
+    timeline,
+)
+from .conditional import conditional_page
+from .models import (
+    Investor, DuplicateSuggestion, Artifact, EmailDraft, CommunicationLog, ResponseFunding, Segment, FollowUp,
+)
 from .forms import (
     InvestorForm, ArtifactForm, EmailDraftForm, 
-    ResponseFundingForm, UserRegistrationForm, ChatbotForm
+    ResponseFundingForm, UserRegistrationForm, ChatbotForm,
+    InvestorBulkActionForm, ResponseBulkActionForm, InvestorMergeForm, SegmentForm,
+    FollowUpBulkActionForm
 )
-from .chatbot import ChatbotService
 
 
 # ==================== Authentication Views ====================
@@ -68,55 +77,16 @@ def logout_view(request):
 @login_required
 def dashboard(request):
     """Main dashboard with analytics and chatbot."""
-    now = timezone.now()
-    
     # Basic stats
     total_investors = Investor.objects.count()
     total_artifacts = Artifact.objects.count()
     total_drafts = EmailDraft.objects.count()
-    total_emails_sent = CommunicationLog.objects.filter(status='success').count()
-    
-    # Email aging analysis
-    emails_7_days = CommunicationLog.objects.filter(
-        sent_at__gte=now - timedelta(days=7),
-        status='success'
-    ).count()
-    
-    emails_15_days = CommunicationLog.objects.filter(
-        sent_at__gte=now - timedelta(days=15),
-        sent_at__lt=now - timedelta(days=7),
-        status='success'
-    ).count()
-    
-    emails_30_days = CommunicationLog.objects.filter(
-        sent_at__gte=now - timedelta(days=30),
-        sent_at__lt=now - timedelta(days=15),
-        status='success'
-    ).count()
-    
-    emails_older = CommunicationLog.objects.filter(
-        sent_at__lt=now - timedelta(days=30),
-        status='success'
-    ).count()
-    
-    # Response/Funding analytics
-    response_stats = ResponseFunding.objects.values('response_status').annotate(
-        count=Count('id'),
-        total_amount=Sum('amount_offered')
-    )
     
-    response_data = {
-        'success': {'count': 0, 'amount': 0},
-        'failure': {'count': 0, 'amount': 0},
-        'pending': {'count': 0, 'amount': 0},
-    }
-    
-    for stat in response_stats:
-        status = stat['response_status']
-        response_data[status] = {
-            'count': stat['count'],
-            'amount': stat['total_amount'] or 0
-        }
+    # Email aging analysis and response/funding analytics (from daily rollups)
+    aging = analytics.aging_buckets()
+    response_data = analytics.response_totals()
+    follow_ups_pending = FollowUp.objects.filter(status='pending').count()
+    response_times = latency.response_times()
     
     # Recent communications
     recent_communications = CommunicationLog.objects.select_related(
@@ -132,12 +102,15 @@ def dashboard(request):
         'total_investors': total_investors,
         'total_artifacts': total_artifacts,
         'total_drafts': total_drafts,
-        'total_emails_sent': total_emails_sent,
-        'emails_7_days': emails_7_days,
-        'emails_15_days': emails_15_days,
-        'emails_30_days': emails_30_days,
-        'emails_older': emails_older,
+        'total_emails_sent': aging['total'],
+        'emails_7_days': aging['last_7'],
+        'emails_15_days': aging['last_15'],
+        'emails_30_days': aging['last_30'],
+        'emails_older': aging['older'],
+        'follow_ups_pending': follow_ups_pending,
         'response_data': response_data,
+        'response_times_by_draft': response_times['drafts'][:5],
+        'response_times_by_label': response_times['labels'][:5],
         'recent_communications': recent_communications,
         'recent_responses': recent_responses,
     }
@@ -161,7 +134,8 @@ def chatbot_api(request):
                     'message': 'Please enter a message.'
                 })
             
-            # Process message through chatbot service
+            # Process message through chatbot service (imported lazily, see load_genai)
+            from .chatbot import ChatbotService
             chatbot = ChatbotService(user=request.user)
             response = chatbot.process_message(message)
             
@@ -179,6 +153,12 @@ def chatbot_api(request):
                     response['data']['draft'] = {
                         'id': draft.id, 'name': draft.name, 'subject': draft.subject
                     }
+                # Handle segment object (from segment command)
+                if 'segment' in response['data'] and response['data']['segment']:
+                    segment = response['data']['segment']
+                    response['data']['segment'] = {
+                        'id': segment.id, 'name': segment.name, 'member_count': segment.member_count
+                    }
                 # Handle investors list (from search)
                 if 'investors' in response['data']:
                     response['data']['investors'] = [
@@ -203,14 +183,156 @@ def chatbot_api(request):
     return JsonResponse({'type': 'error', 'message': 'Method not allowed'}, status=405)
 
 
+# ==================== Analytics API ====================
+
+@login_required
+def analytics_drafts(request):
+    """Per-draft conversion rates for a date window, read from the daily rollups."""
+    try:
+        start, end = analytics.parse_window(request.GET)
+    except ValueError as e:
+        return JsonResponse({'type': 'error', 'message': str(e)}, status=400)
+    
+    return JsonResponse({
+        'start': start,
+        'end': end,
+        'drafts': analytics.draft_conversion(start, end),
+    })
+
+
+@login_required
+def analytics_timeseries(request):
+    """Daily sends, responses and funding for a date window, read from the daily rollups."""
+    try:
+        start, end = analytics.parse_window(request.GET)
+    except ValueError as e:
+        return JsonResponse({'type': 'error', 'message': str(e)}, status=400)
+    
+    return JsonResponse({
+        'start': start,
+        'end': end,
+        **analytics.daily_series(start, end),
+    })
+
+
+@login_required
+def analytics_funnel(request):
+    """Draft conversion funnel per draft and per investor label, shaped for charting."""
+    try:
+        start, end = analytics.parse_window(request.GET)
+    except ValueError as e:
+        return JsonResponse({'type': 'error', 'message': str(e)}, status=400)
+    
+    return JsonResponse({
+        'start': start,
+        'end': end,
+        **analytics.funnel(start, end),
+    })
+
+
+@login_required
+def analytics_cohorts(request):
+    """Weekly first-contact cohorts with response latency and per-label conversion."""
+    try:
+        weeks = cohorts.parse_weeks(request.GET)
+    except ValueError as e:
+        return JsonResponse({'type': 'error', 'message': str(e)}, status=400)
+    
+    return JsonResponse({
+        'weeks': weeks,
+        **cohorts.cohorts(weeks),
+    })
+
+
+# ==================== Change Feed API ====================
+
+def changes_feed(request):
+    """
+    Inserts, updates and deletes across the API resources in commit order.
+    Clients pass back `next_cursor` as ?since= to fetch only what changed.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'type': 'error', 'message': 'Authentication required.'}, status=401)
+    
+    try:
+        since = int(request.GET.get('since', 0))
+        limit = min(int(request.GET.get('limit', changes.DEFAULT_LIMIT)), changes.MAX_LIMIT)
+    except ValueError:
+        return JsonResponse({'type': 'error', 'message': 'since and limit must be integers'}, status=400)
+    if since < 0 or limit < 1:
+        return JsonResponse({'type': 'error', 'message': 'since must be >= 0 and limit positive'}, status=400)
+    
+    resources = [name.strip() for name in request.GET.get('resources', '').split(',') if name.strip()]
+    unknown = [name for name in resources if name not in api.RESOURCES]
+    if unknown:
+        return JsonResponse({'type': 'error', 'message': f"Unknown resources: {', '.join(unknown)}"}, status=400)
+    
+    try:
+        return api.json_response(changes.feed(since=since, limit=limit, resources=resources or None))
+    except changes.CursorExpired:
+        return JsonResponse({
+            'type': 'error',
+            'message': 'Changes after this cursor have been pruned; reload through the REST API and continue from head.',
+            'head': changes.head(),
+        }, status=410)
+
+
+# ==================== Lookup API ====================
+
+def _lookup_limit(request):
+    """?limit= for the typeahead endpoints, capped at lookups.MAX_LIMIT."""
+    limit = int(request.GET.get('limit', lookups.DEFAULT_LIMIT))
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return min(limit, lookups.MAX_LIMIT)
+
+
+@login_required
+def lookup_investors(request):
+    """Investors whose name or email starts with ?q=, for typeahead selectors."""
+    try:
+        limit = _lookup_limit(request)
+    except ValueError:
+        return JsonResponse({'type': 'error', 'message': 'limit must be a positive integer'}, status=400)
+    
+    results, more = lookups.search_investors(request.GET.get('q', ''), limit=limit)
+    return JsonResponse({'results': results, 'more': more})
+
+
+@login_required
+def lookup_communications(request):
+    """Communications matching ?q= by investor, optionally limited to one ?investor=."""
+    try:
+        limit = _lookup_limit(request)
+        investor_id = int(request.GET['investor']) if request.GET.get('investor') else None
+    except ValueError:
+        return JsonResponse({'type': 'error', 'message': 'investor and limit must be positive integers'}, status=400)
+    
+    results, more = lookups.search_communications(request.GET.get('q', ''), investor_id=investor_id, limit=limit)
+    return JsonResponse({'results': results, 'more': more})
+
+
 # ==================== Investor Views ====================
 
+def _segment_window(request):
+    segment_id = request.GET.get('segment', '')
+    return segments.window_start(int(segment_id)) if segment_id.isdigit() else None
+
+
 @login_required
+@conditional_page(Investor, Segment, freshness=_segment_window)
 def investor_list(request):
-    """List all investors with search functionality."""
+    """List all investors with search and saved segment filters."""
     query = request.GET.get('q', '')
+    segment_id = request.GET.get('segment', '')
     
     investors = Investor.objects.all()
+    segment = None
+    
+    if segment_id.isdigit():
+        segment = Segment.objects.filter(pk=segment_id).first()
+        if segment:
+            investors = segments.members(segment)
     
     if query:
         investors = investors.filter(
@@ -222,8 +344,11 @@ def investor_list(request):
     context = {
         'investors': investors,
         'query': query,
+        'segment': segment,
+        'segments': Segment.objects.only('pk', 'name'),
+        'bulk_form': InvestorBulkActionForm(),
     }
-    return render(request, 'core/investor_list.html', context)
+    return streaming.render_list(request, 'core/investor_list.html', 'core/investor_rows.html', investors, context)
 
 
 @login_required
@@ -263,20 +388,36 @@ def investor_edit(request, pk):
 
 
 @login_required
+@conditional_page(Investor, CommunicationLog, ResponseFunding, EmailDraft)
 def investor_detail(request, pk):
-    """View investor details with communication history."""
+    """View investor details with the most recent activity timeline entries."""
     investor = get_object_or_404(Investor, pk=pk)
-    communications = investor.communications.all().order_by('-sent_at')
-    responses = investor.funding_responses.all().order_by('-response_date')
+    entries, next_cursor = timeline.investor_timeline(investor)
     
     context = {
         'investor': investor,
-        'communications': communications,
-        'responses': responses,
+        'timeline': entries,
+        'next_cursor': next_cursor,
     }
     return render(request, 'core/investor_detail.html', context)
 
 
+@login_required
+def investor_timeline(request, pk):
+    """JSON endpoint returning older pages of an investor's activity timeline."""
+    investor = get_object_or_404(Investor, pk=pk)
+    
+    try:
+        entries, next_cursor = timeline.investor_timeline(investor, before=request.GET.get('before'))
+    except ValueError:
+        return JsonResponse({'type': 'error', 'message': 'Invalid cursor.'}, status=400)
+    
+    return JsonResponse({
+        'entries': [timeline.serialize_entry(entry) for entry in entries],
+        'next_cursor': next_cursor,
+    })
+
+
 @login_required
 def investor_delete(request, pk):
     """Delete an investor."""
@@ -291,9 +432,148 @@ def investor_delete(request, pk):
     return render(request, 'core/confirm_delete.html', {'object': investor, 'type': 'investor'})
 
 
+@login_required
+def investor_bulk(request):
+    """Apply a bulk action to the investors selected on the list page."""
+    if request.method == 'POST':
+        form = InvestorBulkActionForm(request.POST)
+        _apply_bulk_action(request, form, bulk.investor_action, 'investor')
+    return _redirect_to_list(request, 'investor_list')
+
+
+# ==================== Duplicate Investors ====================
+
+DUPLICATES_SHOWN = 200
+
+
+@login_required
+def investor_duplicates(request):
+    """Likely duplicate investors from the last find_duplicates run, best matches first."""
+    suggestions = DuplicateSuggestion.objects.select_related('first', 'second')
+    context = {
+        'suggestions': suggestions[:DUPLICATES_SHOWN],
+        'total': suggestions.count(),
+        'scanned_at': DuplicateSuggestion.objects.values_list('found_at', flat=True).first(),
+    }
+    return render(request, 'core/investor_duplicates.html', context)
+
+
+@login_required
+def investor_merge(request):
+    """Merge one investor into another, keeping the first's record."""
+    if request.method == 'POST':
+        form = InvestorMergeForm(request.POST)
+        if not form.is_valid():
+            for errors in form.errors.values():
+                messages.error(request, errors[0])
+        else:
+            keep, merge = form.cleaned_data['keep'], form.cleaned_data['merge']
+            try:
+                dedupe.merge_investors(keep, [merge], user=request.user)
+            except ValueError as e:
+                messages.error(request, str(e))
+            else:
+                messages.success(request, 'Investors merged successfully!')
+    return redirect('investor_duplicates')
+
+
+# ==================== Segment Views ====================
+
+@login_required
+@conditional_page(Segment)
+def segment_list(request):
+    """List saved investor segments."""
+    context = {
+        'segments': Segment.objects.all(),
+    }
+    return render(request, 'core/segment_list.html', context)
+
+
+@login_required
+def segment_create(request):
+    """Create a saved segment and evaluate its members."""
+    if request.method == 'POST':
+        form = SegmentForm(request.POST)
+        if form.is_valid():
+            segment = form.save(commit=False)
+            segment.created_by = request.user
+            segment.save()
+            segment = segments.rebuild(segment)
+            messages.success(request, f'Segment "{segment.name}" created with {segment.member_count} investors!')
+            return redirect('segment_list')
+    else:
+        form = SegmentForm()
+    
+    return render(request, 'core/segment_form.html', {'form': form, 'title': 'Create Segment'})
+
+
+@login_required
+def segment_edit(request, pk):
+    """Edit a saved segment; members are re-evaluated when the definition changes."""
+    segment = get_object_or_404(Segment, pk=pk)
+    
+    if request.method == 'POST':
+        form = SegmentForm(request.POST, instance=segment)
+        if form.is_valid():
+            segment = form.save()
+            if 'definition' in form.changed_data:
+                segment = segments.rebuild(segment)
+            messages.success(request, f'Segment "{segment.name}" updated successfully!')
+            return redirect('segment_list')
+    else:
+        form = SegmentForm(instance=segment)
+    
+    return render(request, 'core/segment_form.html', {'form': form, 'title': 'Edit Segment', 'segment': segment})
+
+
+@login_required
+def segment_delete(request, pk):
+    """Delete a saved segment unless a campaign targets it."""
+    segment = get_object_or_404(Segment, pk=pk)
+    
+    if request.method == 'POST':
+        if segment.campaigns.exists():
+            messages.error(request, f'Segment "{segment.name}" is used by a campaign and cannot be deleted.')
+            return redirect('segment_list')
+        name = segment.name
+        segment.delete()
+        messages.success(request, f'Segment "{name}" deleted successfully!')
+        return redirect('segment_list')
+    
+    return render(request, 'core/confirm_delete.html', {'object': segment, 'type': 'segment'})
+
+
+# ==================== Bulk Action Helpers ====================
+
+def _apply_bulk_action(request, form, action_func, noun):
+    if not form.is_valid():
+        for errors in form.errors.values():
+            messages.error(request, errors[0])
+        return
+    
+    data = form.cleaned_data
+    try:
+        count = action_func(data['ids'], data['action'], data['value'], user=request.user)
+    except ValueError as e:
+        messages.error(request, str(e))
+        return
+    
+    label = dict(form.fields['action'].choices)[data['action']]
+    messages.success(request, f'{label} applied to {count} {noun}{"" if count == 1 else "s"}.')
+
+
+def _redirect_to_list(request, default):
+    """Return to the list page the action was submitted from, keeping its filters."""
+    next_url = request.POST.get('next', '')
+    if url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
+    return redirect(default)
+
+
 # ==================== Artifact Views ====================
 
 @login_required
+@conditional_page(Artifact)
 def artifact_list(request):
     """List all artifacts with search functionality."""
     query = request.GET.get('q', '')
@@ -368,9 +648,30 @@ def artifact_delete(request, pk):
     return render(request, 'core/confirm_delete.html', {'object': artifact, 'type': 'artifact'})
 
 
+def artifact_download(request, token):
+    """
+    Serve an artifact through a signed, expiring link from an outgoing email.
+    Recipients are not users, so the signature is the permission (like a /media/ URL).
+    """
+    try:
+        pk = attachments.read_token(token)
+    except signing.SignatureExpired:
+        return HttpResponse('This download link has expired.', status=410)
+    except signing.BadSignature:
+        raise Http404('Invalid download link')
+    
+    artifact = get_object_or_404(Artifact, pk=pk)
+    try:
+        handle = artifact.file.open('rb')
+    except (FileNotFoundError, ValueError):
+        raise Http404('File not found')
+    return FileResponse(handle, as_attachment=True, filename=os.path.basename(artifact.file.name))
+
+
 # ==================== Email Draft Views ====================
 
 @login_required
+@conditional_page(EmailDraft, Artifact)
 def draft_list(request):
     """List all email drafts."""
     drafts = EmailDraft.objects.all()
@@ -413,7 +714,13 @@ def draft_edit(request, pk):
     else:
         form = EmailDraftForm(instance=draft)
     
-    return render(request, 'core/draft_form.html', {'form': form, 'title': 'Edit Email Draft', 'draft': draft})
+    context = {
+        'form': form,
+        'title': 'Edit Email Draft',
+        'draft': draft,
+        'payload': attachments.AttachmentPlan(draft),
+    }
+    return render(request, 'core/draft_form.html', context)
 
 
 @login_required
@@ -433,6 +740,7 @@ def draft_delete(request, pk):
 # ==================== Response/Funding Views ====================
 
 @login_required
+@conditional_page(ResponseFunding, Investor)
 def response_list(request):
     """List all investor responses."""
     responses = ResponseFunding.objects.select_related('investor', 'communication').all()
@@ -445,6 +753,7 @@ def response_list(request):
         'responses': responses,
         'status_filter': status_filter,
         'status_choices': ResponseFunding.RESPONSE_STATUS,
+        'bulk_form': ResponseBulkActionForm(),
     }
     return render(request, 'core/response_list.html', context)
 
@@ -496,9 +805,50 @@ def response_delete(request, pk):
     return render(request, 'core/confirm_delete.html', {'object': response_obj, 'type': 'response'})
 
 
+@login_required
+def response_bulk(request):
+    """Apply a bulk action to the responses selected on the list page."""
+    if request.method == 'POST':
+        form = ResponseBulkActionForm(request.POST)
+        _apply_bulk_action(request, form, bulk.response_action, 'response')
+    return _redirect_to_list(request, 'response_list')
+
+
+# ==================== Follow-Up Views ====================
+
+@login_required
+def followup_list(request):
+    """Queued follow-ups for unanswered emails, oldest first."""
+    status_filter = request.GET.get('status', 'pending')
+    
+    follow_ups = FollowUp.objects.select_related('investor', 'communication__draft', 'draft')
+    if status_filter in dict(FollowUp.STATUS_CHOICES):
+        follow_ups = follow_ups.filter(status=status_filter)
+    
+    context = {
+        'follow_ups': follow_ups,
+        'status_filter': status_filter,
+        'status_choices': FollowUp.STATUS_CHOICES,
+        'bulk_form': FollowUpBulkActionForm(),
+    }
+    return streaming.render_list(
+        request, 'core/followup_list.html', 'core/followup_rows.html', follow_ups, context,
+    )
+
+
+@login_required
+def followup_bulk(request):
+    """Send or dismiss the follow-ups selected on the list page."""
+    if request.method == 'POST':
+        form = FollowUpBulkActionForm(request.POST)
+        _apply_bulk_action(request, form, followups.follow_up_action, 'follow-up')
+    return _redirect_to_list(request, 'followup_list')
+
+
 # ==================== Communication Log Views ====================
 
 @login_required
+@conditional_page(CommunicationLog, Investor, EmailDraft)
 def communication_list(request):
     """List all communication logs."""
     communications = CommunicationLog.objects.select_related(
@@ -508,4 +858,6 @@ def communication_list(request):
     context = {
         'communications': communications,
     }
-    return render(request, 'core/communication_list.html', context)
+    return streaming.render_list(
+        request, 'core/communication_list.html', 'core/communication_rows.html', communications, context
+    )
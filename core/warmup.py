@@ -0,0 +1,62 @@
+"""
+Template warm-up.
+With the cached loader each template is parsed once per process, on first use; compiling
+them all at startup moves that cost out of the first requests after a deploy.
+The WSGI and ASGI entry points call warm_on_startup(), so management commands and
+shells never pay for it.
+"""
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.cached import Loader as CachedLoader
+
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(engine):
+    """Names of every .html template under the directories the engine's loaders search."""
+    names = set()
+    for loader in engine.template_loaders:
+        for source in getattr(loader, 'loaders', [loader]):
+            for directory in source.get_dirs():
+                directory = Path(directory)
+                names.update(path.relative_to(directory).as_posix() for path in directory.rglob('*.html'))
+    return sorted(names)
+
+
+def is_cached(engine):
+    return any(isinstance(loader, CachedLoader) for loader in engine.template_loaders)
+
+
+def warm_templates():
+    """
+    Compile every template into the cached loader of each Django template engine.
+
+    Returns:
+        int: number of templates compiled
+    """
+    start = time.perf_counter()
+    compiled = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates) or not is_cached(backend.engine):
+            continue
+        for name in template_names(backend.engine):
+            try:
+                backend.engine.get_template(name)
+                compiled += 1
+            except TemplateSyntaxError as e:
+                # Library templates may need tags from apps that are not installed
+                logger.debug('Template warm-up skipped %s: %s', name, e)
+    logger.info('Compiled %s templates in %.0f ms', compiled, (time.perf_counter() - start) * 1000)
+    return compiled
+
+
+def warm_on_startup():
+    """Warm the template cache of a serving process when TEMPLATE_WARMUP is on."""
+    if getattr(settings, 'TEMPLATE_WARMUP', False):
+        warm_templates()
@@ -42,6 +42,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticAssetMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -68,6 +70,10 @@ TEMPLATES = [
     },
 ]
 
+# Compile every template into the cached loader when a WSGI/ASGI worker starts (see core/warmup.py);
+# enabled in settings_production
+TEMPLATE_WARMUP = False
+
 WSGI_APPLICATION = 'fundraise.wsgi.application'
 
 
@@ -82,6 +88,27 @@ DATABASES = {
 }
 
 
+# Cache used by analytics and, once it is shared, sessions and the cached user lookup.
+# LocMemCache is per process: with several workers use a shared backend (Redis, Memcached)
+# so session writes and user invalidations are seen by every worker.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Sessions are kept in the database. settings_production switches to cached_db once the
+# cache is shared (check core.E001 rejects a cached engine on a per-process cache). Use
+# 'django.contrib.sessions.backends.signed_cookies' to keep no server-side session state
+# at all (sessions then cannot be revoked server-side before they expire).
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
+# request.user is resolved through the cache (core/auth.py) instead of a query per request,
+# once the default cache is shared between workers
+AUTHENTICATION_BACKENDS = ['core.auth.CachedModelBackend']
+USER_CACHE_SECONDS = 60
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -118,11 +145,64 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic writes content-hashed, minified and pre-compressed (gzip, and brotli when
+# installed) files; StaticAssetMiddleware serves them with immutable caching when DEBUG is off
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'core.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# collectstatic fails when any of these is missing; build the font with `manage.py build_fonts`
+STATIC_REQUIRED_FILES = ['fonts/inter-latin.woff2']
 
 # Media files (User uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'datastorage'
 
+# Artifact media pipeline (core/media.py): preview size, in-process worker threads
+# (0 leaves everything to `manage.py process_artifacts`) and per-tool timeout in seconds
+ARTIFACT_THUMBNAIL_SIZE = (320, 320)
+ARTIFACT_PROCESSING_WORKERS = 2
+ARTIFACT_PROCESSING_TIMEOUT = 120
+
+# Attachment budget for draft emails, in MB (drafts may override it). Artifacts that do
+# not fit are sent as signed download links, valid for ARTIFACT_LINK_MAX_AGE seconds.
+EMAIL_ATTACHMENT_BUDGET_MB = 10
+ARTIFACT_LINK_MAX_AGE = 14 * 24 * 60 * 60
+
+# Public base URL used in links inside outgoing emails
+SITE_URL = 'http://127.0.0.1:8000'
+
+# Responses smaller than this many bytes are sent uncompressed (core.middleware)
+COMPRESSION_MIN_SIZE = 500
+
+# Large list pages (investors, communications) stream their table rows in chunks read
+# from a server-side cursor instead of rendering the whole page in memory
+LIST_STREAMING = True
+LIST_STREAMING_CHUNK_SIZE = 500
+
+# Change feed entries are kept this many days (prune_changes); readers holding an older
+# cursor get 410 and resync (core.changes)
+CHANGE_LOG_RETENTION_DAYS = 30
+
+# Segments relative to today (e.g. 'last_contact > 30d') are re-evaluated in full when
+# their materialized members are older than this many seconds (core.segments)
+SEGMENT_MAX_AGE = 60 * 60
+
+# schedule_followups queues a follow-up when an investor's latest email has had no
+# response for this many days, at most FOLLOW_UP_MAX times per investor (core.followups)
+FOLLOW_UP_AFTER_DAYS = 15
+FOLLOW_UP_MAX = 2
+
+# Number of weekly first-contact cohorts in the dashboard cohort chart (core.cohorts)
+COHORT_WEEKS = 12
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,52 @@
+"""
+Production settings for fundraise project.
+
+Use with DJANGO_SETTINGS_MODULE=fundraise.settings_production. Everything not set
+here comes from fundraise/settings.py; secrets and hosts are read from the environment.
+"""
+
+import os
+from copy import deepcopy
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import TEMPLATES as BASE_TEMPLATES
+
+
+DEBUG = False
+
+try:
+    SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+except KeyError:
+    raise ImproperlyConfigured('Set DJANGO_SECRET_KEY for production.')
+
+ALLOWED_HOSTS = [host.strip() for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host.strip()]
+
+SITE_URL = os.environ.get('SITE_URL', SITE_URL)  # noqa: F405
+
+# Sessions and request.user are cached (core/auth.py); every worker must share the cache
+# for logouts and deactivations to reach it. RedisCache needs the redis package.
+if os.environ.get('DJANGO_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['DJANGO_REDIS_URL'],
+        },
+    }
+    # Read sessions from the shared cache, writing through to the database
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Templates are compiled once per process and kept in memory; edits need a restart
+TEMPLATES = deepcopy(BASE_TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['debug'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+# Compile every template when a WSGI/ASGI worker starts (core.warmup) so no request pays for parsing
+TEMPLATE_WARMUP = True
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fundraise.settings')
 
 application = get_wsgi_application()
+
+# Only serving processes compile templates up front (see core.warmup)
+from core.warmup import warm_on_startup  # noqa: E402
+
+warm_on_startup()
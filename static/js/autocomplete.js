@@ -0,0 +1,103 @@
+/**
+ * Typeahead for selects rendered by AutocompleteSelect - options are fetched as the user types
+ */
+
+class Autocomplete {
+    constructor(select) {
+        this.select = select;
+        this.url = select.dataset.autocompleteUrl;
+        this.dependsOn = select.dataset.dependsOn ? select.form.elements[select.dataset.dependsOn] : null;
+        this.timer = null;
+        this.controller = null;
+
+        this.input = document.createElement('input');
+        this.input.type = 'search';
+        this.input.className = 'form-input autocomplete-input';
+        this.input.placeholder = 'Type to search...';
+        this.input.autocomplete = 'off';
+
+        this.list = document.createElement('ul');
+        this.list.className = 'autocomplete-results';
+        this.list.hidden = true;
+
+        select.before(this.input);
+        this.input.after(this.list);
+
+        this.input.addEventListener('input', () => this.schedule());
+        this.input.addEventListener('focus', () => this.schedule());
+        this.input.addEventListener('keydown', (e) => this.keydown(e));
+        document.addEventListener('click', (e) => {
+            if (e.target !== this.input && !this.list.contains(e.target)) this.close();
+        });
+    }
+
+    schedule() {
+        clearTimeout(this.timer);
+        this.timer = setTimeout(() => this.search(), 200);
+    }
+
+    async search() {
+        const params = new URLSearchParams({ q: this.input.value.trim() });
+        if (this.dependsOn && this.dependsOn.value) {
+            params.set('investor', this.dependsOn.value);
+        }
+        if (this.controller) this.controller.abort();
+        this.controller = new AbortController();
+
+        try {
+            const response = await fetch(`${this.url}?${params}`, { signal: this.controller.signal });
+            if (!response.ok) return;
+            const data = await response.json();
+            this.render(data.results, data.more);
+        } catch (error) {
+            if (error.name !== 'AbortError') console.error('Autocomplete error:', error);
+        }
+    }
+
+    render(results, more) {
+        this.list.innerHTML = '';
+        results.forEach(result => {
+            const item = document.createElement('li');
+            item.textContent = result.text;
+            item.addEventListener('click', () => this.choose(result));
+            this.list.appendChild(item);
+        });
+        if (!results.length || more) {
+            const note = document.createElement('li');
+            note.className = 'autocomplete-note';
+            note.textContent = results.length ? 'Keep typing to narrow the results' : 'No matches';
+            this.list.appendChild(note);
+        }
+        this.list.hidden = false;
+    }
+
+    choose(result) {
+        // Keep only the empty option (if any) and the chosen one
+        Array.from(this.select.options).forEach(option => {
+            if (option.value) option.remove();
+        });
+        this.select.add(new Option(result.text, result.id, true, true));
+        this.select.dispatchEvent(new Event('change', { bubbles: true }));
+        this.input.value = '';
+        this.close();
+    }
+
+    keydown(e) {
+        if (e.key === 'Escape') {
+            this.close();
+        } else if (e.key === 'Enter' && !this.list.hidden) {
+            // Enter picks the first match instead of submitting the form
+            const first = this.list.querySelector('li:not(.autocomplete-note)');
+            e.preventDefault();
+            if (first) first.click();
+        }
+    }
+
+    close() {
+        this.list.hidden = true;
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('select[data-autocomplete-url]').forEach(select => new Autocomplete(select));
+});
@@ -0,0 +1,48 @@
+/**
+ * List page bulk actions - row selection and confirmation
+ */
+
+class BulkActions {
+    constructor() {
+        this.form = document.getElementById('bulk-form');
+        this.selectAll = document.getElementById('bulk-select-all');
+        this.count = document.getElementById('bulk-count');
+        this.apply = document.getElementById('bulk-apply');
+        this.checkboxes = Array.from(document.querySelectorAll('.bulk-select'));
+
+        if (!this.form) return;
+
+        this.checkboxes.forEach(box => box.addEventListener('change', () => this.update()));
+        if (this.selectAll) {
+            this.selectAll.addEventListener('change', () => {
+                this.checkboxes.forEach(box => { box.checked = this.selectAll.checked; });
+                this.update();
+            });
+        }
+        this.form.addEventListener('submit', (e) => this.confirm(e));
+    }
+
+    selected() {
+        return this.checkboxes.filter(box => box.checked).length;
+    }
+
+    update() {
+        const selected = this.selected();
+        this.count.textContent = `${selected} selected`;
+        this.apply.disabled = selected === 0;
+        if (this.selectAll) {
+            this.selectAll.checked = selected > 0 && selected === this.checkboxes.length;
+        }
+    }
+
+    confirm(e) {
+        if (this.form.elements.action.value !== 'delete') return;
+        if (!window.confirm(`Delete ${this.selected()} selected rows? This cannot be undone.`)) {
+            e.preventDefault();
+        }
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    new BulkActions();
+});
@@ -0,0 +1,98 @@
+/**
+ * Dashboard cohort chart - cumulative success rate by week after first contact
+ */
+
+const SVG_NS = 'http://www.w3.org/2000/svg';
+
+class CohortChart {
+    constructor() {
+        this.chart = document.getElementById('cohort-chart');
+        this.legend = document.getElementById('cohort-legend');
+        this.latency = document.getElementById('cohort-latency');
+
+        if (this.chart) {
+            this.load();
+        }
+    }
+
+    async load() {
+        try {
+            const response = await fetch(this.chart.dataset.url);
+            const data = await response.json();
+            if (data.type === 'error') throw new Error(data.message);
+            this.render(data);
+        } catch (error) {
+            this.chart.textContent = 'Cohort data is unavailable.';
+            console.error('Cohort chart error:', error);
+        }
+    }
+
+    element(name, attributes) {
+        const node = document.createElementNS(SVG_NS, name);
+        Object.entries(attributes).forEach(([key, value]) => node.setAttribute(key, value));
+        return node;
+    }
+
+    color(index, count) {
+        return `hsl(${240 + (120 * index) / Math.max(count - 1, 1)}, 70%, 62%)`;
+    }
+
+    render(data) {
+        const width = 720, height = 260, pad = 36;
+        const cohorts = data.cohorts.filter(cohort => cohort.investors > 0);
+        if (!cohorts.length) {
+            this.chart.textContent = 'No investors were first contacted in this period.';
+            return;
+        }
+
+        const rates = cohorts.flatMap(cohort => cohort.success_rate.filter(rate => rate !== null));
+        const top = Math.max(0.01, ...rates);
+        const x = offset => pad + (offset * (width - 2 * pad)) / Math.max(data.offsets.length - 1, 1);
+        const y = rate => height - pad - (rate * (height - 2 * pad)) / top;
+
+        const svg = this.element('svg', { viewBox: `0 0 ${width} ${height}`, class: 'cohort-svg' });
+        [0, top / 2, top].forEach(rate => {
+            svg.appendChild(this.element('line', { x1: pad, x2: width - pad, y1: y(rate), y2: y(rate), class: 'cohort-grid' }));
+            const label = this.element('text', { x: 4, y: y(rate) + 4, class: 'cohort-axis' });
+            label.textContent = `${Math.round(rate * 100)}%`;
+            svg.appendChild(label);
+        });
+        data.offsets.forEach(offset => {
+            const label = this.element('text', { x: x(offset), y: height - 12, class: 'cohort-axis', 'text-anchor': 'middle' });
+            label.textContent = `W+${offset}`;
+            svg.appendChild(label);
+        });
+
+        this.legend.innerHTML = '';
+        cohorts.forEach((cohort, index) => {
+            const color = this.color(index, cohorts.length);
+            const points = cohort.success_rate
+                .map((rate, offset) => (rate === null ? null : `${x(offset)},${y(rate)}`))
+                .filter(point => point !== null)
+                .join(' ');
+            const line = this.element('polyline', { points, stroke: color, class: 'cohort-line' });
+            const title = this.element('title', {});
+            title.textContent = `Week of ${cohort.week}: ${cohort.investors} investors`;
+            line.appendChild(title);
+            svg.appendChild(line);
+
+            const item = document.createElement('span');
+            item.className = 'cohort-legend-item';
+            item.style.borderColor = color;
+            item.textContent = `${cohort.week} (${cohort.investors})`;
+            this.legend.appendChild(item);
+        });
+
+        this.chart.innerHTML = '';
+        this.chart.appendChild(svg);
+
+        const latency = data.latency;
+        if (this.latency && latency.responses) {
+            this.latency.textContent = `Median reply ${latency.percentiles.p50} days · p90 ${latency.percentiles.p90} days`;
+        }
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    new CohortChart();
+});
@@ -0,0 +1,87 @@
+/**
+ * Investor activity timeline - loads older entries on demand
+ */
+
+class Timeline {
+    constructor() {
+        this.button = document.getElementById('timeline-load-more');
+        this.rows = document.getElementById('timeline-rows');
+
+        if (this.button && this.rows) {
+            this.button.addEventListener('click', () => this.loadMore());
+        }
+    }
+
+    formatDate(isoString) {
+        const date = new Date(isoString);
+        return date.toLocaleDateString('en-US', { month: 'short', day: '2-digit', year: 'numeric' }) +
+            ' ' + date.toLocaleTimeString('en-GB', { hour: '2-digit', minute: '2-digit' });
+    }
+
+    formatAmount(amount) {
+        if (amount === null) return '-';
+        return '₹' + Math.round(parseFloat(amount)).toLocaleString('en-IN');
+    }
+
+    truncateWords(text, count) {
+        const words = (text || '').split(/\s+/).filter(Boolean);
+        return words.length > count ? words.slice(0, count).join(' ') + ' …' : words.join(' ');
+    }
+
+    addRow(entry) {
+        const row = document.createElement('tr');
+
+        const activity = document.createElement('td');
+        activity.textContent = (entry.kind === 'communication' ? '📧 ' : '💰 ') + entry.title;
+
+        const status = document.createElement('td');
+        const badge = document.createElement('span');
+        badge.className = `badge badge-${entry.status}`;
+        badge.textContent = entry.status;
+        status.appendChild(badge);
+
+        const amount = document.createElement('td');
+        amount.textContent = this.formatAmount(entry.amount);
+
+        const date = document.createElement('td');
+        date.textContent = this.formatDate(entry.timestamp);
+
+        const notes = document.createElement('td');
+        notes.textContent = this.truncateWords(entry.notes, 10);
+
+        row.append(activity, status, amount, date, notes);
+        this.rows.appendChild(row);
+    }
+
+    async loadMore() {
+        const cursor = this.button.dataset.cursor;
+        this.button.disabled = true;
+        this.button.textContent = 'Loading...';
+
+        try {
+            const response = await fetch(`${this.button.dataset.url}?before=${encodeURIComponent(cursor)}`);
+            if (!response.ok) {
+                throw new Error(`Timeline request failed with status ${response.status}`);
+            }
+            const data = await response.json();
+
+            data.entries.forEach(entry => this.addRow(entry));
+
+            if (data.next_cursor) {
+                this.button.dataset.cursor = data.next_cursor;
+                this.button.disabled = false;
+                this.button.textContent = 'Load more';
+            } else {
+                this.button.remove();
+            }
+        } catch (error) {
+            this.button.disabled = false;
+            this.button.textContent = 'Retry';
+            console.error('Timeline error:', error);
+        }
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    new Timeline();
+});